@@ -10,13 +10,15 @@ import os
 import asyncio
 import logging
 import sys
-from opentelemetry import trace
+from opentelemetry import metrics, trace
 import semantic_kernel as sk
 from dotenv import load_dotenv
 from azure.identity import ManagedIdentityCredential
 from semantic_kernel.utils.logging import setup_logging
 from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
+from semantic_kernel.connectors.ai.completion_usage import CompletionUsage
 from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
 from semantic_kernel.agents import ChatCompletionAgent, ChatHistoryAgentThread
 from semantic_kernel.connectors.ai.azure_ai_inference import AzureAIInferenceChatCompletion
 from semantic_kernel.connectors.mcp import MCPSsePlugin
@@ -38,6 +40,11 @@ handler.setFormatter(formatter)
 if not logger.hasHandlers():
     logger.addHandler(handler)
 
+meter = metrics.get_meter("setlist_agent")
+token_counter = meter.create_counter(
+    "setlist_agent.tokens", unit="{token}",
+    description="Tokens used by the agent, by endpoint, model deployment and token type")
+
 
 class EnhancedSetlistAgent:
     """Enhanced Setlist Agent with Spotify OAuth integration."""
@@ -47,6 +54,8 @@ class EnhancedSetlistAgent:
         self._agent = None
         self.plugin_setlistfm = None
         self.plugin_spotify = None
+        # Token usage of the last chat (prompt_tokens, completion_tokens, total_tokens)
+        self.last_usage = None
         logging.getLogger("kernel").setLevel(logging.DEBUG)
 
         # Validate required environment variables
@@ -302,6 +311,7 @@ class EnhancedSetlistAgent:
     async def chat(self, user_input: str, thread: ChatHistoryAgentThread) -> str:
         """Process user input and return agent response."""
         logger.info(f"Processing user input: {user_input}")
+        self.last_usage = None
         if not self._agent:
             await self.initialize_agent()
 
@@ -310,16 +320,47 @@ class EnhancedSetlistAgent:
             return await self._handle_command(user_input)
 
         tracer = trace.get_tracer(__name__)
-        with tracer.start_as_current_span(name="enhanced-agent-chat"):
+        with tracer.start_as_current_span(name="enhanced-agent-chat") as span:
+            # The function calling loop does not sum the usage of its model calls: each
+            # function call message (intermediate) and final answer carries its own.
+            usage = CompletionUsage()
+
+            async def add_usage(message: ChatMessageContent):
+                nonlocal usage
+                if isinstance(message.metadata.get("usage"), CompletionUsage):
+                    usage += message.metadata["usage"]
+
             try:
                 joined_response = []
-                async for response in self._agent.invoke(messages=user_input, thread=thread):
+                async for response in self._agent.invoke(messages=user_input, thread=thread,
+                                                         on_intermediate_message=add_usage):
                     logger.info(f"chat response: {response.to_dict()}")
+                    await add_usage(response.message)
                     joined_response.append(str(response.content))
                 return "\n".join(joined_response)
             except Exception as e:
                 logger.error(f"Error in chat processing: {e}")
                 return f"I encountered an error: {str(e)}"
+            finally:
+                self._record_usage(usage, thread, span)
+
+    def _record_usage(self, usage: CompletionUsage, thread: ChatHistoryAgentThread, span: trace.Span):
+        """
+        Keep the token usage of the chat in last_usage and export it: counter by endpoint,
+        deployment and token type, and span attributes (with the thread).
+        """
+        prompt_tokens = usage.prompt_tokens or 0
+        completion_tokens = usage.completion_tokens or 0
+        self.last_usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                           "total_tokens": prompt_tokens + completion_tokens}
+        attributes = {"endpoint": "chainlit", "model_deployment": os.getenv("MODEL_DEPLOYMENT_NAME", "")}
+        token_counter.add(prompt_tokens, {**attributes, "token_type": "prompt"})
+        token_counter.add(completion_tokens, {**attributes, "token_type": "completion"})
+        span.set_attribute("gen_ai.usage.input_tokens", prompt_tokens)
+        span.set_attribute("gen_ai.usage.output_tokens", completion_tokens)
+        if thread and thread.id:
+            span.set_attribute("thread_id", thread.id)
+        logger.info(f"Chat used {prompt_tokens} prompt and {completion_tokens} completion tokens")
 
     async def _handle_command(self, command: str) -> str:
         """Handle special commands."""
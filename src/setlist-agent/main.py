@@ -112,6 +112,8 @@ async def on_message(message: cl.Message):
             logger.info(f"Agent response: {response}")
             # Update message with response
             msg.content = response
+            if agent.last_usage:
+                msg.metadata = {**(msg.metadata or {}), "usage": agent.last_usage}
             await msg.update()
 
         except Exception as e:
@@ -0,0 +1,103 @@
+"""
+Admission control of the endpoints starting agent runs.
+
+At most `max_concurrent` requests run at once; the next ones wait for a slot in a
+bounded queue. When the queue is full, or a request waited longer than the queue
+timeout, it is rejected right away with a Retry-After estimated from the recent run
+durations, instead of starting a run that would time out with all the others.
+The queue depth, runs in flight, wait times and rejections are exported as
+OpenTelemetry metrics for the autoscaling rules.
+"""
+import asyncio
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from opentelemetry import metrics
+from opentelemetry.metrics import Observation
+
+logger = logging.getLogger("setlistfm_agent")
+
+meter = metrics.get_meter("setlistfm_agent")
+wait_histogram = meter.create_histogram(
+    "setlistfm_agent.admission.wait", unit="ms", description="Time requests waited for an agent run slot")
+rejected_counter = meter.create_counter(
+    "setlistfm_agent.admission.rejected", description="Requests rejected with 429 by the admission control")
+
+
+class AdmissionRejected(Exception):
+    """The request cannot be admitted, it should be retried after `retry_after` seconds."""
+
+    def __init__(self, retry_after: int, reason: str):
+        super().__init__(f"Request rejected ({reason}), retry after {retry_after}s")
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionGate:
+    """Concurrency limit with a bounded wait queue."""
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        # moving average of the duration of the admitted requests
+        self._average_duration: Optional[float] = None
+
+        meter.create_observable_gauge(
+            "setlistfm_agent.admission.queue_depth", callbacks=[lambda options: [Observation(self.waiting)]],
+            description="Requests waiting for an agent run slot")
+        meter.create_observable_gauge(
+            "setlistfm_agent.admission.in_flight", callbacks=[lambda options: [Observation(self.in_flight)]],
+            description="Requests holding an agent run slot")
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a new request, from the queue depth and recent durations."""
+        if self._average_duration is None:
+            return 1
+        return min(max(1, math.ceil(self._average_duration * (self.waiting + 1) / self.max_concurrent)), 120)
+
+    def _reject(self, endpoint: str, reason: str) -> AdmissionRejected:
+        self.rejected += 1
+        rejected_counter.add(1, {"endpoint": endpoint, "reason": reason})
+        logger.warning(f"Rejected {endpoint} request: {reason} "
+                       f"({self.in_flight} in flight, {self.waiting} waiting)")
+        return AdmissionRejected(self.retry_after(), reason)
+
+    @asynccontextmanager
+    async def admit(self, endpoint: str) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block, raise AdmissionRejected when none is available in time."""
+        if self.in_flight + self.waiting >= self.max_concurrent + self.max_queue:
+            raise self._reject(endpoint, "queue_full")
+
+        self.waiting += 1
+        start = time.monotonic()
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await self._semaphore.acquire()
+        except TimeoutError:
+            raise self._reject(endpoint, "queue_timeout") from None
+        finally:
+            self.waiting -= 1
+        wait_histogram.record((time.monotonic() - start) * 1000, {"endpoint": endpoint})
+
+        self.in_flight += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            duration = time.monotonic() - start
+            self._average_duration = duration if self._average_duration is None \
+                else 0.8 * self._average_duration + 0.2 * duration
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": self.in_flight, "waiting": self.waiting, "rejected": self.rejected,
+                "max_concurrent": self.max_concurrent, "max_queue": self.max_queue}
@@ -20,6 +20,62 @@ class Settings(BaseSettings):
 
     # Setlist.fm API
     setlistfm_api_key: str = os.getenv("SETLISTFM_API_KEY", "")
+    setlistfm_api_base: str = os.getenv(
+        "SETLISTFM_API_BASE", "https://api.setlist.fm/rest/1.0")
+
+    # Fast path of /search/setlists and /venues/info: direct setlist.fm API lookups (pooled
+    # connections, short timeout) answered with templates, the agent is used when they fail
+    fast_path_enabled: bool = os.getenv(
+        "FAST_PATH_ENABLED", "true").lower() == "true"
+    setlistfm_api_timeout: float = float(
+        os.getenv("SETLISTFM_API_TIMEOUT", "5"))
+    setlistfm_api_max_connections: int = int(
+        os.getenv("SETLISTFM_API_MAX_CONNECTIONS", "20"))
+
+    # Project connections are listed once and cached for this many seconds
+    connection_cache_ttl: float = float(
+        os.getenv("CONNECTION_CACHE_TTL", "3600"))
+
+    # Persistent agent, reused across restarts and replicas while its definition is unchanged
+    agent_name: str = os.getenv("AGENT_NAME", "setlistfm-agent")
+    agent_delete_on_shutdown: bool = os.getenv(
+        "AGENT_DELETE_ON_SHUTDOWN", "false").lower() == "true"
+
+    # Agent run polling: fast first polls, then backoff up to the max interval, cancelled past the deadline
+    run_poll_initial_interval: float = float(
+        os.getenv("RUN_POLL_INITIAL_INTERVAL", "0.25"))
+    run_poll_max_interval: float = float(
+        os.getenv("RUN_POLL_MAX_INTERVAL", "2.0"))
+    run_poll_backoff: float = float(os.getenv("RUN_POLL_BACKOFF", "1.5"))
+    run_deadline: float = float(os.getenv("RUN_DEADLINE", "120"))
+
+    # /chat/batch: runs at once (default and max per request) and prompts per request
+    batch_concurrency: int = int(os.getenv("BATCH_CONCURRENCY", "8"))
+    batch_max_concurrency: int = int(
+        os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+    batch_max_size: int = int(os.getenv("BATCH_MAX_SIZE", "500"))
+
+    # Admission control of /chat, /search/setlists and /venues/info: agent runs at once,
+    # requests waiting for a slot (more are rejected with 429) and max wait in seconds
+    admission_max_concurrent: int = int(
+        os.getenv("ADMISSION_MAX_CONCURRENT", "16"))
+    admission_max_queue: int = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+    admission_queue_timeout: float = float(
+        os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+
+    # Answers of /search/setlists and /venues/info kept for this many seconds (0 disables
+    # the cache), at most this many of them
+    response_cache_ttl: float = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+    response_cache_size: int = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+
+    # Number of threads whose history is kept in memory
+    history_cache_threads: int = int(
+        os.getenv("HISTORY_CACHE_THREADS", "256"))
+
+    # Operations of the setlist.fm OpenAPI spec given to the agent, comma separated
+    # (empty: the operations the agent uses, see openapi_spec.AGENT_OPERATIONS)
+    setlistfm_openapi_operations: str = os.getenv(
+        "SETLISTFM_OPENAPI_OPERATIONS", "")
 
     # FastAPI settings
     host: str = "0.0.0.0"
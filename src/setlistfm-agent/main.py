@@ -2,17 +2,21 @@
 FastAPI main application for SetlistFM Agent
 """
 import asyncio
+import json
 import logging
-from contextlib import asynccontextmanager
-from typing import Dict, List, Optional, Any
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Any
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
 import uvicorn
 
 
+from admission import AdmissionGate, AdmissionRejected
 from configuration import settings, validate_required_settings
-from setlistfm_agent import setlistfm_agent
+from setlistfm_agent import UnknownCursorError, setlistfm_agent
 
 
 
@@ -66,6 +70,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Admission control of the endpoints starting agent runs
+admission_gate = AdmissionGate(
+    max_concurrent=settings.admission_max_concurrent,
+    max_queue=settings.admission_max_queue,
+    queue_timeout=settings.admission_queue_timeout
+)
+
+
+def too_many_requests(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many requests, please retry later",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+async def admitted(request: Request) -> AsyncIterator[None]:
+    """Hold an agent run slot during the request, reject it with 429 when none is available."""
+    try:
+        async with admission_gate.admit(request.url.path):
+            yield
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
+
+
+async def admitted_stream(request: Request) -> AsyncExitStack:
+    """
+    Take an agent run slot for a streamed response, reject the request with 429 when none is
+    available. The slot is released when the returned stack is closed, at the end of the stream:
+    a dependency with yield would release it before the response body is sent.
+    """
+    slot = AsyncExitStack()
+    try:
+        await slot.enter_async_context(admission_gate.admit(request.url.path))
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
+    return slot
+
 # Request/Response models
 
 
@@ -78,12 +120,30 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     """Chat response model."""
-    thread_id: str = Field(...,
-                           description="Thread ID for conversation continuity")
+    thread_id: Optional[str] = Field(
+        None, description="Thread ID for conversation continuity (None for setlist.fm answers)")
     response: str = Field(..., description="Agent response")
     citations: List[Dict[str, str]] = Field(
         default_factory=list, description="Source citations")
     status: str = Field(..., description="Response status")
+    source: str = Field(
+        "agent", description="Author of the answer: agent, or setlistfm for direct API lookups")
+    cached: bool = Field(
+        False, description="Answer shared from the response cache or with an identical request in flight")
+    timing: Optional[Dict[str, Any]] = Field(
+        None, description="Run duration and duration of its steps (model or tool calls), in ms")
+    usage: Optional[Dict[str, int]] = Field(
+        None, description="Tokens used by the run (prompt_tokens, completion_tokens, total_tokens)")
+
+
+class BatchChatRequest(BaseModel):
+    """Batch chat request model."""
+    messages: List[ChatRequest] = Field(..., min_length=1, max_length=settings.batch_max_size,
+                                        description="Chat requests to process")
+    concurrency: int = Field(settings.batch_concurrency, ge=1, le=settings.batch_max_concurrency,
+                             description="Maximum number of agent runs at once")
+    run_deadline: float = Field(settings.run_deadline, gt=0,
+                                description="Seconds after which a run is cancelled")
 
 
 class SetlistSearchRequest(BaseModel):
@@ -119,8 +179,20 @@ async def readiness_check():
     return HealthResponse(status="ready", version="0.1.0")
 
 
+@app.get("/admission")
+async def admission_stats() -> Dict[str, int]:
+    """Agent runs in flight, requests waiting and rejected by the admission control."""
+    return admission_gate.stats()
+
+
+@app.get("/cache")
+async def cache_stats() -> Dict[str, Any]:
+    """Entries, hits, coalesced requests and misses of the /search/setlists and /venues/info cache."""
+    return setlistfm_agent.response_cache.stats()
+
+
 # Chat endpoints
-@app.post("/chat", response_model=ChatResponse)
+@app.post("/chat", response_model=ChatResponse, dependencies=[Depends(admitted)])
 async def chat(request: ChatRequest) -> ChatResponse:
     """Process a chat message with the SetlistFM agent."""
     try:
@@ -138,13 +210,66 @@ async def chat(request: ChatRequest) -> ChatResponse:
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, slot: AsyncExitStack = Depends(admitted_stream)) -> StreamingResponse:
+    """Process a chat message and stream the agent run as Server-Sent Events."""
+    logger.info(f"Processing streamed chat request: {request.message[:100]}...")
+
+    async def events():
+        async with slot:
+            async for event in setlistfm_agent.chat_stream(
+                message=request.message,
+                thread_id=request.thread_id
+            ):
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # releases the slot when the client went away before the stream started
+        background=BackgroundTask(slot.aclose)
+    )
+
+
+@app.post("/chat/batch")
+async def chat_batch(request: BatchChatRequest, http_request: Request) -> StreamingResponse:
+    """
+    Process many chat messages concurrently, streaming the results as NDJSON as they finish.
+    Each run holds an admission slot, a message rejected by the admission control has the
+    "rejected" status and its retry_after.
+    """
+    logger.info(f"Processing batch of {len(request.messages)} chat requests "
+                f"(concurrency {request.concurrency})")
+
+    async def lines():
+        async for result in setlistfm_agent.chat_batch(
+            [message.model_dump() for message in request.messages],
+            concurrency=request.concurrency,
+            deadline=request.run_deadline,
+            admit=lambda: admission_gate.admit(http_request.url.path)
+        ):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @app.get("/chat/history/{thread_id}")
-async def get_chat_history(thread_id: str) -> List[Dict[str, Any]]:
-    """Get chat history for a specific thread."""
+async def get_chat_history(
+    thread_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Maximum number of messages"),
+    after: Optional[str] = Query(None, description="Return the messages after this message ID")
+) -> List[Dict[str, Any]]:
+    """Get chat history for a specific thread, the next page cursor is in the X-Next-Cursor header."""
     try:
-        history = await setlistfm_agent.get_thread_history(thread_id)
-        return history
+        history = await setlistfm_agent.get_thread_history(thread_id, limit=limit, after=after)
+        if history["next_cursor"]:
+            response.headers["X-Next-Cursor"] = history["next_cursor"]
+        return history["messages"]
 
+    except UnknownCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting chat history: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -152,36 +277,44 @@ async def get_chat_history(thread_id: str) -> List[Dict[str, Any]]:
 
 # Specialized endpoints
 @app.post("/search/setlists", response_model=ChatResponse)
-async def search_setlists(request: SetlistSearchRequest) -> ChatResponse:
+async def search_setlists(request: SetlistSearchRequest, http_request: Request) -> ChatResponse:
     """Search for setlists for a specific artist."""
     try:
         logger.info(f"Searching setlists for artist: {request.artist}")
 
         result = await setlistfm_agent.search_setlists(
             artist=request.artist,
-            venue=request.venue
+            venue=request.venue,
+            # cache hits and setlist.fm lookups do not take an agent run slot
+            admit=lambda: admission_gate.admit(http_request.url.path)
         )
 
         return ChatResponse(**result)
 
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
     except Exception as e:
         logger.error(f"Error searching setlists: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @app.post("/venues/info", response_model=ChatResponse)
-async def get_venue_info(request: VenueInfoRequest) -> ChatResponse:
+async def get_venue_info(request: VenueInfoRequest, http_request: Request) -> ChatResponse:
     """Get information about a venue."""
     try:
         logger.info(f"Getting venue info for: {request.venue_name}")
 
         result = await setlistfm_agent.get_venue_info(
             venue_name=request.venue_name,
-            city=request.city
+            city=request.city,
+            # cache hits and setlist.fm lookups do not take an agent run slot
+            admit=lambda: admission_gate.admit(http_request.url.path)
         )
 
         return ChatResponse(**result)
 
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
     except Exception as e:
         logger.error(f"Error getting venue info: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -197,9 +330,13 @@ async def root():
         "description": "AI Foundry SDK agent for setlist content management with Bing Grounding",
         "endpoints": {
             "chat": "/chat",
+            "chat_stream": "/chat/stream",
+            "chat_batch": "/chat/batch",
             "setlist_search": "/search/setlists",
             "venue_info": "/venues/info",
             "health": "/health",
+            "admission": "/admission",
+            "cache": "/cache",
             "ready": "/ready"
         }
     }
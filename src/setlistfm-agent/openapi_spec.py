@@ -0,0 +1,96 @@
+"""
+Trimmed setlist.fm OpenAPI spec for the OpenApiTool of the agent.
+
+The tool definitions built from the spec are processed by the model on every run. The
+full `openapi-setlistfm.json` describes every endpoint (users, cities, setlist versions)
+with long descriptions and example responses; the agent only needs the operations it
+uses and their parameters. `trim_openapi_spec` keeps these operations, resolves the
+`$ref`s of the parameters (jsonref), removes deprecated parameters, examples, XML
+responses and response schemas (the model reads the JSON it gets back), and shortens
+the descriptions.
+"""
+import copy
+import json
+import logging
+import re
+from typing import Any, Dict, Iterable
+
+import jsonref
+
+logger = logging.getLogger("setlistfm_agent")
+
+# Operations of the setlist.fm API used by the agent
+AGENT_OPERATIONS = (
+    "getSetlists", "getSetlist", "getArtists", "getArtist", "getArtistSetlists",
+    "getVenues", "getVenue", "getVenueSetlists",
+)
+
+_TAGS = re.compile(r"<[^>]+>")
+_INLINE_EXAMPLE = re.compile(r",?\s*\(?e\.g\..*$", re.IGNORECASE | re.DOTALL)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def shorten(text: str, max_length: int = 160) -> str:
+    """First sentence of a description, without HTML nor inline examples."""
+    text = " ".join(_TAGS.sub(" ", text or "").split())
+    text = _INLINE_EXAMPLE.sub("", text).strip()
+    text = _SENTENCE_END.split(text, maxsplit=1)[0]
+    return text if len(text) <= max_length else text[:max_length - 3].rstrip() + "..."
+
+
+def estimate_tokens(value: Any) -> int:
+    """Approximate token count of a JSON value (4 characters per token)."""
+    return len(json.dumps(value, separators=(",", ":"))) // 4
+
+
+def _trim_parameter(parameter: Dict[str, Any]) -> Dict[str, Any]:
+    trimmed = {key: parameter[key] for key in ("name", "in", "required") if key in parameter}
+    description = shorten(parameter.get("description", ""))
+    if description:
+        trimmed["description"] = description
+    schema = {key: value for key, value in parameter.get("schema", {}).items()
+              if key in ("type", "enum", "default", "format", "items")}
+    trimmed["schema"] = schema
+    return trimmed
+
+
+def trim_openapi_spec(spec: Dict[str, Any], operations: Iterable[str] = AGENT_OPERATIONS) -> Dict[str, Any]:
+    """Return a copy of the spec limited to the given operations, with resolved and compact parameters."""
+    operations = set(operations)
+    resolved = jsonref.replace_refs(copy.deepcopy(spec), proxies=False, lazy_load=False)
+
+    paths: Dict[str, Dict[str, Any]] = {}
+    for path, path_item in resolved["paths"].items():
+        for method, operation in path_item.items():
+            if operation.get("operationId") not in operations:
+                continue
+            parameters = [
+                _trim_parameter(parameter) for parameter in operation.get("parameters", [])
+                if "deprecated" not in parameter.get("description", "") and not parameter.get("deprecated")
+            ]
+            paths.setdefault(path, {})[method] = {
+                "operationId": operation["operationId"],
+                "summary": shorten(operation.get("summary") or operation.get("description", "")),
+                "parameters": parameters,
+                # The JSON content type is kept (setlist.fm answers in XML otherwise), not the schema
+                "responses": {
+                    status: {"description": shorten(response.get("description", "")),
+                             "content": {"application/json": {"schema": {"type": "object"}}}}
+                    for status, response in operation.get("responses", {}).items() if status.startswith("2")
+                },
+            }
+
+    missing = operations - {operation["operationId"] for item in paths.values() for operation in item.values()}
+    if missing:
+        logger.warning(f"Operations not found in the OpenAPI spec: {', '.join(sorted(missing))}")
+
+    trimmed = {
+        "openapi": spec["openapi"],
+        "info": {"title": spec["info"]["title"], "version": spec["info"]["version"]},
+        "servers": spec["servers"],
+        "paths": paths,
+        "components": {"securitySchemes": spec.get("components", {}).get("securitySchemes", {})},
+    }
+    if "security" in spec:
+        trimmed["security"] = spec["security"]
+    return trimmed
@@ -0,0 +1,130 @@
+"""
+Response cache of the structured endpoints (`/search/setlists`, `/venues/info`).
+
+The frontends ask for the same artists and venues over and over. Successful answers are
+kept for `ttl` seconds, at most `max_entries` of them (least recently used evicted first),
+keyed by the endpoint and its normalized parameters (case and whitespace insensitive).
+Identical requests arriving while the answer is being computed wait for that computation
+instead of starting their own lookup or agent run. Lookups, hits and coalesced requests
+are counted, and the hit rate is exported as a gauge.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from opentelemetry import metrics
+from opentelemetry.metrics import Observation
+
+logger = logging.getLogger("setlistfm_agent")
+
+meter = metrics.get_meter("setlistfm_agent")
+lookup_counter = meter.create_counter(
+    "setlistfm_agent.response_cache.lookups",
+    description="Requests of the structured endpoints by cache result (hit, coalesced or miss)")
+
+CacheKey = Tuple[str, Tuple[str, ...]]
+
+
+def cache_key(endpoint: str, *params: Optional[str]) -> CacheKey:
+    """Key of a request: endpoint and parameters without case nor extra whitespace."""
+    return endpoint, tuple(" ".join((param or "").split()).casefold() for param in params)
+
+
+@dataclass
+class CacheEntry:
+    result: Dict[str, Any]
+    expires: float
+
+
+class ResponseCache:
+    """TTL and LRU bounded cache of endpoint results, coalescing identical requests in flight."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        self._in_flight: Dict[CacheKey, asyncio.Task] = {}
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+        meter.create_observable_gauge(
+            "setlistfm_agent.response_cache.hit_rate", callbacks=[lambda options: [Observation(self.hit_rate())]],
+            description="Share of the structured endpoint requests served without their own run (hits and coalesced)")
+        meter.create_observable_gauge(
+            "setlistfm_agent.response_cache.entries", callbacks=[lambda options: [Observation(len(self._entries))]],
+            description="Answers in the response cache")
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.coalesced + self.misses
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+    def _get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry.expires:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry.result
+
+    def _put(self, key: CacheKey, result: Dict[str, Any]):
+        self._entries[key] = CacheEntry(result, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _count(self, key: CacheKey, result: str):
+        if result == "hit":
+            self.hits += 1
+        elif result == "coalesced":
+            self.coalesced += 1
+        else:
+            self.misses += 1
+        lookup_counter.add(1, {"endpoint": key[0], "result": result})
+
+    async def get_or_compute(self, key: CacheKey,
+                             compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Cached result of the request, or the result of `compute` (shared with the identical
+        requests arriving meanwhile). Only successful results are cached. Shared results are
+        returned with `"cached": True` and without the thread of the run that produced them.
+        """
+        if not self.enabled:
+            return await compute()
+
+        result = self._get(key)
+        if result is not None:
+            self._count(key, "hit")
+            return {**result, "thread_id": None, "cached": True}
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._count(key, "coalesced")
+            # shield: a waiter going away must not cancel the computation of the others
+            return {**await asyncio.shield(task), "thread_id": None, "cached": True}
+
+        self._count(key, "miss")
+        task = self._in_flight[key] = asyncio.create_task(self._compute(key, compute))
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: CacheKey, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        try:
+            result = await compute()
+            if result.get("status") == "success":
+                self._put(key, result)
+            return result
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "in_flight": len(self._in_flight), "hits": self.hits,
+                "coalesced": self.coalesced, "misses": self.misses, "hit_rate": self.hit_rate()}
@@ -1,18 +1,27 @@
 """
 SetlistFM Agent using AI Foundry SDK with Bing Grounding
+
+The agent uses the async (aio) AI Foundry clients: an agent run awaits the service
+instead of blocking the event loop, so the FastAPI app keeps serving other requests
+(and health probes) while runs are in progress.
 """
 import asyncio
+import hashlib
 import json
 import logging
 from multiprocessing import connection
 import os
-from typing import Dict, List, Optional, Any
-from azure.ai.projects import AIProjectClient
-from azure.ai.agents import AgentsClient
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any
+from azure.ai.projects.aio import AIProjectClient
 from azure.ai.projects.models import Connection, ApiKeyCredentials
-from azure.ai.agents.models import BingCustomSearchTool, MessageRole
+from azure.ai.agents.models import BingCustomSearchTool, ListSortOrder, MessageRole
+from azure.ai.agents.models import AgentStreamEvent, MessageDeltaChunk, RunStep, ThreadMessage, ThreadRun
 from azure.ai.agents.models import OpenApiTool, OpenApiConnectionAuthDetails, OpenApiConnectionSecurityScheme
-from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
+from azure.identity.aio import DefaultAzureCredential, ManagedIdentityCredential
 from azure.monitor.opentelemetry import configure_azure_monitor
 from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
 from opentelemetry.instrumentation.requests import RequestsInstrumentor
@@ -20,13 +29,17 @@ from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from opentelemetry.instrumentation.asyncio import AsyncioInstrumentor
 from opentelemetry.instrumentation.openai_v2 import OpenAIInstrumentor
 from typing import cast
-from opentelemetry import trace
+from opentelemetry import metrics, trace
 import httpx
 import os
 import jsonref
 
 
+from admission import AdmissionRejected
 from configuration import settings, validate_required_settings
+from openapi_spec import AGENT_OPERATIONS, estimate_tokens, trim_openapi_spec
+from response_cache import ResponseCache, cache_key
+from setlistfm_client import SetlistFMClient, SetlistFMLookupError
 
 # Configure logger for this module
 logger = logging.getLogger("setlistfm_agent")
@@ -38,29 +51,93 @@ handler.setFormatter(formatter)
 if not logger.hasHandlers():
     logger.addHandler(handler)
 
+meter = metrics.get_meter("setlistfm_agent")
+time_to_first_token_histogram = meter.create_histogram(
+    "setlistfm_agent.time_to_first_token", unit="ms",
+    description="Time between a streamed chat request and the first text delta of the agent")
+run_step_histogram = meter.create_histogram(
+    "setlistfm_agent.run_step.duration", unit="ms",
+    description="Duration of the agent run steps (model message creation or tool calls)")
+startup_histogram = meter.create_histogram(
+    "setlistfm_agent.startup", unit="ms",
+    description="Time to initialize the clients and the agent")
+token_counter = meter.create_counter(
+    "setlistfm_agent.tokens", unit="{token}",
+    description="Tokens used by the agent runs, by endpoint, model deployment and token type")
+fast_path_counter = meter.create_counter(
+    "setlistfm_agent.fast_path",
+    description="Requests of the structured endpoints answered by setlist.fm lookups or by the agent")
+
+
+def record_usage(usage: Any, endpoint: str, span: Optional[trace.Span] = None) -> Optional[Dict[str, int]]:
+    """
+    Export the token usage of a run (prompt, completion, total) and return it as a dict. The
+    counter is by endpoint, deployment and token type; the thread is on the span of the run.
+    """
+    if usage is None:
+        return None
+    tokens = {"prompt_tokens": usage.prompt_tokens or 0,
+              "completion_tokens": usage.completion_tokens or 0,
+              "total_tokens": usage.total_tokens or 0}
+    attributes = {"endpoint": endpoint, "model_deployment": settings.model_deployment_name}
+    token_counter.add(tokens["prompt_tokens"], {**attributes, "token_type": "prompt"})
+    token_counter.add(tokens["completion_tokens"], {**attributes, "token_type": "completion"})
+    if span is not None:
+        span.set_attribute("gen_ai.usage.input_tokens", tokens["prompt_tokens"])
+        span.set_attribute("gen_ai.usage.output_tokens", tokens["completion_tokens"])
+    return tokens
+
+
+def agent_fingerprint(definition: Dict[str, Any]) -> str:
+    """Hash of an agent definition (model, name, description, instructions and tools)."""
+    payload = {**definition, "tools": [tool.as_dict() for tool in definition["tools"]]}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:32]
+
+
+# Statuses of a run still processed by the service
+ACTIVE_RUN_STATUSES = ("queued", "in_progress", "cancelling")
+
+
+class UnknownCursorError(ValueError):
+    """The `after` cursor of a history request is not a message of the thread."""
+
+
+@dataclass
+class ThreadHistory:
+    """Messages of a thread already fetched, in chronological order."""
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    positions: Dict[str, int] = field(default_factory=dict)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @property
+    def last_id(self) -> Optional[str]:
+        return self.messages[-1]["id"] if self.messages else None
+
+    def append(self, entry: Dict[str, Any]):
+        self.positions[entry["id"]] = len(self.messages)
+        self.messages.append(entry)
+
 
 class SetlistFMAgent:
 
-    def _find_connection(self, connection_type: str, connection_name: Optional[str] = None, with_credentials: Optional[bool] = False) -> Connection:
+    async def _find_connection(self, connection_type: str, connection_name: Optional[str] = None, with_credentials: Optional[bool] = False) -> Connection:
         """Find a connection by type and (optionally) name. If name is None, return the first connection of the given type."""
         logger.info(f"Searching for connection type '{connection_type}'" + (
             f" with name '{connection_name}'" if connection_name else " (any name)"))
-        connections = self.project_client.connections.list(
-            connection_type=connection_type)
-        if connection_name:
-            target = next(filter(lambda c: c.name ==
-                          connection_name, connections), None)
-        else:
-            target = next(iter(connections), None)
+        connections = await self._list_connections()
+        target = next((candidate for candidate in connections.get(connection_type.lower(), [])
+                       if not connection_name or candidate.name == connection_name), None)
         if target:
             logger.info(f"target: {target}")
             logger.info(
                 f"Found connection: {target.type} {target.name} (ID: {target.id})")
             if with_credentials:
-                # trick to get credentials app_insights_connection_string = self.project_client.telemetry.get_connection_string()
-                return self.project_client.connections._get_with_credentials(  # pylint: disable=protected-access
-                    name=target.name
-                )
+                if target.name not in self._connection_credentials:
+                    # trick to get credentials app_insights_connection_string = self.project_client.telemetry.get_connection_string()
+                    self._connection_credentials[target.name] = await self.project_client.connections._get_with_credentials(  # pylint: disable=protected-access
+                        name=target.name
+                    )
+                return self._connection_credentials[target.name]
             else:
                 return target
         logger.error(f"No connection found for type '{connection_type}'" + (
@@ -68,44 +145,118 @@ class SetlistFMAgent:
         raise RuntimeError(f"Connection of type '{connection_type}'" + (
             f" and name '{connection_name}'" if connection_name else "") + " is required but not found")
 
+    async def _list_connections(self) -> Dict[str, List[Connection]]:
+        """All the connections of the project indexed by lower case type, listed once per CONNECTION_CACHE_TTL."""
+        async with self._connections_lock:
+            if self._connections is None or time.monotonic() >= self._connections_expire:
+                start = time.perf_counter()
+                connections: Dict[str, List[Connection]] = {}
+                async for connection in self.project_client.connections.list():
+                    connection_type = getattr(connection.type, "value", connection.type)
+                    connections.setdefault(str(connection_type).lower(), []).append(connection)
+                self._connections = connections
+                self._connections_expire = time.monotonic() + settings.connection_cache_ttl
+                self._connection_credentials.clear()
+                logger.info(f"Listed {sum(len(c) for c in connections.values())} connections "
+                            f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+            return self._connections
+
     def __init__(self):
-        validate_required_settings()
-        # Set up Azure credentials
-        if settings.azure_client_id:
-            credential = ManagedIdentityCredential(
-                client_id=settings.azure_client_id)
-            logger.info(f"Using managed identity: {settings.azure_client_id}")
-        else:
-            credential = DefaultAzureCredential()
-            logger.info("Using default Azure credential")
-
-        # Initialize AI Project Client
-        self.project_client = AIProjectClient(
-            endpoint=settings.project_endpoint,
-            credential=credential
-        )
-        self.agents_client = self.project_client.agents
-
-        self._configure_telemetry()
-
-        # Create the agent
-        bing_tool = self._setup_bing_connection()
-        api_connection = self._setup_setlistfm_api_connection()
-        tools = [*bing_tool.definitions, *api_connection.definitions]
-        logger.info(f"Using tools: {len(tools)} tools definition available")
-
-        self._agent = self.project_client.agents.create_agent(
-            model=settings.model_deployment_name,
-            name="setlistfm-agent",
-            instructions=self._get_agent_instructions(),
-            tools=tools,
-            description="Setlist Agent for concert setlists and venue information",
-        )
-
-        self._agent_id = self._agent.id
-        logger.info(f"Created agent with ID: {self._agent_id}")
-
-    def _configure_telemetry(self):
+        self.credential = None
+        self.project_client: Optional[AIProjectClient] = None
+        self.agents_client = None
+        self._agent = None
+        self._agent_id: Optional[str] = None
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+        # Project connections by type, and connections with credentials by name
+        self._connections: Optional[Dict[str, List[Connection]]] = None
+        self._connections_expire = 0.0
+        self._connections_lock = asyncio.Lock()
+        self._connection_credentials: Dict[str, Connection] = {}
+        # thread_id -> history, least recently used first
+        self._histories: OrderedDict[str, ThreadHistory] = OrderedDict()
+        self.setlistfm = SetlistFMClient(
+            settings.setlistfm_api_base, settings.setlistfm_api_key,
+            settings.setlistfm_api_timeout, settings.setlistfm_api_max_connections)
+        self.response_cache = ResponseCache(settings.response_cache_ttl, settings.response_cache_size)
+
+    async def initialize(self):
+        """Create the AI Foundry clients and the agent (once, the first caller does the work)."""
+        async with self._init_lock:
+            if self._initialized:
+                return
+            start = time.perf_counter()
+            start_ns = time.time_ns()
+            validate_required_settings()
+            # Set up Azure credentials
+            if settings.azure_client_id:
+                self.credential = ManagedIdentityCredential(
+                    client_id=settings.azure_client_id)
+                logger.info(f"Using managed identity: {settings.azure_client_id}")
+            else:
+                self.credential = DefaultAzureCredential()
+                logger.info("Using default Azure credential")
+
+            # Initialize AI Project Client
+            self.project_client = AIProjectClient(
+                endpoint=settings.project_endpoint,
+                credential=self.credential
+            )
+            self.agents_client = self.project_client.agents
+
+            # The connections are looked up concurrently (from a single listing)
+            _, bing_tool, api_connection = await asyncio.gather(
+                self._configure_telemetry(),
+                self._setup_bing_connection(),
+                self._setup_setlistfm_api_connection(),
+            )
+
+            # The span starts with the initialization, telemetry is only configured now
+            tracer = trace.get_tracer(__name__)
+            with tracer.start_as_current_span("setlistfm_agent_initialize", start_time=start_ns) as span:
+                tools = [*bing_tool.definitions, *api_connection.definitions]
+                logger.info(f"Using tools: {len(tools)} tools definition available")
+
+                self._agent, action = await self._get_or_create_agent({
+                    "model": settings.model_deployment_name,
+                    "name": settings.agent_name,
+                    "instructions": self._get_agent_instructions(),
+                    "tools": tools,
+                    "description": "Setlist Agent for concert setlists and venue information",
+                })
+
+                self._agent_id = self._agent.id
+                self._initialized = True
+                duration_ms = (time.perf_counter() - start) * 1000
+                span.set_attribute("agent_id", self._agent_id)
+                span.set_attribute("agent_action", action)
+                startup_histogram.record(duration_ms, {"agent_action": action})
+                logger.info(
+                    f"Agent {self._agent_id} {action}, initialization took {duration_ms:.0f}ms")
+
+    async def _get_or_create_agent(self, definition: Dict[str, Any]) -> tuple[Any, str]:
+        """
+        Return the agent with the given definition and whether it was reused, updated or
+        created. Agents are looked up by name and by the fingerprint of their definition,
+        kept in their metadata; an agent with the same name but another definition is updated.
+        """
+        fingerprint = agent_fingerprint(definition)
+        metadata = {"fingerprint": fingerprint}
+        outdated = None
+        async for agent in self.agents_client.list_agents(order=ListSortOrder.DESCENDING, limit=100):
+            if agent.name != definition["name"]:
+                continue
+            if (agent.metadata or {}).get("fingerprint") == fingerprint:
+                return agent, "reused"
+            outdated = outdated or agent
+
+        if outdated is not None:
+            logger.info(f"Agent definition changed, updating agent {outdated.id}")
+            return await self.agents_client.update_agent(outdated.id, metadata=metadata, **definition), "updated"
+        return await self.agents_client.create_agent(metadata=metadata, **definition), "created"
+
+    async def _configure_telemetry(self):
         """Configure Application Insights telemetry."""
 
         if not settings.azure_monitor_enabled:
@@ -114,7 +265,7 @@ class SetlistFMAgent:
 
         try:
             logger.info("Configuring Application Insights...")
-            connection = self._find_connection(
+            connection = await self._find_connection(
                 "AppInsights", with_credentials=True)
             logger.info(f"AppInsights connection: {connection}")
 
@@ -160,23 +311,34 @@ class SetlistFMAgent:
             import sys
             sys.exit(1)
 
-    def _setup_bing_connection(self) -> BingCustomSearchTool:
+    async def _setup_bing_connection(self) -> BingCustomSearchTool:
         """Find and setup Bing Grounding connection."""
         logger.info("Setting up Bing Grounding connection...")
+        connection = await self._find_connection("GroundingWithCustomSearch")
         return BingCustomSearchTool(
-            connection_id=self._find_connection(
-                "GroundingWithCustomSearch").id, instance_name="defaultConfiguration")
+            connection_id=connection.id, instance_name="defaultConfiguration")
 
-    def _setup_setlistfm_api_connection(self) -> OpenApiTool:
+    async def _setup_setlistfm_api_connection(self) -> OpenApiTool:
         """Set up API connection for SetlistFM."""
         logger.info("Setting up SetlistFM API connection...")
 
         try:
             # Load OpenAPI specification for SetlistFM
             with open(os.path.join(os.path.dirname(__file__), "openapi-setlistfm.json"), "r") as f:
-                openapi_setlistfm = json.loads(f.read())
-
-            connection = self._find_connection(
+                full_spec = json.loads(f.read())
+
+            # Only the operations the agent uses, with compact descriptions
+            operations = [operation.strip() for operation in settings.setlistfm_openapi_operations.split(",")
+                          if operation.strip()] or AGENT_OPERATIONS
+            openapi_setlistfm = trim_openapi_spec(full_spec, operations)
+            full_tokens, trimmed_tokens = estimate_tokens(full_spec), estimate_tokens(openapi_setlistfm)
+            span = trace.get_current_span()
+            span.set_attribute("openapi_spec_tokens_full", full_tokens)
+            span.set_attribute("openapi_spec_tokens", trimmed_tokens)
+            logger.info(f"SetlistFM OpenAPI spec trimmed to {len(operations)} operations: "
+                        f"~{full_tokens} -> ~{trimmed_tokens} tokens")
+
+            connection = await self._find_connection(
                 "CustomKeys", "setlistfm-customkey-connection")
             openapi_setlistfm['servers'][0]['url'] = connection.target
             logger.info(
@@ -220,9 +382,12 @@ class SetlistFMAgent:
         Always strive to be helpful, accurate, and engaging while focusing on music and concert-related content.
         """
 
-    async def chat(self, message: str, thread_id: Optional[str] = None) -> Dict[str, Any]:
-        """Process a chat message and return agent response."""
+    async def chat(self, message: str, thread_id: Optional[str] = None,
+                   endpoint: str = "/chat") -> Dict[str, Any]:
+        """Process a chat message and return agent response (with the token usage of the run)."""
         tracer = trace.get_tracer(__name__)
+        if not self._initialized:
+            await self.initialize()
 
         with tracer.start_as_current_span("setlistfm_agent_chat") as span:
             span.set_attribute("message_length", len(message))
@@ -232,52 +397,60 @@ class SetlistFMAgent:
 
                 # Create or use existing thread
                 if thread_id:
-                    thread = self.project_client.agents.threads.get(
+                    thread = await self.agents_client.threads.get(
                         thread_id=thread_id)
                 else:
-                    thread = self.project_client.agents.threads.create()
+                    thread = await self.agents_client.threads.create()
                     thread_id = thread.id
 
                 span.set_attribute("thread_id", thread_id)
 
                 # Add user message to thread
-                user_message = self.project_client.agents.messages.create(
+                user_message = await self.agents_client.messages.create(
                     thread_id=thread_id,
                     role="user",
                     content=message
                 )
 
-                # Create and process agent run
-                run = self.project_client.agents.runs.create_and_process(
+                # Create the agent run and wait for its completion
+                run = await self.agents_client.runs.create(
                     thread_id=thread_id,
                     agent_id=self._agent_id
                 )
+                run = await self._wait_for_run(thread_id, run)
 
                 span.set_attribute("run_status", run.status)
+                usage = record_usage(run.usage, endpoint, span)
+                timing = await self._run_step_timings(thread_id, run)
 
-                if run.status == "failed":
-                    error_msg = f"Agent run failed: {run.last_error}"
+                if run.status != "completed":
+                    error_msg = f"Agent run {run.status}: {run.last_error}"
                     logger.error(error_msg)
                     span.set_attribute("error", error_msg)
                     return {
                         "thread_id": thread_id,
                         "response": "I encountered an error processing your request. Please try again.",
-                        "status": "error"
+                        "status": "error",
+                        "timing": timing,
+                        "usage": usage
                     }
 
-                # Get agent response
-                messages = self.project_client.agents.messages.list(
-                    thread_id=thread_id)
+                # Get agent response: only the newest messages of this run
+                messages = self.agents_client.messages.list(
+                    thread_id=thread_id,
+                    run_id=run.id,
+                    order=ListSortOrder.DESCENDING,
+                    limit=5)
 
                 # logger.info("Messages in thread:")
-                # for msg in messages:
+                # async for msg in messages:
                 #    logger.info(f"message: {msg}")
 
                 # Find the latest assistant message
                 response_content = ""
                 citations = []
 
-                for msg in messages:
+                async for msg in messages:
                     # logger.info(f"message: {msg}")
                     if msg.role == "assistant":
                         if msg.text_messages:
@@ -298,7 +471,10 @@ class SetlistFMAgent:
                     "thread_id": thread_id,
                     "response": response_content,
                     "citations": citations,
-                    "status": "success"
+                    "status": "success",
+                    "source": "agent",
+                    "timing": timing,
+                    "usage": usage
                 }
 
             except Exception as e:
@@ -312,65 +488,384 @@ class SetlistFMAgent:
                     "status": "error"
                 }
 
-    async def get_thread_history(self, thread_id: str) -> List[Dict[str, Any]]:
-        """Get chat history for a specific thread."""
+    async def _run_step_timings(self, thread_id: str, run: ThreadRun) -> Optional[Dict[str, Any]]:
+        """
+        Fetch the steps of a finished run, emit a span and a duration metric per step (model
+        message creation or tool calls), and return a summary of the run timing.
+        The service timestamps have a one second resolution.
+        """
+        tracer = trace.get_tracer(__name__)
 
         try:
-            messages = self.project_client.agents.messages.list(
-                thread_id=thread_id)
-
-            history = []
-            for msg in messages:
-                content = ""
-                if msg.text_messages:
-                    for text_msg in msg.text_messages:
-                        content = text_msg.text.value
+            steps = []
+            async for step in self.agents_client.run_steps.list(
+                    thread_id=thread_id, run_id=run.id, order=ListSortOrder.ASCENDING):
+                ended_at = step.completed_at or step.failed_at or step.cancelled_at or step.expired_at
+                if step.created_at is None or ended_at is None:
+                    continue
+                tool_calls = getattr(step.step_details, "tool_calls", None) or []
+                name = ",".join(tool_call.type for tool_call in tool_calls) if tool_calls else step.type
+                duration_ms = (ended_at - step.created_at).total_seconds() * 1000
+                tokens = step.usage.total_tokens if step.usage else None
+
+                attributes = {"step_id": step.id, "step_type": step.type, "tool_type": name, "status": step.status}
+                step_span = tracer.start_span(
+                    f"setlistfm_agent_run_step {name}",
+                    start_time=int(step.created_at.timestamp() * 1e9),
+                    attributes={**attributes, **({"total_tokens": tokens} if tokens is not None else {})})
+                step_span.end(end_time=int(ended_at.timestamp() * 1e9))
+                run_step_histogram.record(
+                    duration_ms, {"step_type": step.type, "tool_type": name, "status": step.status})
+
+                steps.append({"name": name, "status": step.status, "duration_ms": duration_ms,
+                              **({"tokens": tokens} if tokens is not None else {})})
+
+            run_ended_at = run.completed_at or run.failed_at or run.cancelled_at or run.expired_at
+            run_ms = (run_ended_at - run.created_at).total_seconds() * 1000 \
+                if run_ended_at and run.created_at else None
+            logger.info(f"Run {run.id} took {run_ms}ms: " +
+                        ", ".join(f"{step['name']} {step['duration_ms']:.0f}ms" for step in steps))
+            return {"run_ms": run_ms, "steps": steps}
+
+        except Exception as e:
+            logger.warning(f"Could not get the steps of run {run.id}: {e}")
+            return None
+
+    async def chat_batch(self, requests: List[Dict[str, Any]], concurrency: int, deadline: float,
+                         admit: Callable[[], AsyncContextManager] = nullcontext) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process many chat messages ({"message", "thread_id"}) with at most `concurrency`
+        runs at once, each cancelled after `deadline` seconds, and yield the results
+        (with the index of their request) as they finish. Each run is made in an `admit()`
+        block (an admission slot), a run it rejects has the "rejected" status.
+        """
+        tracer = trace.get_tracer(__name__)
+        if not self._initialized:
+            await self.initialize()
+
+        with tracer.start_as_current_span("setlistfm_agent_chat_batch") as span:
+            span.set_attribute("batch_size", len(requests))
+            span.set_attribute("batch_concurrency", concurrency)
+            semaphore = asyncio.Semaphore(concurrency)
+            statuses: Dict[str, int] = {}
+
+            async def run(index: int, request: Dict[str, Any]) -> Dict[str, Any]:
+                async with semaphore:
+                    try:
+                        async with admit():
+                            result = await asyncio.wait_for(
+                                self.chat(request["message"], request.get("thread_id"), "/chat/batch"), deadline)
+                    except AdmissionRejected as e:
+                        result = {
+                            "thread_id": request.get("thread_id"),
+                            "response": "The service is busy, please retry later.",
+                            "citations": [],
+                            "status": "rejected",
+                            "retry_after": e.retry_after
+                        }
+                    except asyncio.TimeoutError:
+                        logger.warning(f"Batch chat {index} exceeded the {deadline}s deadline")
+                        result = {
+                            "thread_id": request.get("thread_id"),
+                            "response": "The request took too long to process.",
+                            "citations": [],
+                            "status": "timeout"
+                        }
+                return {"index": index, **result}
+
+            tasks = [asyncio.create_task(run(index, request)) for index, request in enumerate(requests)]
+            try:
+                for next_result in asyncio.as_completed(tasks):
+                    result = await next_result
+                    statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+                    yield result
+            finally:
+                # The client went away: cancel the remaining chats (and their runs)
+                for task in tasks:
+                    task.cancel()
+                for status, count in statuses.items():
+                    span.set_attribute(f"batch_{status}", count)
+
+    async def _wait_for_run(self, thread_id: str, run: ThreadRun) -> ThreadRun:
+        """
+        Poll a run until it ends. Polls are fast at first (most runs are short), then back
+        off during long tool phases. The run is cancelled past the deadline, when it requires
+        client side tool outputs (the agent has none), or when the awaiting task is cancelled.
+        """
+        tracer = trace.get_tracer(__name__)
+
+        with tracer.start_as_current_span("setlistfm_agent_run_poll") as span:
+            span.set_attribute("run_id", run.id)
+            start = time.monotonic()
+            interval = settings.run_poll_initial_interval
+            polls = 0
+            waited = 0.0
+            try:
+                while run.status in ACTIVE_RUN_STATUSES:
+                    remaining = settings.run_deadline - (time.monotonic() - start)
+                    if remaining <= 0:
+                        logger.warning(
+                            f"Run {run.id} exceeded the {settings.run_deadline}s deadline, cancelling it")
+                        span.set_attribute("run_deadline_exceeded", True)
+                        run = await self.agents_client.runs.cancel(thread_id=thread_id, run_id=run.id)
                         break
+                    waited = min(interval, remaining)
+                    await asyncio.sleep(waited)
+                    run = await self.agents_client.runs.get(thread_id=thread_id, run_id=run.id)
+                    polls += 1
+                    interval = min(interval * settings.run_poll_backoff, settings.run_poll_max_interval)
+
+                if run.status == "requires_action":
+                    logger.warning(f"Run {run.id} requires client side tool outputs, cancelling it")
+                    run = await self.agents_client.runs.cancel(thread_id=thread_id, run_id=run.id)
+
+            except asyncio.CancelledError:
+                logger.info(f"Chat cancelled, cancelling run {run.id}")
+                span.set_attribute("run_cancelled", True)
+                await self.agents_client.runs.cancel(thread_id=thread_id, run_id=run.id)
+                raise
+
+            finally:
+                span.set_attribute("run_poll_count", polls)
+                span.set_attribute("run_duration_ms", (time.monotonic() - start) * 1000)
+                # The run ended at most one interval before the last poll: upper bound of the latency added
+                span.set_attribute("run_poll_tail_ms", waited * 1000)
+            span.set_attribute("run_status", run.status)
+            return run
+
+    async def chat_stream(self, message: str, thread_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a chat message and yield the events of the agent run as they arrive:
+        thread, delta (text), tool_call (started, completed, failed), citation, then done or error.
+        """
+        tracer = trace.get_tracer(__name__)
+        if not self._initialized:
+            await self.initialize()
 
-                history.append({
-                    "role": msg.role,
-                    "content": content,
-                    "timestamp": msg.created_at
-                })
+        with tracer.start_as_current_span("setlistfm_agent_chat_stream") as span:
+            span.set_attribute("message_length", len(message))
+            start = time.perf_counter()
+            first_token_ms = None
+            status = "success"
+            usage = None
 
-            # Reverse to get chronological order
-            return list(reversed(history))
+            try:
+                logger.info(f"Streaming chat message: {message[:100]}...")
 
-        except Exception as e:
-            logger.error(f"Error getting thread history: {e}")
-            return []
+                if thread_id:
+                    thread = await self.agents_client.threads.get(thread_id=thread_id)
+                else:
+                    thread = await self.agents_client.threads.create()
+                    thread_id = thread.id
+                span.set_attribute("thread_id", thread_id)
+                yield {"event": "thread", "thread_id": thread_id}
 
-    async def search_setlists(self, artist: str, venue: Optional[str] = None) -> Dict[str, Any]:
-        """Search for setlists using Bing Grounding."""
-        query = f"setlist {artist}"
-        if venue:
-            query += f" {venue}"
-        query += " site:setlist.fm"
+                await self.agents_client.messages.create(
+                    thread_id=thread_id,
+                    role="user",
+                    content=message
+                )
 
-        return await self.chat(f"Find recent setlists for {artist}" + (f" at {venue}" if venue else ""))
+                cited_urls = set()
+                async with await self.agents_client.runs.stream(thread_id=thread_id, agent_id=self._agent_id) as stream:
+                    async for event_type, event_data, _ in stream:
+                        if isinstance(event_data, MessageDeltaChunk):
+                            if not event_data.text:
+                                continue
+                            if first_token_ms is None:
+                                first_token_ms = (time.perf_counter() - start) * 1000
+                                span.set_attribute("time_to_first_token_ms", first_token_ms)
+                                time_to_first_token_histogram.record(first_token_ms)
+                            yield {"event": "delta", "text": event_data.text}
+
+                        elif isinstance(event_data, RunStep) and event_data.type == "tool_calls":
+                            step_status = {
+                                AgentStreamEvent.THREAD_RUN_STEP_CREATED: "started",
+                                AgentStreamEvent.THREAD_RUN_STEP_COMPLETED: "completed",
+                                AgentStreamEvent.THREAD_RUN_STEP_FAILED: "failed",
+                            }.get(event_type)
+                            if step_status is None:
+                                continue
+                            tool_calls = getattr(event_data.step_details, "tool_calls", None) or []
+                            yield {"event": "tool_call", "status": step_status, "step_id": event_data.id,
+                                   "tools": [tool_call.type for tool_call in tool_calls]}
+
+                        elif isinstance(event_data, ThreadMessage) and event_type == AgentStreamEvent.THREAD_MESSAGE_COMPLETED:
+                            for annotation in event_data.url_citation_annotations:
+                                if annotation.url_citation.url in cited_urls:
+                                    continue
+                                cited_urls.add(annotation.url_citation.url)
+                                yield {"event": "citation", "title": annotation.url_citation.title,
+                                       "url": annotation.url_citation.url}
+
+                        elif isinstance(event_data, ThreadRun) and event_type == AgentStreamEvent.THREAD_RUN_COMPLETED:
+                            usage = record_usage(event_data.usage, "/chat/stream", span)
+
+                        elif isinstance(event_data, ThreadRun) and event_type == AgentStreamEvent.THREAD_RUN_FAILED:
+                            usage = record_usage(event_data.usage, "/chat/stream", span)
+                            status = "error"
+                            logger.error(f"Agent run failed: {event_data.last_error}")
+                            span.set_attribute("error", f"Agent run failed: {event_data.last_error}")
+
+                        elif event_type == AgentStreamEvent.ERROR:
+                            status = "error"
+                            logger.error(f"Agent run stream error: {event_data}")
+                            span.set_attribute("error", f"Agent run stream error: {event_data}")
+
+                span.set_attribute("run_status", status)
+                if status == "error":
+                    yield {"event": "error", "thread_id": thread_id,
+                           "response": "I encountered an error processing your request. Please try again."}
+                else:
+                    yield {"event": "done", "thread_id": thread_id, "status": status, "usage": usage}
 
-    async def get_venue_info(self, venue_name: str, city: Optional[str] = None) -> Dict[str, Any]:
-        """Get venue information using Bing Grounding."""
-        query = f"venue information {venue_name}"
-        if city:
-            query += f" {city}"
+            except Exception as e:
+                error_msg = f"Error in chat streaming: {e}"
+                logger.error(error_msg)
+                span.set_attribute("error", error_msg)
+                yield {"event": "error", "thread_id": thread_id,
+                       "response": "I encountered an error processing your request. Please try again later."}
 
-        return await self.chat(f"Tell me about the venue {venue_name}" + (f" in {city}" if city else ""))
+    async def get_thread_history(self, thread_id: str, limit: Optional[int] = None,
+                                 after: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get chat history for a specific thread, in chronological order: the messages after
+        the `after` message ID (all when None), at most `limit`, and the cursor of the next page.
+        Raises UnknownCursorError when `after` is not a message of the thread.
+        """
+
+        try:
+            if not self._initialized:
+                await self.initialize()
+            history = await self._refresh_history(thread_id)
+
+            if after is not None and after not in history.positions:
+                raise UnknownCursorError(f"Message {after} is not in thread {thread_id}")
+            start = history.positions[after] + 1 if after is not None else 0
+            end = start + limit if limit else len(history.messages)
+            page = history.messages[start:end]
+            next_cursor = page[-1]["id"] if page and end < len(history.messages) else None
+            return {"messages": page, "next_cursor": next_cursor}
+
+        except UnknownCursorError:
+            raise
+        except Exception as e:
+            logger.error(f"Error getting thread history: {e}")
+            return {"messages": [], "next_cursor": None}
+
+    async def _refresh_history(self, thread_id: str) -> ThreadHistory:
+        """Fetch the messages of a thread added since the last call (all on the first call)."""
+        history = self._histories.get(thread_id)
+        if history is None:
+            history = self._histories[thread_id] = ThreadHistory()
+            while len(self._histories) > settings.history_cache_threads:
+                self._histories.popitem(last=False)
+        else:
+            self._histories.move_to_end(thread_id)
+
+        async with history.lock:
+            fetched = 0
+            pages = self.agents_client.messages.list(
+                thread_id=thread_id, order=ListSortOrder.ASCENDING, limit=100
+            ).by_page(continuation_token=history.last_id)
+            async for page in pages:
+                async for msg in page:
+                    # An answer being generated is fetched again once complete
+                    if msg.status == "in_progress":
+                        return history
+                    content = ""
+                    if msg.text_messages:
+                        for text_msg in msg.text_messages:
+                            content = text_msg.text.value
+                            break
+
+                    history.append({
+                        "id": msg.id,
+                        "role": msg.role,
+                        "content": content,
+                        "timestamp": msg.created_at
+                    })
+                    fetched += 1
+            logger.info(f"Fetched {fetched} new messages of thread {thread_id}")
+        return history
+
+    async def search_setlists(self, artist: str, venue: Optional[str] = None,
+                              admit: Callable[[], AsyncContextManager] = nullcontext) -> Dict[str, Any]:
+        """
+        Search for setlists with the setlist.fm API, or with the agent when the lookup fails
+        (cached). Only the agent run is made in an `admit()` block (an admission slot).
+        """
+        return await self.response_cache.get_or_compute(
+            cache_key("/search/setlists", artist, venue),
+            lambda: self._fast_path(
+                "/search/setlists", lambda: self.setlistfm.search_setlists(artist, venue),
+                f"Find recent setlists for {artist}" + (f" at {venue}" if venue else ""), admit))
+
+    async def get_venue_info(self, venue_name: str, city: Optional[str] = None,
+                             admit: Callable[[], AsyncContextManager] = nullcontext) -> Dict[str, Any]:
+        """
+        Get venue information with the setlist.fm API, or with the agent when the lookup fails
+        (cached). Only the agent run is made in an `admit()` block (an admission slot).
+        """
+        return await self.response_cache.get_or_compute(
+            cache_key("/venues/info", venue_name, city),
+            lambda: self._fast_path(
+                "/venues/info", lambda: self.setlistfm.venue_info(venue_name, city),
+                f"Tell me about the venue {venue_name}" + (f" in {city}" if city else ""), admit))
+
+    async def _fast_path(self, endpoint: str, lookup: Callable[[], Awaitable[Dict[str, Any]]], message: str,
+                         admit: Callable[[], AsyncContextManager] = nullcontext) -> Dict[str, Any]:
+        """
+        Answer a structured request with a setlist.fm lookup, falling back to an agent chat in
+        an `admit()` block (AdmissionRejected is raised when it rejects the run).
+        """
+        tracer = trace.get_tracer(__name__)
+
+        if settings.fast_path_enabled and self.setlistfm.enabled:
+            with tracer.start_as_current_span("setlistfm_agent_fast_path") as span:
+                span.set_attribute("endpoint", endpoint)
+                start = time.perf_counter()
+                try:
+                    result = await lookup()
+                    lookup_ms = (time.perf_counter() - start) * 1000
+                    span.set_attribute("lookup_ms", lookup_ms)
+                    fast_path_counter.add(1, {"endpoint": endpoint, "source": "setlistfm"})
+                    return {"thread_id": None, **result, "status": "success", "source": "setlistfm",
+                            "timing": {"run_ms": lookup_ms, "steps": []}}
+                except SetlistFMLookupError as e:
+                    logger.info(f"Fast path of {endpoint} failed, falling back to the agent: {e}")
+                    span.set_attribute("fallback", str(e))
+                except Exception as e:
+                    logger.warning(f"Unexpected setlist.fm answer for {endpoint}, falling back to the agent: {e!r}")
+                    span.set_attribute("fallback", repr(e))
+
+        fast_path_counter.add(1, {"endpoint": endpoint, "source": "agent"})
+        async with admit():
+            return await self.chat(message, endpoint=endpoint)
 
     async def shutdown(self):
         """Clean up resources."""
         logger.info("Shutting down SetlistFM Agent...")
 
         try:
-            # Delete the agent
-            if self._agent_id:
-                self.project_client.agents.delete_agent(self._agent_id)
+            # The agent is kept for the next start (and the other replicas) unless configured otherwise
+            if self._agent_id and settings.agent_delete_on_shutdown:
+                await self.agents_client.delete_agent(self._agent_id)
                 logger.info(f"Deleted agent: {self._agent_id}")
 
-            # Close project client
+            await self.setlistfm.close()
+
+            # Close project client and credential
             if self.project_client:
-                self.project_client.close()
+                await self.project_client.close()
+            if self.credential:
+                await self.credential.close()
+            self._initialized = False
             logger.info("SetlistFM Agent shutdown complete")
 
         except Exception as e:
             logger.error(f"Error during shutdown: {e}")
+
+
+# Shared agent of the FastAPI app (main.py), initialized in its lifespan
+setlistfm_agent = SetlistFMAgent()
@@ -0,0 +1,139 @@
+"""
+Direct setlist.fm API lookups for the structured endpoints (fast path).
+
+`/search/setlists` and `/venues/info` ask for data the setlist.fm API returns as is. Instead
+of an agent run (model calls, Bing and OpenAPI tools, tens of seconds), `SetlistFMClient`
+calls the API through one pooled HTTP client and formats the result with text templates.
+A failed lookup (no API key, API error or rate limit, nothing found) raises
+`SetlistFMLookupError` and the agent answers instead.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger("setlistfm_agent")
+
+USER_AGENT = "setlistfm-agent/1.0"
+
+
+class SetlistFMLookupError(Exception):
+    """The setlist.fm API could not answer the request."""
+
+
+def _place(venue: Dict[str, Any]) -> str:
+    city = venue.get("city") or {}
+    parts = [venue.get("name"), city.get("name"), city.get("state"), (city.get("country") or {}).get("name")]
+    return ", ".join(part for part in parts if part)
+
+
+def _songs(setlist: Dict[str, Any]) -> List[str]:
+    return [song["name"] for set_ in (setlist.get("sets") or {}).get("set", [])
+            for song in set_.get("song", []) if song.get("name")]
+
+
+def format_setlists(setlists: List[Dict[str, Any]], artist: str, venue: Optional[str] = None) -> str:
+    """Text answer listing setlists: date, venue, tour and songs."""
+    lines = [f"Recent setlists for {artist}" + (f" at {venue}" if venue else "") + ":", ""]
+    for setlist in setlists:
+        tour = (setlist.get("tour") or {}).get("name")
+        songs = _songs(setlist)
+        lines.append(f"- {setlist.get('eventDate')}: {_place(setlist.get('venue') or {})}"
+                     + (f" ({tour})" if tour else ""))
+        lines.append(f"  {len(songs)} songs: {', '.join(songs)}" if songs else "  No songs listed yet")
+    return "\n".join(lines)
+
+
+def format_venue(venue: Dict[str, Any], setlists: List[Dict[str, Any]]) -> str:
+    """Text answer describing a venue and its latest events."""
+    coords = (venue.get("city") or {}).get("coords") or {}
+    lines = [f"{venue.get('name')} is a venue in {_place({**venue, 'name': None})}."]
+    if coords.get("lat") is not None and coords.get("long") is not None:
+        lines.append(f"Coordinates: {coords['lat']}, {coords['long']}.")
+    if setlists:
+        lines += ["", "Latest events:"]
+        lines += [f"- {setlist.get('eventDate')}: {(setlist.get('artist') or {}).get('name')}"
+                  + (f" ({setlist['tour']['name']})" if (setlist.get("tour") or {}).get("name") else "")
+                  for setlist in setlists]
+    return "\n".join(lines)
+
+
+class SetlistFMClient:
+    """setlist.fm API client sharing a pool of connections across requests."""
+
+    def __init__(self, base_url: str, api_key: str, timeout: float, max_connections: int,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.api_key)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"x-api-key": self.api_key, "Accept": "application/json", "User-Agent": USER_AGENT},
+                timeout=self.timeout,
+                transport=self.transport,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections))
+        return self._client
+
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if not self.enabled:
+            raise SetlistFMLookupError("no setlist.fm API key")
+        try:
+            response = await self.client.get(path, params=params)
+        except httpx.HTTPError as e:
+            raise SetlistFMLookupError(f"{path}: {e!r}") from e
+        # setlist.fm answers 404 when a search has no result
+        if response.status_code == 404:
+            raise SetlistFMLookupError(f"{path}: nothing found for {params}")
+        if response.status_code != 200:
+            raise SetlistFMLookupError(f"{path}: HTTP {response.status_code}")
+        return response.json()
+
+    async def search_setlists(self, artist: str, venue: Optional[str] = None, limit: int = 5) -> Dict[str, Any]:
+        """Latest setlists of an artist (at a venue): text answer and setlist.fm links."""
+        params = {"artistName": artist, **({"venueName": venue} if venue else {})}
+        setlists = [setlist for setlist in (await self._get("/search/setlists", params)).get("setlist", [])
+                    if setlist.get("artist")][:limit]
+        if not setlists:
+            raise SetlistFMLookupError(f"no setlist found for {params}")
+        return {
+            "response": format_setlists(setlists, artist, venue),
+            "citations": [{"title": f"{setlist['artist'].get('name')} at {_place(setlist.get('venue') or {})}, "
+                                    f"{setlist.get('eventDate')}", "url": setlist["url"]}
+                          for setlist in setlists if setlist.get("url")],
+        }
+
+    async def venue_info(self, venue_name: str, city: Optional[str] = None, limit: int = 5) -> Dict[str, Any]:
+        """Best matching venue and its latest events: text answer and setlist.fm links."""
+        params = {"name": venue_name, **({"cityName": city} if city else {})}
+        venues = (await self._get("/search/venues", params)).get("venue", [])
+        if not venues:
+            raise SetlistFMLookupError(f"no venue found for {params}")
+        venue = venues[0]
+        try:
+            setlists = (await self._get(f"/venue/{venue['id']}/setlists")).get("setlist", [])[:limit]
+        except SetlistFMLookupError as e:
+            # The venue is known, without events
+            logger.info(f"No setlists for venue {venue['id']}: {e}")
+            setlists = []
+        return {
+            "response": format_venue(venue, setlists),
+            "citations": [{"title": f"{venue.get('name')} on setlist.fm", "url": venue["url"]}]
+            if venue.get("url") else [],
+        }
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,151 @@
+"""
+Tests of the admission control of the endpoints starting agent runs.
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import main
+from admission import AdmissionGate
+from setlistfm_agent import SetlistFMAgent
+from setlistfm_client import SetlistFMClient
+
+RUN_SECONDS = 0.3
+
+
+@pytest.fixture
+def gate(monkeypatch) -> AdmissionGate:
+    agent = SetlistFMAgent()
+    agent._initialized = True
+    agent.setlistfm.api_key = ""
+    agent.runs = 0
+
+    async def chat(message: str, thread_id=None, endpoint="/chat"):
+        agent.runs += 1
+        await asyncio.sleep(RUN_SECONDS)
+        return {"thread_id": "thread_1", "response": message, "citations": [], "status": "success"}
+
+    async def chat_stream(message: str, thread_id=None):
+        yield {"event": "thread", "thread_id": "thread_1"}
+        await asyncio.sleep(RUN_SECONDS)
+        yield {"event": "done", "thread_id": "thread_1", "response": message}
+
+    monkeypatch.setattr(agent, "chat", chat)
+    monkeypatch.setattr(agent, "chat_stream", chat_stream)
+    monkeypatch.setattr(main, "setlistfm_agent", agent)
+    gate = AdmissionGate(max_concurrent=2, max_queue=2, queue_timeout=5)
+    monkeypatch.setattr(main, "admission_gate", gate)
+    return gate
+
+
+async def post_many(count: int) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.post("/chat", json={"message": str(i)}) for i in range(count)))
+
+
+@pytest.mark.asyncio
+async def test_requests_over_the_queue_are_rejected(gate):
+    responses = await post_many(6)
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200, 200, 200, 200, 429, 429]
+    rejected = next(response for response in responses if response.status_code == 429)
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert gate.stats()["rejected"] == 2
+    assert (gate.in_flight, gate.waiting) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_rejects_and_retry_after_follows_durations(gate):
+    await post_many(2)
+    gate.queue_timeout = 0.1
+    responses = await post_many(3)
+    assert sorted(response.status_code for response in responses) == [200, 200, 429]
+    # runs last RUN_SECONDS, two at once: a slot frees in under a second
+    assert gate.retry_after() == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_holds_a_slot_until_its_end(gate):
+    gate.max_concurrent, gate.max_queue = 1, 0
+    gate._semaphore = asyncio.Semaphore(1)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def later(path: str) -> httpx.Response:
+            # while the first stream is between its two events
+            await asyncio.sleep(RUN_SECONDS / 3)
+            return await client.post(path, json={"message": "other"})
+
+        streamed, rejected_stream, rejected_chat = await asyncio.gather(
+            client.post("/chat/stream", json={"message": "streamed"}), later("/chat/stream"), later("/chat"))
+
+    assert streamed.status_code == 200 and "event: done" in streamed.text
+    assert rejected_stream.status_code == 429 and int(rejected_stream.headers["Retry-After"]) >= 1
+    assert rejected_chat.status_code == 429
+    assert (gate.in_flight, gate.waiting, gate.rejected) == (0, 0, 2)
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_hold_slots(gate):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        batch = asyncio.create_task(client.post("/chat/batch", json={
+            "messages": [{"message": str(i)} for i in range(3)], "concurrency": 3}))
+        await asyncio.sleep(RUN_SECONDS / 3)
+        # two runs of the batch hold the two slots, the third one waits with the interactive requests
+        assert (gate.in_flight, gate.waiting) == (2, 1)
+        chat = await client.post("/chat", json={"message": "interactive"})
+        results = [json.loads(line) for line in (await batch).text.splitlines()]
+
+    assert chat.status_code == 200
+    assert sorted(result["index"] for result in results) == [0, 1, 2]
+    assert {result["status"] for result in results} == {"success"}
+
+    gate.queue_timeout = 0.1
+    response = await post_batch(3)
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(result["status"] for result in results) == ["rejected", "success", "success"]
+    assert next(result for result in results if result["status"] == "rejected")["retry_after"] >= 1
+    assert (gate.in_flight, gate.waiting) == (0, 0)
+
+
+async def post_batch(count: int) -> httpx.Response:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post("/chat/batch", json={
+            "messages": [{"message": str(i)} for i in range(count)], "concurrency": count})
+
+
+@pytest.mark.asyncio
+async def test_only_agent_runs_of_the_structured_endpoints_hold_slots(gate):
+    gate.max_concurrent, gate.max_queue = 1, 0
+    gate._semaphore = asyncio.Semaphore(1)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # one agent run for identical requests: the coalesced ones, then the cache hit, wait without a slot
+        responses = await asyncio.gather(*(client.post("/venues/info", json={"venue_name": "Olympia"})
+                                           for _ in range(5)))
+        hit = await client.post("/venues/info", json={"venue_name": "Olympia"})
+        assert [response.status_code for response in [*responses, hit]] == [200] * 6
+        assert main.setlistfm_agent.runs == 1 and hit.json()["cached"] is True
+
+        # a setlist.fm lookup is answered while a chat holds the only slot, an agent fallback is rejected
+        main.setlistfm_agent.setlistfm = SetlistFMClient(
+            "https://api.setlist.fm/rest/1.0", "test-key", 5, 4, transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, json={"venue": [{"id": "1", "name": "Zenith"}]})
+                if request.url.params.get("name") == "Zenith" else httpx.Response(404)))
+
+        async def later(body: dict) -> httpx.Response:
+            await asyncio.sleep(RUN_SECONDS / 3)
+            return await client.post("/venues/info", json=body)
+
+        chat, looked_up, fallback = await asyncio.gather(
+            client.post("/chat", json={"message": "busy"}), later({"venue_name": "Zenith"}),
+            later({"venue_name": "Unknown"}))
+
+    assert chat.status_code == 200
+    assert looked_up.status_code == 200 and looked_up.json()["source"] == "setlistfm"
+    assert fallback.status_code == 429 and int(fallback.headers["Retry-After"]) >= 1
+    assert (gate.in_flight, gate.waiting, gate.rejected) == (0, 0, 1)
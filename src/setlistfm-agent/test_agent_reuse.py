@@ -0,0 +1,60 @@
+"""
+Tests of the reuse of the persistent agent by fingerprint of its definition.
+"""
+from types import SimpleNamespace
+
+import pytest
+from azure.ai.agents.models import BingCustomSearchTool
+
+from setlistfm_agent import SetlistFMAgent, agent_fingerprint
+
+
+class FakeAgentsClient:
+    def __init__(self):
+        self.agents: list[SimpleNamespace] = []
+        self.calls: list[str] = []
+
+    async def list_agents(self, order: str, limit: int):
+        for agent in reversed(self.agents):
+            yield agent
+
+    async def create_agent(self, metadata: dict, **definition):
+        self.calls.append("create")
+        agent = SimpleNamespace(id=f"asst_{len(self.agents)}", metadata=metadata, **definition)
+        self.agents.append(agent)
+        return agent
+
+    async def update_agent(self, agent_id: str, metadata: dict, **definition):
+        self.calls.append("update")
+        agent = next(agent for agent in self.agents if agent.id == agent_id)
+        agent.__dict__.update(metadata=metadata, **definition)
+        return agent
+
+
+def definition(instructions: str) -> dict:
+    tool = BingCustomSearchTool(connection_id="conn_1", instance_name="defaultConfiguration")
+    return {"model": "gpt-4o", "name": "setlistfm-agent", "instructions": instructions,
+            "tools": tool.definitions, "description": "Setlist Agent"}
+
+
+def test_fingerprint_covers_the_tools():
+    other_tool = {**definition("a"), "tools": BingCustomSearchTool(
+        connection_id="conn_2", instance_name="defaultConfiguration").definitions}
+    assert agent_fingerprint(definition("a")) == agent_fingerprint(definition("a"))
+    assert agent_fingerprint(definition("a")) != agent_fingerprint(definition("b"))
+    assert agent_fingerprint(definition("a")) != agent_fingerprint(other_tool)
+
+
+@pytest.mark.asyncio
+async def test_agent_is_reused_then_updated():
+    client = FakeAgentsClient()
+    agent = SetlistFMAgent()
+    agent.agents_client = client
+
+    first, action = await agent._get_or_create_agent(definition("a"))
+    assert action == "created"
+    again, action = await agent._get_or_create_agent(definition("a"))
+    assert (again.id, action) == (first.id, "reused")
+    updated, action = await agent._get_or_create_agent(definition("b"))
+    assert (updated.id, action, updated.instructions) == (first.id, "updated", "b")
+    assert client.calls == ["create", "update"]
@@ -0,0 +1,58 @@
+"""
+Tests of the /chat/batch endpoint: bounded concurrency, per run deadline and NDJSON results.
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import main
+from setlistfm_agent import SetlistFMAgent
+
+
+@pytest.fixture
+def agent(monkeypatch) -> SetlistFMAgent:
+    """Agent whose chats last the number of seconds given as message."""
+    agent = SetlistFMAgent()
+    agent._initialized = True
+    agent.running = agent.max_running = 0
+
+    async def chat(message: str, thread_id=None, endpoint="/chat"):
+        agent.running += 1
+        agent.max_running = max(agent.max_running, agent.running)
+        try:
+            await asyncio.sleep(float(message))
+        finally:
+            agent.running -= 1
+        return {"thread_id": f"thread_{message}", "response": message, "citations": [], "status": "success"}
+
+    monkeypatch.setattr(agent, "chat", chat)
+    monkeypatch.setattr(main, "setlistfm_agent", agent)
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_batch_streams_results_as_they_finish(agent):
+    durations = ["0.3", "0.1", "5", "0.2", "0.1", "0.1"]
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/chat/batch", json={
+            "messages": [{"message": duration} for duration in durations],
+            "concurrency": 2,
+            "run_deadline": 0.5,
+        })
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(result["index"] for result in results) == list(range(len(durations)))
+    assert results[0]["index"] == 1
+    assert next(result for result in results if result["index"] == 2)["status"] == "timeout"
+    assert agent.max_running == 2
+
+
+def test_batch_limits_are_validated(agent):
+    from fastapi.testclient import TestClient
+    client = TestClient(main.app)
+    assert client.post("/chat/batch", json={"messages": []}).status_code == 422
+    assert client.post("/chat/batch", json={"messages": [{"message": "0"}], "concurrency": 1000}).status_code == 422
@@ -0,0 +1,105 @@
+"""
+Test of the /chat/stream endpoint with an in-memory agents client replaying a streamed run.
+"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from azure.ai.agents.models import AgentStreamEvent, MessageDeltaChunk, RunStep, ThreadMessage, ThreadRun
+
+import main
+from setlistfm_agent import SetlistFMAgent
+
+
+def delta(text: str) -> MessageDeltaChunk:
+    return MessageDeltaChunk({"id": "msg_1", "object": "thread.message.delta", "delta": {
+        "role": "assistant", "content": [{"index": 0, "type": "text", "text": {"value": text}}]}})
+
+
+def tool_step(status: str) -> RunStep:
+    return RunStep({"id": "step_1", "type": "tool_calls", "status": status, "step_details": {
+        "type": "tool_calls", "tool_calls": [{"id": "call_1", "type": "openapi", "function": {"name": "search"}}]}})
+
+
+RUN_EVENTS = [
+    (0.0, AgentStreamEvent.THREAD_RUN_CREATED, ThreadRun({"id": "run_1", "status": "queued"})),
+    (0.0, AgentStreamEvent.THREAD_RUN_STEP_CREATED, tool_step("in_progress")),
+    (0.2, AgentStreamEvent.THREAD_RUN_STEP_COMPLETED, tool_step("completed")),
+    (0.0, AgentStreamEvent.THREAD_MESSAGE_DELTA, delta("Muse played ")),
+    (0.3, AgentStreamEvent.THREAD_MESSAGE_DELTA, delta("Uprising.")),
+    (0.0, AgentStreamEvent.THREAD_MESSAGE_COMPLETED, ThreadMessage({"id": "msg_1", "role": "assistant", "content": [
+        {"type": "text", "text": {"value": "Muse played Uprising.", "annotations": [
+            {"type": "url_citation", "text": "[1]", "url_citation": {"url": "https://www.setlist.fm/x", "title": "setlist.fm"}}]}}]})),
+    (0.0, AgentStreamEvent.THREAD_RUN_COMPLETED, ThreadRun({"id": "run_1", "status": "completed"})),
+    (0.0, AgentStreamEvent.DONE, "[DONE]"),
+]
+
+
+class FakeRunStream:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+    async def __aiter__(self):
+        for pause, event_type, event_data in RUN_EVENTS:
+            await asyncio.sleep(pause)
+            yield event_type, event_data, None
+
+
+class FakeAgentsClient:
+    def __init__(self):
+        async def create_thread():
+            return SimpleNamespace(id="thread_1")
+
+        async def create_message(thread_id: str, role: str, content: str):
+            return SimpleNamespace(id="msg_0")
+
+        async def stream(thread_id: str, agent_id: str):
+            return FakeRunStream()
+
+        self.threads = SimpleNamespace(create=create_thread)
+        self.messages = SimpleNamespace(create=create_message)
+        self.runs = SimpleNamespace(stream=stream)
+
+
+@pytest.fixture
+def agent(monkeypatch) -> SetlistFMAgent:
+    agent = SetlistFMAgent()
+    agent.agents_client = FakeAgentsClient()
+    agent._agent_id = "asst_test"
+    agent._initialized = True
+    monkeypatch.setattr(main, "setlistfm_agent", agent)
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_first_delta_arrives_before_the_run_ends(agent):
+    start = time.perf_counter()
+    arrivals = []
+    async for event in agent.chat_stream("What did Muse play?"):
+        arrivals.append((event["event"], time.perf_counter() - start))
+
+    first_delta = next(elapsed for name, elapsed in arrivals if name == "delta")
+    assert arrivals[-1][0] == "done"
+    assert first_delta < arrivals[-1][1] - 0.25
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_endpoint_sends_sse_events(agent):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/chat/stream", json={"message": "What did Muse play?"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(line.removeprefix("data: "))
+              for line in response.text.splitlines() if line.startswith("data: ")]
+    assert [event["event"] for event in events] == [
+        "thread", "tool_call", "tool_call", "delta", "delta", "citation", "done"]
+    assert [event["status"] for event in events if event["event"] == "tool_call"] == ["started", "completed"]
+    assert "".join(event["text"] for event in events if event["event"] == "delta") == "Muse played Uprising."
+    assert events[5] == {"event": "citation", "title": "setlist.fm", "url": "https://www.setlist.fm/x"}
@@ -0,0 +1,104 @@
+"""
+Concurrency test of the FastAPI app: agent runs must not block the event loop.
+
+The AI Foundry agents client is replaced by an in-memory one whose runs take RUN_SECONDS,
+so N simultaneous /chat requests should complete in about the time of one.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import main
+from setlistfm_agent import SetlistFMAgent
+
+RUN_SECONDS = 0.5
+
+
+class FakeAgentsClient:
+    """Async agents client answering every run after RUN_SECONDS."""
+
+    def __init__(self):
+        self.threads = SimpleNamespace(create=self._create_thread, get=self._get_thread)
+        self.messages = SimpleNamespace(create=self._create_message, list=self._list_messages)
+        self.runs = SimpleNamespace(create=self._create_run, get=self._get_run)
+        self._count = 0
+        self._run_ends: dict[str, float] = {}
+
+    async def _create_thread(self):
+        self._count += 1
+        return SimpleNamespace(id=f"thread_{self._count}")
+
+    async def _get_thread(self, thread_id: str):
+        return SimpleNamespace(id=thread_id)
+
+    async def _create_message(self, thread_id: str, role: str, content: str):
+        return SimpleNamespace(id=f"msg_{thread_id}", role=role)
+
+    async def _create_run(self, thread_id: str, agent_id: str):
+        self._run_ends[f"run_{thread_id}"] = time.monotonic() + RUN_SECONDS
+        return SimpleNamespace(id=f"run_{thread_id}", status="queued", last_error=None, usage=None)
+
+    async def _get_run(self, thread_id: str, run_id: str):
+        if time.monotonic() < self._run_ends[run_id]:
+            return SimpleNamespace(id=run_id, status="in_progress", last_error=None, usage=None)
+        usage = SimpleNamespace(prompt_tokens=1200, completion_tokens=80, total_tokens=1280)
+        return SimpleNamespace(id=run_id, status="completed", last_error=None, usage=usage)
+
+    async def _list_messages(self, thread_id: str, **kwargs):
+        yield SimpleNamespace(
+            role="assistant", created_at=0, url_citation_annotations=[],
+            text_messages=[SimpleNamespace(text=SimpleNamespace(value=f"answer in {thread_id}"))])
+
+
+@pytest.fixture
+def agent(monkeypatch) -> SetlistFMAgent:
+    agent = SetlistFMAgent()
+    agent.agents_client = FakeAgentsClient()
+    agent._agent_id = "asst_test"
+    agent._initialized = True
+    monkeypatch.setattr(main, "setlistfm_agent", agent)
+    return agent
+
+
+async def post_chat(client: httpx.AsyncClient, message: str) -> dict:
+    response = await client.post("/chat", json={"message": message})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_chats_complete_in_about_one_run(agent):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        start = time.perf_counter()
+        await post_chat(client, "warm up")
+        single = time.perf_counter() - start
+
+        concurrency = 8
+        start = time.perf_counter()
+        results = await asyncio.gather(*(post_chat(client, f"question {i}") for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    print(f"\n1 chat: {single:.2f}s, {concurrency} concurrent chats: {elapsed:.2f}s")
+    assert len({result["thread_id"] for result in results}) == concurrency
+    assert all(result["status"] == "success" for result in results)
+    assert results[0]["usage"] == {"prompt_tokens": 1200, "completion_tokens": 80, "total_tokens": 1280}
+    assert elapsed < single * 2
+
+
+@pytest.mark.asyncio
+async def test_health_is_served_during_a_run(agent):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        chat = asyncio.create_task(post_chat(client, "a long question"))
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        response = await client.get("/health")
+        health_latency = time.perf_counter() - start
+        await chat
+
+    assert response.status_code == 200
+    assert health_latency < RUN_SECONDS / 2
@@ -0,0 +1,83 @@
+"""
+Tests of the cached project connection lookups of the agent initialization.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from configuration import settings
+from setlistfm_agent import SetlistFMAgent
+
+LATENCY = 0.1
+
+
+class FakeConnections:
+    """Project connections answering after LATENCY, counting the calls."""
+
+    def __init__(self):
+        self.lists = 0
+        self.credential_fetches = 0
+        self.connections = [
+            SimpleNamespace(type="AppInsights", name="appinsights", id="conn_1", target=""),
+            SimpleNamespace(type="GroundingWithCustomSearch", name="bing", id="conn_2", target=""),
+            SimpleNamespace(type="CustomKeys", name="other-keys", id="conn_3", target=""),
+            SimpleNamespace(type="CustomKeys", name="setlistfm-customkey-connection", id="conn_4",
+                            target="https://api.setlist.fm/rest"),
+        ]
+
+    async def list(self):
+        self.lists += 1
+        await asyncio.sleep(LATENCY)
+        for connection in self.connections:
+            yield connection
+
+    async def _get_with_credentials(self, name: str):
+        self.credential_fetches += 1
+        await asyncio.sleep(LATENCY)
+        return SimpleNamespace(name=name, credentials=SimpleNamespace(api_key="secret"))
+
+
+def make_agent() -> tuple[SetlistFMAgent, FakeConnections]:
+    connections = FakeConnections()
+    agent = SetlistFMAgent()
+    agent.project_client = SimpleNamespace(connections=connections)
+    return agent, connections
+
+
+async def startup_lookups(agent: SetlistFMAgent):
+    return await asyncio.gather(
+        agent._find_connection("AppInsights", with_credentials=True),
+        agent._find_connection("GroundingWithCustomSearch"),
+        agent._find_connection("CustomKeys", "setlistfm-customkey-connection"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_startup_lookups_share_one_listing():
+    agent, connections = make_agent()
+    start = time.perf_counter()
+    app_insights, bing, setlistfm = await startup_lookups(agent)
+    elapsed = time.perf_counter() - start
+
+    # before: three sequential listings and a credential fetch, ~4 x LATENCY
+    print(f"\nstartup connection lookups: {elapsed:.2f}s")
+    assert (bing.id, setlistfm.id, app_insights.credentials.api_key) == ("conn_2", "conn_4", "secret")
+    assert (connections.lists, connections.credential_fetches) == (1, 1)
+    assert elapsed < 2.5 * LATENCY
+
+    await startup_lookups(agent)
+    assert (connections.lists, connections.credential_fetches) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_connections_are_listed_again_after_the_ttl(monkeypatch):
+    monkeypatch.setattr(settings, "connection_cache_ttl", 0)
+    agent, connections = make_agent()
+    await agent._find_connection("AppInsights", with_credentials=True)
+    await agent._find_connection("AppInsights", with_credentials=True)
+    assert (connections.lists, connections.credential_fetches) == (2, 2)
+
+    with pytest.raises(RuntimeError):
+        await agent._find_connection("CustomKeys", "missing-connection")
@@ -0,0 +1,77 @@
+"""
+Tests of the setlist.fm fast path of /search/setlists and /venues/info, and of its fallback to the agent.
+"""
+import httpx
+import pytest
+
+import main
+from setlistfm_agent import SetlistFMAgent
+from setlistfm_client import SetlistFMClient
+
+VENUE = {"id": "6bd6ca6e", "name": "Stade de France", "url": "https://www.setlist.fm/venue/stade-de-france-6bd6ca6e.html",
+         "city": {"name": "Saint-Denis", "country": {"code": "FR", "name": "France"},
+                  "coords": {"lat": 48.92, "long": 2.35}}}
+SETLIST = {"id": "63de4613", "eventDate": "23-08-2023", "artist": {"name": "Muse"}, "venue": VENUE,
+           "tour": {"name": "Will of the People"},
+           "sets": {"set": [{"song": [{"name": "Will of the People"}, {"name": "Hysteria"}]},
+                            {"encore": 1, "song": [{"name": "Knights of Cydonia"}]}]},
+           "url": "https://www.setlist.fm/setlist/muse/2023/stade-de-france-63de4613.html"}
+
+
+def setlistfm_api(request: httpx.Request) -> httpx.Response:
+    assert request.headers["x-api-key"] == "test-key"
+    if request.url.path.endswith("/search/setlists") and request.url.params["artistName"] == "Muse":
+        return httpx.Response(200, json={"setlist": [SETLIST]})
+    if request.url.path.endswith("/search/venues"):
+        return httpx.Response(200, json={"venue": [VENUE]})
+    if request.url.path.endswith(f"/venue/{VENUE['id']}/setlists"):
+        return httpx.Response(200, json={"setlist": [SETLIST]})
+    return httpx.Response(404, json={"code": 404, "message": "not found"})
+
+
+@pytest.fixture
+def agent(monkeypatch) -> SetlistFMAgent:
+    agent = SetlistFMAgent()
+    agent.setlistfm = SetlistFMClient("https://api.setlist.fm/rest/1.0", "test-key", 5, 4,
+                                      transport=httpx.MockTransport(setlistfm_api))
+    agent.chats = []
+
+    async def chat(message: str, thread_id=None, endpoint="/chat"):
+        agent.chats.append((message, endpoint))
+        return {"thread_id": "thread_1", "response": "agent answer", "citations": [], "status": "success"}
+
+    monkeypatch.setattr(agent, "chat", chat)
+    monkeypatch.setattr(main, "setlistfm_agent", agent)
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_setlists_answered_without_agent(agent):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/search/setlists", json={"artist": "Muse"})
+
+    result = response.json()
+    assert result["source"] == "setlistfm" and result["thread_id"] is None and agent.chats == []
+    assert "23-08-2023: Stade de France, Saint-Denis, France (Will of the People)" in result["response"]
+    assert "3 songs: Will of the People, Hysteria, Knights of Cydonia" in result["response"]
+    assert result["citations"][0]["url"] == SETLIST["url"]
+
+
+@pytest.mark.asyncio
+async def test_venue_info_answered_without_agent(agent):
+    result = await agent.get_venue_info("Stade de France", "Saint-Denis")
+    assert result["source"] == "setlistfm" and agent.chats == []
+    assert result["response"].startswith("Stade de France is a venue in Saint-Denis, France.")
+    assert "- 23-08-2023: Muse (Will of the People)" in result["response"]
+
+
+@pytest.mark.asyncio
+async def test_failed_lookup_falls_back_to_the_agent(agent):
+    result = await agent.search_setlists("Unknown Band", "Nowhere")
+    assert result["response"] == "agent answer"
+    assert agent.chats == [("Find recent setlists for Unknown Band at Nowhere", "/search/setlists")]
+
+    agent.setlistfm.api_key = ""
+    await agent.get_venue_info("Stade de France")
+    assert agent.chats[-1] == ("Tell me about the venue Stade de France", "/venues/info")
@@ -0,0 +1,97 @@
+"""
+Tests of the incremental thread history cache and its cursor pagination.
+"""
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from azure.core.async_paging import AsyncItemPaged, AsyncList
+
+import main
+from setlistfm_agent import SetlistFMAgent
+
+
+class FakeMessages:
+    """Messages of one thread, listed in ascending pages like the agents service."""
+
+    def __init__(self, count: int):
+        self.thread = [self._message(i) for i in range(count)]
+        self.fetched = 0
+
+    @staticmethod
+    def _message(i: int, status: str = "completed"):
+        return SimpleNamespace(id=f"msg_{i:03}", role="user" if i % 2 == 0 else "assistant",
+                               created_at=i, status=status,
+                               text_messages=[SimpleNamespace(text=SimpleNamespace(value=f"message {i}"))])
+
+    def add(self, status: str = "completed"):
+        self.thread.append(self._message(len(self.thread), status))
+
+    def list(self, thread_id: str, order: str, limit: int):
+        async def get_next(after=None):
+            ids = [message.id for message in self.thread]
+            start = ids.index(after) + 1 if after else 0
+            return self.thread[start:start + limit]
+
+        async def extract_data(page):
+            self.fetched += len(page)
+            return (page[-1].id if page else None), AsyncList(page)
+
+        return AsyncItemPaged(get_next, extract_data)
+
+
+@pytest.fixture
+def messages(monkeypatch) -> FakeMessages:
+    messages = FakeMessages(250)
+    agent = SetlistFMAgent()
+    agent.agents_client = SimpleNamespace(messages=messages)
+    agent._initialized = True
+    monkeypatch.setattr(main, "setlistfm_agent", agent)
+    return messages
+
+
+@pytest.mark.asyncio
+async def test_history_fetches_only_new_messages(messages):
+    agent = main.setlistfm_agent
+    history = await agent.get_thread_history("thread_1")
+    assert [m["content"] for m in history["messages"]][:2] == ["message 0", "message 1"]
+    assert len(history["messages"]) == 250 and messages.fetched == 250
+
+    messages.add()
+    messages.add(status="in_progress")
+    history = await agent.get_thread_history("thread_1")
+    # the message in progress is not cached, it is fetched again next time
+    assert len(history["messages"]) == 251 and messages.fetched == 252
+
+    messages.thread[-1].status = "completed"
+    history = await agent.get_thread_history("thread_1")
+    assert len(history["messages"]) == 252 and messages.fetched == 253
+
+
+@pytest.mark.asyncio
+async def test_history_endpoint_cursor_pagination(messages):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        pages, cursor = [], None
+        while True:
+            params = {"limit": 100, **({"after": cursor} if cursor else {})}
+            response = await client.get("/chat/history/thread_1", params=params)
+            assert response.status_code == 200
+            pages.append(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+    assert [len(page) for page in pages] == [100, 100, 50]
+    assert pages[1][0]["id"] == "msg_100"
+    assert messages.fetched == 250
+
+
+@pytest.mark.asyncio
+async def test_history_endpoint_rejects_unknown_cursor(messages):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/chat/history/thread_1", params={"limit": 10, "after": "msg_999"})
+
+    assert response.status_code == 400
+    assert "msg_999" in response.json()["detail"]
@@ -0,0 +1,40 @@
+"""
+Tests of the trimmed setlist.fm OpenAPI spec given to the OpenApiTool.
+"""
+import json
+import os
+
+from azure.ai.agents.models import OpenApiAnonymousAuthDetails, OpenApiTool
+
+from openapi_spec import AGENT_OPERATIONS, estimate_tokens, shorten, trim_openapi_spec
+
+with open(os.path.join(os.path.dirname(__file__), "openapi-setlistfm.json")) as f:
+    FULL_SPEC = json.load(f)
+
+
+def tool_definitions_tokens(spec: dict) -> int:
+    tool = OpenApiTool(name="setlistfmapi", spec=spec, description="setlist.fm",
+                       auth=OpenApiAnonymousAuthDetails())
+    return estimate_tokens([definition.as_dict() for definition in tool.definitions])
+
+
+def test_shorten():
+    assert shorten("<p>\nGet a list of an artist's setlists.\n</p> More text.") == "Get a list of an artist's setlists."
+    assert shorten("the artist's name, e.g. <em>&quot;The Beatles&quot;</em>") == "the artist's name"
+
+
+def test_trimmed_spec_keeps_the_agent_operations():
+    spec = trim_openapi_spec(FULL_SPEC)
+    operations = {operation["operationId"]: operation
+                  for item in spec["paths"].values() for operation in item.values()}
+    assert sorted(operations) == sorted(AGENT_OPERATIONS)
+    assert "$ref" not in json.dumps(spec)
+    assert spec["components"]["securitySchemes"] == FULL_SPEC["components"]["securitySchemes"]
+    parameters = [parameter["name"] for parameter in operations["getSetlists"]["parameters"]]
+    assert "artistName" in parameters and "lastFm" not in parameters
+
+
+def test_token_counts():
+    full, trimmed = tool_definitions_tokens(FULL_SPEC), tool_definitions_tokens(trim_openapi_spec(FULL_SPEC))
+    print(f"\nOpenApiTool definitions: full ~{full} tokens, trimmed ~{trimmed} tokens")
+    assert trimmed < full * 0.2
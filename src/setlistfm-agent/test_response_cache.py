@@ -0,0 +1,83 @@
+"""
+Tests of the response cache of /search/setlists and /venues/info: hits, request coalescing, TTL and LRU bounds.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+import main
+from response_cache import ResponseCache, cache_key
+from setlistfm_agent import SetlistFMAgent
+
+
+@pytest.fixture
+def agent(monkeypatch) -> SetlistFMAgent:
+    """Agent without setlist.fm key whose chats (agent runs) take 0.2s."""
+    agent = SetlistFMAgent()
+    agent.setlistfm.api_key = ""
+    agent.runs = []
+
+    async def chat(message: str, thread_id=None, endpoint="/chat"):
+        agent.runs.append(message)
+        await asyncio.sleep(0.2)
+        return {"thread_id": f"thread_{len(agent.runs)}", "response": message, "citations": [], "status": "success"}
+
+    monkeypatch.setattr(agent, "chat", chat)
+    monkeypatch.setattr(main, "setlistfm_agent", agent)
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_are_coalesced_then_cached(agent):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        requests = [{"artist": "Muse", "venue": "Stade de France"},
+                    {"artist": " muse", "venue": "stade  de france"}] * 5
+        responses = await asyncio.gather(*(client.post("/search/setlists", json=body) for body in requests))
+        later = await client.post("/search/setlists", json={"artist": "MUSE", "venue": "Stade de France"})
+        stats = (await client.get("/cache")).json()
+
+    results = [response.json() for response in responses]
+    assert agent.runs == ["Find recent setlists for Muse at Stade de France"]
+    assert {result["response"] for result in results} == {"Find recent setlists for Muse at Stade de France"}
+    # the requester of the run continues its thread, the others get a shared answer
+    assert sum(1 for result in results if not result["cached"]) == 1
+    assert {result["thread_id"] for result in results if result["cached"]} == {None}
+    assert later.json()["cached"] is True
+    assert stats["misses"] == 1 and stats["coalesced"] == 9 and stats["hits"] == 1
+    assert stats["hit_rate"] == pytest.approx(10 / 11)
+
+
+@pytest.mark.asyncio
+async def test_waiter_cancellation_does_not_cancel_the_run(agent):
+    first = asyncio.create_task(agent.get_venue_info("Olympia", "Paris"))
+    await asyncio.sleep(0.05)
+    second = asyncio.create_task(agent.get_venue_info("Olympia", "Paris"))
+    await asyncio.sleep(0.05)
+    first.cancel()
+    assert (await second)["response"] == "Tell me about the venue Olympia in Paris"
+    assert len(agent.runs) == 1
+
+
+@pytest.mark.asyncio
+async def test_ttl_lru_and_errors():
+    cache = ResponseCache(ttl=0.1, max_entries=2)
+    computed = []
+
+    async def compute(name: str, status: str = "success"):
+        computed.append(name)
+        return {"thread_id": "thread", "response": name, "status": status}
+
+    for name in ("a", "b", "a", "c", "b"):
+        await cache.get_or_compute(cache_key("/venues/info", name), lambda: compute(name))
+    # "b" was evicted by "c" (max 2 entries, "a" used more recently)
+    assert computed == ["a", "b", "c", "b"]
+
+    await asyncio.sleep(0.15)
+    await cache.get_or_compute(cache_key("/venues/info", "a"), lambda: compute("a"))
+    assert computed[-1] == "a"
+
+    for _ in range(2):
+        await cache.get_or_compute(cache_key("/venues/info", "d"), lambda: compute("d", "error"))
+    assert computed[-2:] == ["d", "d"]
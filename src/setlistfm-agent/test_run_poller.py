@@ -0,0 +1,81 @@
+"""
+Tests of the adaptive polling of agent runs: backoff, deadline and cancellation.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from configuration import settings
+from setlistfm_agent import SetlistFMAgent
+
+
+class FakeRuns:
+    """Runs completing after the given duration, recording the API calls."""
+
+    def __init__(self, duration: float):
+        self.duration = duration
+        self.calls: list[str] = []
+        self.cancelled = False
+        self._start = time.monotonic()
+
+    def _run(self, status: str):
+        return SimpleNamespace(id="run_1", status=status, last_error=None)
+
+    async def get(self, thread_id: str, run_id: str):
+        self.calls.append("get")
+        if self.cancelled:
+            return self._run("cancelled")
+        return self._run("completed" if time.monotonic() - self._start >= self.duration else "in_progress")
+
+    async def cancel(self, thread_id: str, run_id: str):
+        self.calls.append("cancel")
+        self.cancelled = True
+        return self._run("cancelling")
+
+
+def make_agent(runs: FakeRuns) -> SetlistFMAgent:
+    agent = SetlistFMAgent()
+    agent.agents_client = SimpleNamespace(runs=runs)
+    return agent
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(settings, "run_poll_initial_interval", 0.05)
+    monkeypatch.setattr(settings, "run_poll_max_interval", 0.4)
+    monkeypatch.setattr(settings, "run_poll_backoff", 2.0)
+    monkeypatch.setattr(settings, "run_deadline", 10)
+
+
+@pytest.mark.asyncio
+async def test_polls_back_off():
+    runs = FakeRuns(duration=1.0)
+    run = await make_agent(runs)._wait_for_run("thread_1", SimpleNamespace(id="run_1", status="queued"))
+    assert run.status == "completed"
+    # 0.05, 0.1, 0.2, 0.4, 0.4 -> 5 polls instead of 20 at a fixed 0.05s interval
+    assert runs.calls == ["get"] * 5
+
+
+@pytest.mark.asyncio
+async def test_run_is_cancelled_past_the_deadline(monkeypatch):
+    monkeypatch.setattr(settings, "run_deadline", 0.3)
+    runs = FakeRuns(duration=60)
+    start = time.monotonic()
+    run = await make_agent(runs)._wait_for_run("thread_1", SimpleNamespace(id="run_1", status="queued"))
+    assert time.monotonic() - start < 1.0
+    assert "cancel" in runs.calls
+    assert run.status == "cancelling"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_chat_cancels_the_run():
+    runs = FakeRuns(duration=60)
+    task = asyncio.create_task(
+        make_agent(runs)._wait_for_run("thread_1", SimpleNamespace(id="run_1", status="queued")))
+    await asyncio.sleep(0.2)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert runs.calls[-1] == "cancel"
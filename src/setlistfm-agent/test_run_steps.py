@@ -0,0 +1,64 @@
+"""
+Tests of the per step timing of agent runs (spans and summary).
+"""
+from types import SimpleNamespace
+
+import pytest
+from azure.ai.agents.models import RunStep, ThreadRun
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from setlistfm_agent import SetlistFMAgent
+
+exporter = InMemorySpanExporter()
+provider = TracerProvider()
+provider.add_span_processor(SimpleSpanProcessor(exporter))
+trace.set_tracer_provider(provider)
+
+T0 = 1_760_000_000
+
+
+def step(step_id: str, start: int, end: int, tool: str = None, tokens: int = None) -> RunStep:
+    details = {"type": "tool_calls", "tool_calls": [{"id": "call", "type": tool, tool: {}}]} if tool \
+        else {"type": "message_creation", "message_creation": {"message_id": "msg"}}
+    return RunStep({"id": step_id, "type": details["type"], "status": "completed", "step_details": details,
+                    "created_at": T0 + start, "completed_at": T0 + end,
+                    **({"usage": {"prompt_tokens": tokens, "completion_tokens": 0, "total_tokens": tokens}}
+                       if tokens else {})})
+
+
+STEPS = [step("s1", 0, 2, "openapi", 900), step("s2", 2, 14, "bing_custom_search", 1200),
+         step("s3", 14, 20, tokens=3000)]
+
+
+class FakeRunSteps:
+    async def list(self, thread_id: str, run_id: str, order: str):
+        for run_step in STEPS:
+            yield run_step
+
+
+@pytest.mark.asyncio
+async def test_run_steps_timing():
+    agent = SetlistFMAgent()
+    agent.agents_client = SimpleNamespace(run_steps=FakeRunSteps())
+    run = ThreadRun({"id": "run_1", "status": "completed", "created_at": T0 - 1, "completed_at": T0 + 21})
+
+    exporter.clear()
+    timing = await agent._run_step_timings("thread_1", run)
+
+    assert timing["run_ms"] == 22000
+    assert [(s["name"], s["duration_ms"], s.get("tokens")) for s in timing["steps"]] == [
+        ("openapi", 2000, 900), ("bing_custom_search", 12000, 1200), ("message_creation", 6000, 3000)]
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    bing = spans["setlistfm_agent_run_step bing_custom_search"]
+    assert (bing.end_time - bing.start_time) / 1e9 == 12
+    assert bing.attributes["total_tokens"] == 1200 and bing.attributes["status"] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_missing_steps_do_not_fail_the_chat():
+    agent = SetlistFMAgent()
+    agent.agents_client = SimpleNamespace()
+    assert await agent._run_step_timings("thread_1", ThreadRun({"id": "run_1", "status": "completed"})) is None
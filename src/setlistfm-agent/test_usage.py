@@ -0,0 +1,36 @@
+"""
+Test of the token usage counter of the agent runs.
+"""
+from types import SimpleNamespace
+
+from opentelemetry import metrics
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+from setlistfm_agent import record_usage
+
+reader = InMemoryMetricReader()
+metrics.set_meter_provider(MeterProvider(metric_readers=[reader]))
+
+
+def test_usage_counted_by_endpoint_and_token_type():
+    usage = SimpleNamespace(prompt_tokens=5200, completion_tokens=310, total_tokens=5510)
+    assert record_usage(usage, "/test/usage_1") == {
+        "prompt_tokens": 5200, "completion_tokens": 310, "total_tokens": 5510}
+    record_usage(usage, "/test/usage_1")
+    record_usage(usage, "/test/usage_2")
+    assert record_usage(None, "/test/usage_2") is None
+
+    points = {
+        (point.attributes["endpoint"], point.attributes["token_type"]): (point.value, set(point.attributes))
+        for resource_metrics in reader.get_metrics_data().resource_metrics
+        for scope_metrics in resource_metrics.scope_metrics
+        for metric in scope_metrics.metrics if metric.name == "setlistfm_agent.tokens"
+        for point in metric.data.data_points if point.attributes["endpoint"].startswith("/test/")
+    }
+    # bounded dimensions only: no thread (nor user) id in the counter
+    dimensions = {"endpoint", "model_deployment", "token_type"}
+    assert points == {
+        ("/test/usage_1", "prompt"): (10400, dimensions), ("/test/usage_1", "completion"): (620, dimensions),
+        ("/test/usage_2", "prompt"): (5200, dimensions), ("/test/usage_2", "completion"): (310, dimensions),
+    }
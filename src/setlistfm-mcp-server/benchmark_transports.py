@@ -0,0 +1,173 @@
+"""
+Benchmark of the setlistfm.py MCP server transports: single worker SSE against stateless
+streamable HTTP served by several uvicorn workers.
+
+The servers call a local fake setlist.fm API (fixed latency, ~30 KB setlist pages), so the
+numbers measure the MCP server and not the real API nor its rate limits. Concurrent MCP
+clients call `search_setlists` for a fixed duration and the script reports calls/s and
+latency percentiles per configuration.
+
+    uv run python benchmark_transports.py --workers 4 --clients 32 --duration 15
+
+The stateless configuration only scales with the CPU cores available to the workers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+from fastmcp import Client
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def fake_setlists(page: int) -> dict:
+    """Page of 20 setlists, about the size of a real setlist.fm search response."""
+    songs = [{"name": f"Song {i}", "info": "extended outro"} for i in range(15)]
+    setlist = {
+        "id": "63de4613", "versionId": "7be1aaa0", "eventDate": "23-08-2023",
+        "artist": {"mbid": "9c9f1380-2516-4fc9-a3e6-f9f61941d090", "name": "Muse", "sortName": "Muse"},
+        "venue": {"id": "6bd6ca6e", "name": "Stade de France", "city": {
+            "id": "2988507", "name": "Paris", "country": {"code": "FR", "name": "France"},
+            "coords": {"lat": 48.85, "long": 2.35}}},
+        "tour": {"name": "Will of the People"},
+        "sets": {"set": [{"song": songs}, {"encore": 1, "song": songs[:3]}]},
+        "url": "https://www.setlist.fm/setlist/muse/2023/stade-de-france-paris-france-63de4613.html",
+    }
+    return {"type": "setlists", "itemsPerPage": 20, "page": page, "total": 400, "setlist": [setlist] * 20}
+
+
+def run_upstream(port: int, latency: float):
+    """Fake setlist.fm API, run in its own process."""
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    async def search_setlists(request):
+        await asyncio.sleep(latency)
+        return JSONResponse(fake_setlists(int(request.query_params.get("p", 1))))
+
+    app = Starlette(routes=[Route("/rest/1.0/search/setlists", search_setlists)])
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start(args: list[str], env: dict) -> subprocess.Popen:
+    env = {**os.environ, **env}
+    # no telemetry export from the benchmarked processes
+    env.pop("APPLICATIONINSIGHTS_CONNECTION_STRING", None)
+    return subprocess.Popen(args, cwd=HERE, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not start in {timeout}s")
+
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def drive(url: str, clients: int, duration: float) -> list[float]:
+    """Run concurrent MCP clients calling search_setlists, return the call latencies."""
+    latencies: list[float] = []
+    deadline = time.monotonic() + duration
+
+    async def one_client(index: int):
+        async with Client(url, timeout=30) as client:
+            while time.monotonic() < deadline:
+                start_time = time.perf_counter()
+                result = await client.call_tool(
+                    "search_setlists", {"artist_name": "Muse", "page": index % 5 + 1})
+                latencies.append(time.perf_counter() - start_time)
+                assert json.loads(result.content[0].text)["type"] == "setlists"
+
+    await asyncio.gather(*(one_client(i) for i in range(clients)))
+    return latencies
+
+
+def benchmark(name: str, transport: str, workers: int, upstream: str, clients: int, duration: float) -> dict:
+    port = free_port()
+    env = {
+        "SETLISTFM_API_BASE": upstream,
+        "SETLISTFM_MCP_PORT": str(port),
+        "SETLISTFM_MCP_STATELESS": "true" if transport == "stateless" else "false",
+        "SETLISTFM_MCP_WORKERS": str(workers),
+    }
+    server = start([sys.executable, "setlistfm.py"], env)
+    try:
+        wait_ready(f"http://127.0.0.1:{port}/liveness")
+        url = f"http://127.0.0.1:{port}/sse" if transport == "sse" else f"http://127.0.0.1:{port}/mcp"
+        # warm up the workers before measuring
+        asyncio.run(drive(url, clients, 2))
+        latencies = sorted(asyncio.run(drive(url, clients, duration)))
+    finally:
+        stop(server)
+    return {
+        "configuration": name,
+        "calls": len(latencies),
+        "calls_per_s": round(len(latencies) / duration, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake setlist.fm latency (s)")
+    parser.add_argument("--upstream-port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.upstream_port:
+        run_upstream(args.upstream_port, args.latency)
+        return
+
+    upstream_port = free_port()
+    upstream = start([sys.executable, __file__, "--upstream-port", str(upstream_port),
+                      "--latency", str(args.latency)], {})
+    try:
+        wait_ready(f"http://127.0.0.1:{upstream_port}/rest/1.0/search/setlists")
+        results = [
+            benchmark("sse, 1 worker", "sse", 1, f"http://127.0.0.1:{upstream_port}/rest/1.0",
+                      args.clients, args.duration),
+            benchmark(f"stateless, {args.workers} workers", "stateless", args.workers,
+                      f"http://127.0.0.1:{upstream_port}/rest/1.0", args.clients, args.duration),
+        ]
+    finally:
+        stop(upstream)
+
+    print(f"{args.clients} clients, {args.duration}s, {os.cpu_count()} CPUs, upstream latency {args.latency * 1000:.0f}ms")
+    print(f"{'configuration':<26}{'calls':>8}{'calls/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for result in results:
+        print(f"{result['configuration']:<26}{result['calls']:>8}{result['calls_per_s']:>10}"
+              f"{result['p50_ms']:>10}{result['p95_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
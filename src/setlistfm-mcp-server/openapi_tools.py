@@ -0,0 +1,110 @@
+"""
+Tools of the OpenAPI generated setlist.fm MCP server (setlistfm2.py).
+
+The tools are generated from `openapi-setlistfm.json` by `FastMCP.from_openapi`, named
+after the operations (`getSetlists`, `getArtist`...).
+
+The compact mode (`SETLISTFM_COMPACT_TOOLS=true`) keeps the operation summary as the
+description and removes examples, titles and long descriptions from the schemas, which
+shrinks the `list_tools` payload sent to the LLM on every turn. It is applied to each
+generated tool by the `mcp_component_fn` hook, so it only relies on the public FastMCP API.
+"""
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any
+
+import httpx
+from fastmcp import FastMCP
+from fastmcp.tools import Tool
+
+logger = logging.getLogger(__name__)
+
+SETLISTFM_OPENAPI_SPEC = Path(__file__).parent / "openapi-setlistfm.json"
+SETLISTFM_COMPACT_TOOLS = os.getenv(
+    "SETLISTFM_COMPACT_TOOLS", "false").lower() == "true"
+
+# Tool names of the operationIds of the spec
+SETLISTFM_MCP_NAMES = {
+    "resource__1.0_artist__mbid__getArtist_GET": "getArtist",
+    "resource__1.0_artist__mbid__setlists_getArtistSetlists_GET": "getArtistSetlists",
+    "resource__1.0_city__geoId__getCity_GET": "getCity",
+    "resource__1.0_search_artists_getArtists_GET": "getArtists",
+    "resource__1.0_search_cities_getCities_GET": "getCities",
+    "resource__1.0_search_countries_getCountries_GET": "getCountries",
+    "resource__1.0_search_setlists_getSetlists_GET": "getSetlists",
+    "resource__1.0_search_venues_getVenues_GET": "getVenues",
+    "resource__1.0_setlist_version__versionId__getSetlistVersion_GET": "getSetlistVersion",
+    "resource__1.0_setlist__setlistId__getSetlist_GET": "getSetlist",
+    "resource__1.0_user__userId__getUser_GET": "getUser",
+    "resource__1.0_user__userId__attended_getUserAttendedSetlists_GET": "getUserAttendedSetlists",
+    "resource__1.0_user__userId__edited_getUserEditedSetlists_GET": "getUserEditedSetlists",
+    "resource__1.0_venue__venueId__getVenue_GET": "getVenue",
+    "resource__1.0_venue__venueId__setlists_getVenueSetlists_GET": "getVenueSetlists",
+}
+
+MAX_DESCRIPTION_LENGTH = 200
+MAX_SCHEMA_DESCRIPTION_LENGTH = 100
+# Schema keywords the LLM does not need to call a tool
+DROPPED_SCHEMA_KEYS = ("example", "examples", "title")
+
+
+_HTML_TAG = re.compile(r"<[^>]+>")
+_INLINE_EXAMPLE = re.compile(r",?\s+e\.g\..*$", re.IGNORECASE)
+_FIRST_SENTENCE = re.compile(r"^(.+?[.!?])(\s|$)")
+
+
+def shorten(text: str, max_length: int) -> str:
+    """Keep the first sentence of a description, without inline examples, HTML and extra whitespace."""
+    text = " ".join(_HTML_TAG.sub(" ", text).split())
+    text = _INLINE_EXAMPLE.sub("", text)
+    match = _FIRST_SENTENCE.match(text)
+    if match:
+        text = match.group(1)
+    if len(text) > max_length:
+        text = text[:max_length - 3].rstrip() + "..."
+    return text
+
+
+def compact_schema(schema: Any) -> Any:
+    """Return a copy of a JSON schema without examples and titles, and with short descriptions."""
+    if isinstance(schema, list):
+        return [compact_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    compacted = {}
+    for key, value in schema.items():
+        if key in DROPPED_SCHEMA_KEYS:
+            continue
+        if key == "description" and isinstance(value, str):
+            compacted[key] = shorten(value, MAX_SCHEMA_DESCRIPTION_LENGTH)
+        elif key in ("properties", "$defs") and isinstance(value, dict):
+            # Property and definition names are data, not schema keywords
+            compacted[key] = {name: compact_schema(item)
+                              for name, item in value.items()}
+        else:
+            compacted[key] = compact_schema(value)
+    return compacted
+
+
+def compact_tool(route: Any, component: Any):
+    """mcp_component_fn of FastMCP.from_openapi: operation summary as description, compact schemas."""
+    if not isinstance(component, Tool):
+        return
+    component.description = shorten(
+        route.summary or route.description or component.description or "", MAX_DESCRIPTION_LENGTH)
+    component.parameters = compact_schema(component.parameters)
+    component.output_schema = compact_schema(component.output_schema)
+
+
+def from_setlistfm_openapi(client: httpx.AsyncClient, compact: bool = SETLISTFM_COMPACT_TOOLS,
+                           spec_path: Path = SETLISTFM_OPENAPI_SPEC, **settings) -> FastMCP:
+    """Create the MCP server of the spec operations, calling the API with the given client."""
+    with open(spec_path, "r", encoding="utf-8") as f:
+        openapi_spec = json.load(f)
+    mcp = FastMCP.from_openapi(openapi_spec=openapi_spec, client=client, mcp_names=SETLISTFM_MCP_NAMES,
+                               mcp_component_fn=compact_tool if compact else None, **settings)
+    logger.info(f"Generated the tools of {spec_path.name} ({'compact' if compact else 'full'} descriptions)")
+    return mcp
@@ -0,0 +1,168 @@
+"""
+Response cache for the tools generated from the setlist.fm OpenAPI spec (setlistfm2.py).
+
+Results of the tools backed by a GET operation are cached by tool name and arguments
+(setlist.fm data is public, the same for every client). Entries live for the TTL of
+their tool, capped by the Cache-Control max-age the API returns.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Optional
+
+import httpx
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from fastmcp.tools.tool import ToolResult
+from opentelemetry import trace
+
+logger = logging.getLogger(__name__)
+
+# Cache-Control headers of the API responses received during the current tool call
+_cache_control: ContextVar[Optional[list[str]]] = ContextVar(
+    "cache_control", default=None)
+
+
+async def record_cache_control(response: httpx.Response):
+    """httpx response hook passing the Cache-Control header of the API to the ResponseCache middleware."""
+    headers = _cache_control.get()
+    if headers is not None:
+        headers.append(response.headers.get("cache-control", ""))
+
+
+def parse_cache_control(headers: list[str]) -> Optional[float]:
+    """
+    Return the max TTL allowed by Cache-Control headers: 0 for no-store/no-cache,
+    max-age otherwise, None when the headers do not restrict caching.
+    """
+    ttl = None
+    for header in headers:
+        for directive in header.lower().split(","):
+            name, _, value = directive.strip().partition("=")
+            if name in ("no-store", "no-cache"):
+                return 0.0
+            if name == "max-age":
+                try:
+                    max_age = float(value.strip('"'))
+                except ValueError:
+                    continue
+                ttl = max_age if ttl is None else min(ttl, max_age)
+    return ttl
+
+
+def parse_ttls(value: str) -> dict[str, float]:
+    """Parse per tool TTLs given as 'tool=seconds,tool=seconds'."""
+    ttls = {}
+    for item in filter(None, (item.strip() for item in value.split(","))):
+        name, _, seconds = item.partition("=")
+        ttls[name.strip()] = float(seconds)
+    return ttls
+
+
+class ResponseCache(Middleware):
+    """
+    Middleware caching the results of the tools backed by a GET operation, by tool name
+    and arguments.
+
+    Entries live for the TTL of their tool, capped by the Cache-Control max-age of the
+    API response (no-store and no-cache responses are not cached). The cache is an LRU
+    bounded in entries and in approximate bytes.
+    """
+
+    def __init__(self, default_ttl: float = 600, ttls: Optional[dict[str, float]] = None,
+                 max_entries: int = 1000, max_bytes: int = 50_000_000):
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (expires_at, size, result)
+        self._entries: OrderedDict[tuple, tuple[float, int, ToolResult]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._get_tools: dict[str, bool] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def _is_get_tool(self, context: MiddlewareContext, name: str) -> bool:
+        """Whether the tool is generated from a GET operation, resolved once per tool."""
+        if name not in self._get_tools:
+            try:
+                tool = await context.fastmcp_context.fastmcp.get_tool(name)
+            except Exception:
+                return False
+            route = getattr(tool, "_route", None)
+            self._get_tools[name] = route is not None and route.method.upper() == "GET"
+        return self._get_tools[name]
+
+    def ttl_for(self, tool_name: str) -> float:
+        return self.ttls.get(tool_name, self.default_ttl)
+
+    def get(self, key: tuple) -> Optional[ToolResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def put(self, key: tuple, result: ToolResult, ttl: float):
+        if result.structured_content is not None:
+            size = len(json.dumps(result.structured_content, default=str))
+        else:
+            size = sum(len(getattr(block, "text", "") or "") for block in result.content)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, size, result)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        tool_name = context.message.name
+        ttl = self.ttl_for(tool_name)
+        span = trace.get_current_span()
+        if ttl <= 0 or not await self._is_get_tool(context, tool_name):
+            return await call_next(context)
+        key = (tool_name, json.dumps(context.message.arguments or {}, sort_keys=True, default=str))
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            span.set_attribute("tool.cache", "hit")
+            logger.info(f"Tool call cache hit: {tool_name}")
+            return cached
+
+        self.misses += 1
+        span.set_attribute("tool.cache", "miss")
+        headers: list[str] = []
+        token = _cache_control.set(headers)
+        try:
+            result = await call_next(context)
+        finally:
+            _cache_control.reset(token)
+        max_age = parse_cache_control(headers)
+        if max_age is not None:
+            ttl = min(ttl, max_age)
+        if ttl > 0:
+            self.put(key, result, ttl)
+        return result
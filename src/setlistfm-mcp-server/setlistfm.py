@@ -5,6 +5,7 @@ import logging
 import os
 import json
 import httpx
+import uvicorn
 from typing import Any, Optional
 from fastmcp import FastMCP
 from dotenv import load_dotenv
@@ -63,10 +64,18 @@ mcp = FastMCP("SetlistFM")
 configure_telemetry()
 
 # Constants
-SETLISTFM_API_BASE = "https://api.setlist.fm/rest/1.0"
+SETLISTFM_API_BASE = os.getenv(
+    "SETLISTFM_API_BASE", "https://api.setlist.fm/rest/1.0")
 USER_AGENT = "setlistfm-mcp/1.0"
 SETLISTFM_API_KEY = os.getenv(
     "SETLISTFM_API_KEY", "")
+# The tools are pure functions of their arguments: in stateless mode any worker or replica
+# serves any request, without sessions nor sticky routing
+SETLISTFM_MCP_STATELESS = os.getenv(
+    "SETLISTFM_MCP_STATELESS", "false").lower() == "true"
+SETLISTFM_MCP_WORKERS = int(os.getenv("SETLISTFM_MCP_WORKERS", "1"))
+SETLISTFM_MCP_HOST = os.getenv("SETLISTFM_MCP_HOST", "127.0.0.1")
+SETLISTFM_MCP_PORT = int(os.getenv("SETLISTFM_MCP_PORT", "9000"))
 
 
 @mcp.custom_route("/", methods=["GET"])
@@ -297,16 +306,26 @@ async def search_artists(artist_name: str, sort: str = "relevance", page: int =
     return json.dumps(result) if result is not None else json.dumps({"error": "No data found"})
 
 
+# Stateless streamable HTTP app (plain JSON responses), served by the uvicorn workers:
+# uvicorn setlistfm:app --workers 4
+app = mcp.http_app(stateless_http=True, json_response=True)
+
 if __name__ == "__main__":
     logger.info("Starting FastMCP server for SetlistFM")
     # if opentelemetry is configured, use default logging config should be reduced to None else a slow startup time (30s)
     uvicorn_config = {
         "log_config": None,  # Use default logging configuration
     }
-    mcp.run(
-        transport="sse",
-        host="127.0.0.1",
-        port=9000,
-        log_level="debug",
-        uvicorn_config=uvicorn_config
-    )
+    if SETLISTFM_MCP_STATELESS:
+        logger.info(
+            f"Stateless streamable HTTP on /mcp with {SETLISTFM_MCP_WORKERS} workers")
+        uvicorn.run("setlistfm:app", host=SETLISTFM_MCP_HOST, port=SETLISTFM_MCP_PORT,
+                    workers=SETLISTFM_MCP_WORKERS, **uvicorn_config)
+    else:
+        mcp.run(
+            transport="sse",
+            host=SETLISTFM_MCP_HOST,
+            port=SETLISTFM_MCP_PORT,
+            log_level="debug",
+            uvicorn_config=uvicorn_config
+        )
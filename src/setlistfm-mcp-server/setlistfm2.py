@@ -1,12 +1,12 @@
 
 from dotenv import load_dotenv
 import httpx
-from fastmcp import FastMCP
-import json
 import logging
 import os
 
 from configuration import configure_telemetry, Telemetry, setup_logging
+from response_cache import ResponseCache, parse_ttls, record_cache_control
+from openapi_tools import from_setlistfm_openapi
 load_dotenv()
 
 # Setup logging first
@@ -25,38 +25,31 @@ headers = {
     "User-Agent": "setlistfm-mcp/1.0"
 }
 client = httpx.AsyncClient(base_url="https://api.setlist.fm/rest",
-                           headers=headers)
-# Load your OpenAPI spec from a file
-with open("openapi-setlistfm.json", "r", encoding="utf-8") as f:
-    openapi_spec = json.load(f)
-
-# Create the MCP server
-mcp = FastMCP.from_openapi(
-    openapi_spec=openapi_spec,
-    client=client,
-    name="Setlist.fm MCP Server",
-    version="1.0.0",
-    mcp_names={
-        "resource__1.0_artist__mbid__getArtist_GET": "getArtist",
-        "resource__1.0_artist__mbid__setlists_getArtistSetlists_GET": "getArtistSetlists",
-        "resource__1.0_city__geoId__getCity_GET": "getCity",
-        "resource__1.0_search_artists_getArtists_GET": "getArtists",
-        "resource__1.0_search_cities_getCities_GET": "getCities",
-        "resource__1.0_search_countries_getCountries_GET": "getCountries",
-        "resource__1.0_search_setlists_getSetlists_GET": "getSetlists",
-        "resource__1.0_search_venues_getVenues_GET": "getVenues",
-        "resource__1.0_setlist_version__versionId__getSetlistVersion_GET": "getSetlistVersion",
-        "resource__1.0_setlist__setlistId__getSetlist_GET": "getSetlist",
-        "resource__1.0_user__userId__getUser_GET": "getUser",
-        "resource__1.0_user__userId__attended_getUserAttendedSetlists_GET": "getUserAttendedSetlists",
-        "resource__1.0_user__userId__edited_getUserEditedSetlists_GET": "getUserEditedSetlists",
-        "resource__1.0_venue__venueId__getVenue_GET": "getVenue",
-        "resource__1.0_venue__venueId__setlists_getVenueSetlists_GET": "getVenueSetlists",
-    }
-)
+                           headers=headers,
+                           event_hooks={"response": [record_cache_control]})
+# Create the MCP server from openapi-setlistfm.json (compact tools with SETLISTFM_COMPACT_TOOLS=true)
+mcp = from_setlistfm_openapi(client, name="Setlist.fm MCP Server", version="1.0.0")
 configure_telemetry()
 mcp.add_middleware(Telemetry())
 
+# Cache TTLs (seconds) of the tools whose data rarely changes, other tools use SETLISTFM_CACHE_TTL
+SETLISTFM_CACHE_TTLS = {
+    "getArtist": 86400,
+    "getCity": 86400,
+    "getCountries": 86400,
+    "getVenue": 86400,
+    "getSetlist": 3600,
+}
+mcp.add_middleware(ResponseCache(
+    default_ttl=float(os.getenv("SETLISTFM_CACHE_TTL", "600")),
+    ttls={**SETLISTFM_CACHE_TTLS, **parse_ttls(os.getenv("SETLISTFM_CACHE_TTLS", ""))},
+    max_entries=int(os.getenv("SETLISTFM_CACHE_MAX_ENTRIES", "1000")),
+    max_bytes=int(os.getenv("SETLISTFM_CACHE_MAX_BYTES", "50000000")),
+))
+
+# Stateless streamable HTTP app for several workers: uvicorn setlistfm2:app --workers 4
+app = mcp.http_app(stateless_http=True, json_response=True)
+
 if __name__ == "__main__":
     uvicorn_config = {
         "log_config": None,  # Use default logging configuration
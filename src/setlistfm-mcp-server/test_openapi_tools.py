@@ -0,0 +1,37 @@
+"""
+Tests of the tools generated from the setlist.fm OpenAPI spec, and measure of the list_tools payload in compact mode.
+"""
+import asyncio
+import json
+
+import httpx
+
+from openapi_tools import SETLISTFM_MCP_NAMES, compact_schema, from_setlistfm_openapi, shorten
+
+
+def list_tools_payload(compact: bool) -> tuple[list[str], int]:
+    mcp = from_setlistfm_openapi(httpx.AsyncClient(), compact=compact)
+    tools = asyncio.run(mcp.get_tools())
+    payload = json.dumps([tool.to_mcp_tool().model_dump(mode="json", exclude_none=True)
+                          for tool in tools.values()])
+    return sorted(tools), len(payload)
+
+
+def test_shorten_and_compact_schema():
+    assert shorten("<p>\nGet a list of an artist's setlists.\n</p> More text.", 200) == \
+        "Get a list of an artist's setlists."
+    assert shorten("the artist's name, e.g. <em>&quot;The Beatles&quot;</em>", 100) == "the artist's name"
+    assert compact_schema({"title": "setlists", "type": "object", "example": {"total": 42},
+                           "properties": {"total": {"type": "number", "description": "the total. starts at 1"}}}) == \
+        {"type": "object", "properties": {"total": {"type": "number", "description": "the total."}}}
+
+
+def test_compact_payload_size():
+    """Compare the list_tools payload sent to the LLM with full and compact descriptions."""
+    full_names, full_bytes = list_tools_payload(compact=False)
+    compact_names, compact_bytes = list_tools_payload(compact=True)
+
+    print(f"\nlist_tools payload: full {full_bytes} bytes (~{full_bytes // 4} tokens), "
+          f"compact {compact_bytes} bytes (~{compact_bytes // 4} tokens)")
+    assert compact_names == full_names == sorted(SETLISTFM_MCP_NAMES.values())
+    assert compact_bytes < full_bytes * 0.5
@@ -0,0 +1,65 @@
+"""
+Tests of the ResponseCache middleware on the tools generated from the setlist.fm OpenAPI spec.
+"""
+import asyncio
+
+import httpx
+from fastmcp import Client, FastMCP
+
+from response_cache import ResponseCache, parse_cache_control, record_cache_control
+from openapi_tools import from_setlistfm_openapi
+
+
+def make_server(cache: ResponseCache, cache_control: str = "") -> tuple[FastMCP, list[str]]:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        headers = {"Cache-Control": cache_control} if cache_control else {}
+        return httpx.Response(200, headers=headers, json={"mbid": "mbid", "name": "Muse"})
+
+    client = httpx.AsyncClient(base_url="https://api.setlist.fm/rest", transport=httpx.MockTransport(handler),
+                               event_hooks={"response": [record_cache_control]})
+    mcp = from_setlistfm_openapi(client, compact=True)
+    mcp.add_middleware(cache)
+    return mcp, calls
+
+
+async def call_tool_times(mcp: FastMCP, arguments: list[dict]):
+    async with Client(mcp) as client:
+        for args in arguments:
+            await client.call_tool("getArtist", args)
+
+
+def test_parse_cache_control():
+    assert parse_cache_control(["public, max-age=7200"]) == 7200
+    assert parse_cache_control(["private, max-age=0"]) == 0
+    assert parse_cache_control(["no-store"]) == 0
+    assert parse_cache_control(["", "public"]) is None
+
+
+def test_get_tool_results_are_cached():
+    cache = ResponseCache(default_ttl=60)
+    mcp, calls = make_server(cache)
+    asyncio.run(call_tool_times(mcp, [{"mbid": "a"}, {"mbid": "a"}, {"mbid": "b"}]))
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_cache_control_and_ttls():
+    mcp, calls = make_server(ResponseCache(default_ttl=60), cache_control="no-store")
+    asyncio.run(call_tool_times(mcp, [{"mbid": "a"}, {"mbid": "a"}]))
+    assert len(calls) == 2
+
+    mcp, calls = make_server(ResponseCache(default_ttl=60, ttls={"getArtist": 0}))
+    asyncio.run(call_tool_times(mcp, [{"mbid": "a"}, {"mbid": "a"}]))
+    assert len(calls) == 2
+
+
+def test_memory_bounds():
+    cache = ResponseCache(default_ttl=60, max_entries=2)
+    mcp, calls = make_server(cache)
+    asyncio.run(call_tool_times(mcp, [{"mbid": "a"}, {"mbid": "b"}, {"mbid": "c"}, {"mbid": "a"}]))
+    # "a" was evicted by "c"
+    assert len(calls) == 4
+    assert cache.stats()["entries"] == 2
@@ -21,24 +21,54 @@ MCP_SERVER_HOST = os.getenv("MCP_SERVER_HOST", "localhost")
 # SpotifyProvider for managing Spotify OAuth authentication
 import httpx
 from fastmcp.server.auth import TokenVerifier
-from fastmcp.server.auth.auth import AccessToken
+from fastmcp.server.auth.auth import AccessToken, RefreshToken
 from fastmcp.server.auth.oauth_proxy import OAuthProxy
 from fastmcp.utilities.logging import get_logger
 from fastmcp.utilities.types import NotSet, NotSetT
-import yaml
 from pathlib import Path
+import yaml
+from fastmcp.experimental.server.openapi import OpenAPITool
+from fastmcp.experimental.utilities.openapi import HTTPRoute
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from fastmcp.tools.tool import ToolResult
+from response_pruning import prune_response
+from rate_limit import RateLimitedTransport, spotify_rate_limiter
+from tool_profiles import ToolProfiles
+from response_cache import record_cache_control, spotify_response_cache
+from oauth_storage import SharedDict, SQLiteStorage
+import hashlib
+from typing import Optional
 
 logger = get_logger(__name__)
 
+# Optional SQLite file sharing the OAuth state (clients, pending authorizations, tokens) between workers
+SPOTIFY_OAUTH_STORAGE_PATH = os.getenv("SPOTIFY_OAUTH_STORAGE_PATH")
+# How long a token verified against Spotify /me is trusted without calling Spotify again
+SPOTIFY_VERIFIED_TOKEN_TTL = float(os.getenv("SPOTIFY_VERIFIED_TOKEN_TTL", "300"))
+
+
 class SpotifyTokenVerifier(TokenVerifier):
     """Token verifier for Spotify OAuth tokens."""
-    def __init__(self, required_scopes=None, timeout_seconds=10):
+    def __init__(self, required_scopes=None, timeout_seconds=10, cache: Optional[SQLiteStorage] = None):
         super().__init__(required_scopes=required_scopes)
         self.timeout_seconds = timeout_seconds
+        # Verified tokens, keyed by token hash, shared by the workers when the storage is a file
+        self.cache = cache or SQLiteStorage(":memory:", "verified_tokens", SPOTIFY_VERIFIED_TOKEN_TTL)
 
     async def verify_token(self, token: str) -> AccessToken | None:
+        token_hash = hashlib.sha256(token.encode()).hexdigest()
+        cached = self.cache.read(token_hash)
+        if cached is not None:
+            return AccessToken.model_validate(cached)
+        access_token = await self._verify_with_spotify(token)
+        if access_token is not None:
+            self.cache.write(token_hash, access_token.model_dump(mode="json"))
+        return access_token
+
+    async def _verify_with_spotify(self, token: str) -> AccessToken | None:
         try:
-            async with httpx.AsyncClient(timeout=self.timeout_seconds) as client:
+            async with httpx.AsyncClient(timeout=self.timeout_seconds,
+                                         transport=RateLimitedTransport(spotify_rate_limiter)) as client:
                 # Get user info from Spotify API
                 response = await client.get(
                     "https://api.spotify.com/v1/me",
@@ -91,6 +121,7 @@ class SpotifyProvider(OAuthProxy):
         timeout_seconds: int | NotSetT = NotSet,
         allowed_client_redirect_uris: list[str] | NotSetT = NotSet,
         client_storage=None,
+        state_storage: Optional[SQLiteStorage] = None,
     ):
         if client_id is NotSet or client_secret is NotSet:
             raise ValueError("client_id and client_secret are required for SpotifyProvider")
@@ -102,7 +133,10 @@ class SpotifyProvider(OAuthProxy):
         token_verifier = SpotifyTokenVerifier(
             required_scopes=required_scopes_final,
             timeout_seconds=timeout_seconds_final,
+            cache=state_storage.namespace("verified_tokens", SPOTIFY_VERIFIED_TOKEN_TTL) if state_storage else None,
         )
+        if state_storage is not None and client_storage is None:
+            client_storage = state_storage.namespace("clients")
 
         super().__init__(
             upstream_authorization_endpoint="https://accounts.spotify.com/authorize",
@@ -116,6 +150,14 @@ class SpotifyProvider(OAuthProxy):
             allowed_client_redirect_uris=allowed_client_redirect_uris_final,
             client_storage=client_storage,
         )
+        if state_storage is not None:
+            # The OAuth proxy keeps this state in process dicts, share it with the other workers
+            self._oauth_transactions = SharedDict(state_storage.namespace("transactions", 900))
+            self._client_codes = SharedDict(state_storage.namespace("client_codes", 900))
+            self._access_tokens = SharedDict(state_storage.namespace("access_tokens", 86400), AccessToken)
+            self._access_to_refresh = SharedDict(state_storage.namespace("access_to_refresh", 86400))
+            self._refresh_tokens = SharedDict(state_storage.namespace("refresh_tokens"), RefreshToken)
+            self._refresh_to_access = SharedDict(state_storage.namespace("refresh_to_access"))
         logger.info(
             "Initialized Spotify OAuth provider for client %s with scopes: %s",
             client_id,
@@ -131,6 +173,7 @@ auth = SpotifyProvider(
     #required_scopes=["user-read-email", "playlist-read-private"],
     required_scopes=["user-read-private", "user-top-read", "user-read-email", "user-library-read", "user-top-read", "playlist-read-private", "playlist-modify-public", "playlist-modify-private", "user-follow-read", "user-follow-modify", "streaming"],
     timeout_seconds=10,
+    state_storage=SQLiteStorage(SPOTIFY_OAUTH_STORAGE_PATH) if SPOTIFY_OAUTH_STORAGE_PATH else None,
 )
 
 #https://github.com/jlowin/fastmcp/issues/1627#issuecomment-3221502592
@@ -138,14 +181,38 @@ settings.experimental.enable_new_openapi_parser = True
 #https://github.com/jlowin/fastmcp/issues/1627#issuecomment-3221502592
 
 
-#load local file src/spotify-mcp-server/sonallux-spotify-open-api.yml  YAML file as a dict 
+class ResponsePruning(Middleware):
+    """Middleware that applies the response projections to the OpenAPI generated tools."""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        result = await call_next(context)
+        if result.structured_content is None:
+            return result
+        return ToolResult(structured_content=prune_response(context.message.name, result.structured_content))
+
+
+def drop_output_schema(route: HTTPRoute, component):
+    """Pruned payloads no longer match the upstream schema (e.g. required available_markets), so tools do not advertise it."""
+    if isinstance(component, OpenAPITool):
+        component.output_schema = None
+
+
+#load local file src/spotify-mcp-server/sonallux-spotify-open-api.yml  YAML file as a dict
+# with the libyaml based loader when it is available, several times faster on the 260 KB spec
 openapi_path = Path(__file__).parent / "sonallux-spotify-open-api.yml"
-with open(openapi_path, "r", encoding="utf-8") as f:
-    local_spec = yaml.safe_load(f)
+with open(openapi_path, "rb") as f:
+    local_spec = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
 
-mcp = FastMCP.from_openapi(openapi_spec=local_spec, 
-                           client=httpx.AsyncClient(base_url="https://api.spotify.com/v1"), 
-                           auth=auth)
+mcp = FastMCP.from_openapi(openapi_spec=local_spec,
+                           client=httpx.AsyncClient(base_url="https://api.spotify.com/v1",
+                                                    transport=RateLimitedTransport(spotify_rate_limiter),
+                                                    event_hooks={"response": [record_cache_control]}),
+                           auth=auth,
+                           mcp_component_fn=drop_output_schema)
+mcp.add_middleware(ToolProfiles())
+# Outside of the pruning, so the pruned results are cached
+mcp.add_middleware(spotify_response_cache())
+mcp.add_middleware(ResponsePruning())
 
 
 
@@ -154,5 +221,9 @@ async def get_token_info() -> dict:
     token = get_access_token()
     return { "token": token.token, "client_id": token.client_id, "scopes": token.scopes, "claims": token.claims }
 
+# ASGI app for several workers, e.g. `uvicorn mcp_server:app --workers 4` with SPOTIFY_OAUTH_STORAGE_PATH set.
+# Stateless, as the MCP sessions of a worker are not known by the others.
+app = mcp.http_app(stateless_http=True)
+
 if __name__ == "__main__":
     mcp.run(transport="http", port=MCP_SERVER_PORT, host=MCP_SERVER_HOST)  # Run the MCP server on port 9001
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""
+OAuth state storage shared by the processes of the Spotify MCP server.
+
+SpotifyProvider (mcp_server.py) keeps the registered MCP clients in a KVStorage, and the
+pending authorizations, authorization codes and tokens of the OAuth proxy in process
+dicts. With several uvicorn workers (or replicas sharing a volume), the Spotify callback
+or the token exchange may reach another process than the authorization request.
+
+`SQLiteStorage` stores JSON values in a SQLite file (WAL mode, so local processes share
+it safely), in namespaces with an optional TTL. It implements the FastMCP KVStorage
+protocol for the client registrations, backs `SharedDict`, the dict replacing the OAuth
+proxy state, and the verified token cache of `SpotifyTokenVerifier`. Another backend
+(e.g. Redis) only needs the same `namespace`/`read`/`write`/`remove`/`keys` methods.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator, MutableMapping
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger("spotify_mcp_server")
+
+
+class SQLiteStorage:
+    """Namespaced JSON key-value store with TTL on a SQLite file."""
+
+    def __init__(self, path: str, namespace: str = "clients", default_ttl: Optional[float] = None,
+                 _shared: Optional[tuple[sqlite3.Connection, threading.Lock]] = None):
+        self.path = path
+        self.namespace_name = namespace
+        self.default_ttl = default_ttl
+        if _shared is not None:
+            self._db, self._lock = _shared
+            return
+        if path != ":memory:" and not os.path.exists(path):
+            # Tokens are stored in clear, the file is only readable by the server user
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+        # Accessed from the event loop and worker threads, serialized by self._lock
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS oauth_state (namespace TEXT NOT NULL, key TEXT NOT NULL, "
+                "value TEXT NOT NULL, expires_at REAL, PRIMARY KEY (namespace, key))")
+            self._db.execute("DELETE FROM oauth_state WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    def namespace(self, name: str, default_ttl: Optional[float] = None) -> "SQLiteStorage":
+        """Return a view of another namespace of the same database."""
+        return SQLiteStorage(self.path, name, default_ttl, _shared=(self._db, self._lock))
+
+    def read(self, key: str) -> Any:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM oauth_state WHERE namespace = ? AND key = ?",
+                (self.namespace_name, key)).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return json.loads(row[0])
+
+    def write(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO oauth_state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace_name, key, json.dumps(value, default=str), expires_at))
+            self._db.commit()
+
+    def remove(self, key: str) -> bool:
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM oauth_state WHERE namespace = ? AND key = ?", (self.namespace_name, key))
+            self._db.commit()
+        return cursor.rowcount > 0
+
+    def keys(self) -> list[str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key FROM oauth_state WHERE namespace = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (self.namespace_name, time.time())).fetchall()
+        return [row[0] for row in rows]
+
+    # FastMCP KVStorage protocol (client registrations)
+
+    async def get(self, key: str) -> Optional[dict[str, Any]]:
+        return self.read(key)
+
+    async def set(self, key: str, value: dict[str, Any]) -> None:
+        self.write(key, value)
+
+    async def delete(self, key: str) -> None:
+        self.remove(key)
+
+
+class SharedDict(MutableMapping):
+    """Dict view of a storage namespace, values are JSON or pydantic models of the given type."""
+
+    def __init__(self, storage: SQLiteStorage, model: Optional[type[BaseModel]] = None):
+        self.storage = storage
+        self.model = model
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.storage.read(key)
+        if value is None:
+            raise KeyError(key)
+        return self.model.model_validate(value) if self.model else value
+
+    def __setitem__(self, key: str, value: Any):
+        self.storage.write(key, value.model_dump(mode="json") if isinstance(value, BaseModel) else value)
+
+    def __delitem__(self, key: str):
+        if not self.storage.remove(key):
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.storage.keys())
+
+    def __len__(self) -> int:
+        return len(self.storage.keys())
@@ -0,0 +1,191 @@
+"""
+Process wide rate limiter for the Spotify Web API.
+
+Every Spotify call of the server, the spotipy based tools (requests) as well as the
+OpenAPI generated tools (httpx), goes through the same limiter: requests are spread
+according to a rate and burst, queue instead of failing, and a 429 response blocks
+the whole process for the `Retry-After` delay before the call is retried. A 429 whose
+`Retry-After` is above `max_retry_after` is returned to the caller right away and does
+not block the other calls.
+The time spent queued is exported as an OpenTelemetry histogram.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import httpx
+import requests
+from opentelemetry import metrics, trace
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger("spotify_mcp_server")
+
+meter = metrics.get_meter("spotify_mcp_server")
+queue_wait_histogram = meter.create_histogram(
+    "spotify.ratelimit.queue_wait", unit="ms", description="Time Spotify calls waited in the rate limiter queue")
+throttled_counter = meter.create_counter(
+    "spotify.ratelimit.throttled", description="Spotify responses with status 429")
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """Return the Retry-After header value in seconds."""
+    try:
+        return max(float(value), 0.0) if value is not None else default
+    except ValueError:
+        return default
+
+
+class SpotifyRateLimiter:
+    """Rate limiter (GCRA) shared by every Spotify call of the process."""
+
+    def __init__(self, rate: float, burst: int, max_retries: int, max_retry_after: float):
+        self.interval = 1.0 / rate
+        self.tolerance = self.interval * (burst - 1)
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self._tat = 0.0  # theoretical arrival time of the next request
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserve the next request slot and return how long to wait for it, in seconds."""
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tat, now)
+            start = max(tat - self.tolerance, now, self._blocked_until)
+            self._tat = max(tat, start) + self.interval
+            return start - now
+
+    def blocked_for(self) -> float:
+        """Return how long the process is still blocked by a Retry-After, in seconds."""
+        return max(self._blocked_until - time.monotonic(), 0.0)
+
+    def throttle(self, retry_after: float):
+        """
+        Block every Spotify call of the process for retry_after seconds. Only for a 429 that
+        is retried: a longer delay would hold every caller (and the worker threads of the
+        spotipy calls) for up to the Retry-After.
+        """
+        with self._lock:
+            self._blocked_until = max(
+                self._blocked_until, time.monotonic() + retry_after)
+        logger.warning(
+            f"Spotify rate limit hit, calls paused for {retry_after}s")
+
+    def wait(self):
+        """
+        Wait for a request slot, blocking the calling thread. Only for spotipy calls, which
+        the tools run in worker threads (asyncio.to_thread), never on the event loop.
+        """
+        start = time.monotonic()
+        time.sleep(self.reserve())
+        # A 429 may have been received by another call while this one was queued
+        time.sleep(self.blocked_for())
+        self._record(time.monotonic() - start)
+
+    async def wait_async(self):
+        """Wait for a request slot without blocking the event loop."""
+        start = time.monotonic()
+        await asyncio.sleep(self.reserve())
+        await asyncio.sleep(self.blocked_for())
+        self._record(time.monotonic() - start)
+
+    def _record(self, waited: float):
+        waited_ms = waited * 1000
+        queue_wait_histogram.record(waited_ms)
+        if waited_ms >= 1:
+            trace.get_current_span().set_attribute(
+                "spotify.ratelimit.queue_wait_ms", round(waited_ms, 1))
+
+    def should_retry(self, attempt: int, retry_after: float) -> bool:
+        """Whether a call answered with 429 is queued again, or the 429 is returned to the caller."""
+        return attempt < self.max_retries and retry_after <= self.max_retry_after
+
+    def on_throttled(self, attempt: int, retry_after: float) -> bool:
+        """
+        Handle a 429: throttle the process and return True when the call is retried, return
+        False (the 429 goes back to the caller, nothing is blocked) otherwise.
+        """
+        throttled_counter.add(1)
+        if not self.should_retry(attempt, retry_after):
+            logger.warning(f"Spotify rate limit hit (Retry-After {retry_after}s), returned to the caller")
+            return False
+        self.throttle(retry_after)
+        return True
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """Requests transport adapter sending every spotipy call through the rate limiter."""
+
+    def __init__(self, limiter: SpotifyRateLimiter, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        attempt = 0
+        while True:
+            self.limiter.wait()
+            response = super().send(request, **kwargs)
+            if response.status_code != 429:
+                return response
+            retry_after = parse_retry_after(
+                response.headers.get("Retry-After"))
+            if not self.limiter.on_throttled(attempt, retry_after):
+                return response
+            response.close()
+            attempt += 1
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """HTTPX transport sending every OpenAPI tool call through the rate limiter."""
+
+    def __init__(self, limiter: SpotifyRateLimiter, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.limiter = limiter
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            await self.limiter.wait_async()
+            response = await self.transport.handle_async_request(request)
+            if response.status_code != 429:
+                return response
+            retry_after = parse_retry_after(
+                response.headers.get("Retry-After"))
+            if not self.limiter.on_throttled(attempt, retry_after):
+                return response
+            await response.aclose()
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+# The single limiter of the process
+spotify_rate_limiter = SpotifyRateLimiter(
+    rate=float(os.getenv("SPOTIFY_RATE_LIMIT_PER_SECOND", "10")),
+    burst=int(os.getenv("SPOTIFY_RATE_LIMIT_BURST", "20")),
+    max_retries=int(os.getenv("SPOTIFY_RATE_LIMIT_MAX_RETRIES", "5")),
+    # Longer Retry-After (Spotify may ban an app for hours) are returned instead of queued
+    max_retry_after=float(
+        os.getenv("SPOTIFY_RATE_LIMIT_MAX_RETRY_AFTER", "60")),
+)
+
+# Shared by the spotipy sessions, it also pools the connections to api.spotify.com.
+# 429 are handled by the limiter, server errors keep the spotipy retry policy.
+spotify_http_adapter = RateLimitedAdapter(spotify_rate_limiter, max_retries=Retry(
+    total=3, connect=None, read=False, status=3, backoff_factor=0.3, respect_retry_after_header=False,
+    allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+    status_forcelist=(500, 502, 503, 504)))
+
+
+def rate_limited_session() -> requests.Session:
+    """Return a requests session whose calls go through the process rate limiter."""
+    session = requests.Session()
+    session.mount("https://", spotify_http_adapter)
+    session.mount("http://", spotify_http_adapter)
+    return session
@@ -0,0 +1,220 @@
+"""
+Response cache for the OpenAPI generated Spotify tools of mcp_server.py.
+
+Results of the tools backed by a GET operation are cached per user (hash of the
+Spotify access token), tool name and arguments. Entries live for the TTL of their
+tool, capped by the Cache-Control max-age Spotify returns (catalog objects are
+public and cacheable, most user data is `max-age=0`). A call to a tool that modifies
+data (POST, PUT, DELETE) drops the cached results of its user.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+import httpx
+from fastmcp.server.dependencies import get_access_token
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from fastmcp.tools.tool import ToolResult
+from opentelemetry import trace
+
+logger = logging.getLogger("spotify_mcp_server")
+
+# Cache-Control headers of the API responses received during the current tool call
+_cache_control: ContextVar[Optional[list[str]]] = ContextVar(
+    "cache_control", default=None)
+
+
+async def record_cache_control(response: httpx.Response):
+    """httpx response hook passing the Cache-Control header of the API to the ResponseCache middleware."""
+    headers = _cache_control.get()
+    if headers is not None:
+        headers.append(response.headers.get("cache-control", ""))
+
+
+def parse_cache_control(headers: list[str]) -> Optional[float]:
+    """
+    Return the max TTL allowed by Cache-Control headers: 0 for no-store/no-cache,
+    max-age otherwise, None when the headers do not restrict caching.
+    """
+    ttl = None
+    for header in headers:
+        for directive in header.lower().split(","):
+            name, _, value = directive.strip().partition("=")
+            if name in ("no-store", "no-cache"):
+                return 0.0
+            if name == "max-age":
+                try:
+                    max_age = float(value.strip('"'))
+                except ValueError:
+                    continue
+                ttl = max_age if ttl is None else min(ttl, max_age)
+    return ttl
+
+
+def parse_ttls(value: str) -> dict[str, float]:
+    """Parse per tool TTLs given as 'tool=seconds,tool=seconds'."""
+    ttls = {}
+    for item in filter(None, (item.strip() for item in value.split(","))):
+        name, _, seconds = item.partition("=")
+        ttls[name.strip()] = float(seconds)
+    return ttls
+
+
+def spotify_user_key() -> Optional[str]:
+    """Short, non reversible key of the Spotify user of the current request (hash of its access token)."""
+    token = get_access_token()
+    if token is None:
+        return None
+    return hashlib.sha256(token.token.encode()).hexdigest()[:32]
+
+
+class ResponseCache(Middleware):
+    """
+    Middleware caching the results of the tools backed by a GET operation, by user,
+    tool name and arguments.
+
+    Entries live for the TTL of their tool, capped by the Cache-Control max-age of the
+    API response (no-store and no-cache responses are not cached). The cache is an LRU
+    bounded in entries and in approximate bytes.
+    """
+
+    def __init__(self, default_ttl: float = 60, ttls: Optional[dict[str, float]] = None,
+                 max_entries: int = 1000, max_bytes: int = 50_000_000,
+                 user_key: Callable[[], Optional[str]] = spotify_user_key):
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.user_key = user_key
+        # key -> (expires_at, size, result)
+        self._entries: OrderedDict[tuple, tuple[float, int, ToolResult]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._methods: dict[str, Optional[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def _method(self, context: MiddlewareContext, name: str) -> Optional[str]:
+        """HTTP method of the operation a tool is generated from (None for other tools), resolved once per tool."""
+        if name not in self._methods:
+            try:
+                tool = await context.fastmcp_context.fastmcp.get_tool(name)
+            except Exception:
+                return None
+            route = getattr(tool, "_route", None)
+            self._methods[name] = route.method.upper() if route is not None else None
+        return self._methods[name]
+
+    def ttl_for(self, tool_name: str) -> float:
+        return self.ttls.get(tool_name, self.default_ttl)
+
+    def get(self, key: tuple) -> Optional[ToolResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def put(self, key: tuple, result: ToolResult, ttl: float):
+        if result.structured_content is not None:
+            size = len(json.dumps(result.structured_content, default=str))
+        else:
+            size = sum(len(getattr(block, "text", "") or "") for block in result.content)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, size, result)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def invalidate_user(self, user: str):
+        """Drop the cached results of a user, after it modified its data."""
+        with self._lock:
+            for key in [key for key in self._entries if key[2] == user]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        tool_name = context.message.name
+        method = await self._method(context, tool_name)
+        user = self.user_key()
+        if method is None or user is None:
+            return await call_next(context)
+        if method != "GET":
+            result = await call_next(context)
+            self.invalidate_user(user)
+            return result
+        ttl = self.ttl_for(tool_name)
+        if ttl <= 0:
+            return await call_next(context)
+        span = trace.get_current_span()
+
+        key = (tool_name, json.dumps(context.message.arguments or {}, sort_keys=True, default=str), user)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            span.set_attribute("tool.cache", "hit")
+            logger.info(f"Tool call cache hit: {tool_name}")
+            return cached
+
+        self.misses += 1
+        span.set_attribute("tool.cache", "miss")
+        headers: list[str] = []
+        token = _cache_control.set(headers)
+        try:
+            result = await call_next(context)
+        finally:
+            _cache_control.reset(token)
+        max_age = parse_cache_control(headers)
+        if max_age is not None:
+            ttl = min(ttl, max_age)
+        if ttl > 0:
+            self.put(key, result, ttl)
+        return result
+
+
+# Catalog objects change rarely, playback state is never cached
+SPOTIFY_CACHE_TTLS = {
+    "get_an_artist": 3600, "get_multiple_artists": 3600, "get_an_artists_albums": 3600,
+    "get_an_artists_top_tracks": 3600, "get_an_artists_related_artists": 3600,
+    "get_an_album": 3600, "get_multiple_albums": 3600, "get_an_albums_tracks": 3600,
+    "get_track": 3600, "get_several_tracks": 3600, "get_recommendation_genres": 86400,
+    "get_available_markets": 86400, "search": 600,
+    "get_information_about_the_users_current_playback": 0, "get_the_users_currently_playing_track": 0,
+    "get_queue": 0, "get_a_users_available_devices": 0, "get_recently_played": 0,
+}
+
+
+def spotify_response_cache() -> ResponseCache:
+    """Return the response cache middleware configured from the environment."""
+    return ResponseCache(
+        default_ttl=float(os.getenv("SPOTIFY_CACHE_TTL", "60")),
+        ttls={**SPOTIFY_CACHE_TTLS, **parse_ttls(os.getenv("SPOTIFY_CACHE_TTLS", ""))},
+        max_entries=int(os.getenv("SPOTIFY_CACHE_MAX_ENTRIES", "1000")),
+        max_bytes=int(os.getenv("SPOTIFY_CACHE_MAX_BYTES", "50000000")),
+    )
@@ -0,0 +1,133 @@
+"""
+Declarative response projections for Spotify payloads.
+
+Spotify objects carry large fields the agent never uses (hundreds of
+`available_markets` codes per track and album, image lists, external ids...).
+Each tool gets a `Projection`, either an allow-list of the paths to keep or a list
+of paths to drop, applied to the payload before it is encoded and sent to the LLM.
+
+Paths are dot separated keys. Lists are traversed transparently, `*` matches any
+single key and `**` matches any depth, e.g. `**.available_markets` or
+`tracks.items.track.album.images`.
+"""
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass(frozen=True)
+class Projection:
+    """Fields kept (allow) or dropped (deny) from a tool response."""
+    allow: Optional[tuple[str, ...]] = None
+    deny: tuple[str, ...] = ()
+
+
+# Applied to every tool without a dedicated projection
+DEFAULT_PROJECTION = Projection(deny=("**.available_markets",))
+
+_TRACK_SUMMARY = ("id", "name", "uri", "duration_ms", "popularity", "explicit", "artists.name",
+                  "album.name", "album.release_date", "external_urls.spotify")
+_PLAYLIST_SUMMARY = ("id", "name", "uri", "description", "public", "collaborative",
+                     "owner.display_name", "tracks.total", "items.total", "external_urls.spotify")
+
+# Keyed by tool name: the spotipy based tools of spotify.py and the tools generated
+# from the OpenAPI operationIds in mcp_server.py
+TOOL_PROJECTIONS: dict[str, Projection] = {
+    "spotify_search_track": Projection(deny=("**.available_markets", "artists", "album.artists",
+                                             "album.images", "external_ids")),
+    "spotify_get_playlist": Projection(deny=("**.available_markets", "tracks.items.video_thumbnail",
+                                             "tracks.items.track.album.images", "tracks.items.track.external_ids",
+                                             "tracks.items.added_by")),
+    "spotify_get_artist_top_tracks": Projection(allow=_TRACK_SUMMARY),
+    "spotify_get_user_playlists": Projection(allow=_PLAYLIST_SUMMARY),
+    "spotify_search_artist": Projection(deny=("**.available_markets", "images")),
+    "get_an_artists_top_tracks": Projection(allow=tuple(f"tracks.{path}" for path in _TRACK_SUMMARY)),
+    "get_a_list_of_current_users_playlists": Projection(
+        allow=("href", "limit", "next", "offset", "previous", "total") + tuple(f"items.{path}" for path in _PLAYLIST_SUMMARY)),
+    "get_list_users_playlists": Projection(
+        allow=("href", "limit", "next", "offset", "previous", "total") + tuple(f"items.{path}" for path in _PLAYLIST_SUMMARY)),
+    "get_playlist": Projection(deny=("**.available_markets", "tracks.items.video_thumbnail",
+                                     "tracks.items.track.album.images", "tracks.items.track.external_ids",
+                                     "tracks.items.added_by")),
+    "get_playlists_tracks": Projection(deny=("**.available_markets", "items.video_thumbnail",
+                                             "items.track.album.images", "items.track.external_ids",
+                                             "items.added_by")),
+}
+
+Path = tuple[str, ...]
+
+
+def _compile(paths: tuple[str, ...]) -> list[Path]:
+    return [tuple(path.split(".")) for path in paths]
+
+
+def _advance(patterns: list[Path], key: str) -> tuple[bool, list[Path]]:
+    """
+    Match a key against the active patterns.
+    Returns whether a pattern ends on this key, and the patterns to apply to its value.
+    """
+    terminal = False
+    children: list[Path] = []
+    for pattern in patterns:
+        head, rest = pattern[0], pattern[1:]
+        if head == "**":
+            # '**' keeps applying deeper, and may also match nothing
+            children.append(pattern)
+            if rest and rest[0] in ("*", key):
+                if len(rest) == 1:
+                    terminal = True
+                else:
+                    children.append(rest[1:])
+        elif head in ("*", key):
+            if rest:
+                children.append(rest)
+            else:
+                terminal = True
+    return terminal, children
+
+
+def _deny(node: Any, patterns: list[Path]) -> Any:
+    if isinstance(node, list):
+        return [_deny(item, patterns) for item in node]
+    if not isinstance(node, dict):
+        return node
+    pruned = {}
+    for key, value in node.items():
+        terminal, children = _advance(patterns, key)
+        if terminal:
+            continue
+        pruned[key] = _deny(value, children) if children else value
+    return pruned
+
+
+def _allow(node: Any, patterns: list[Path]) -> Any:
+    if isinstance(node, list):
+        return [_allow(item, patterns) for item in node]
+    if not isinstance(node, dict):
+        return node
+    pruned = {}
+    for key, value in node.items():
+        terminal, children = _advance(patterns, key)
+        if terminal:
+            pruned[key] = value
+        elif children and isinstance(value, (dict, list)):
+            pruned[key] = _allow(value, children)
+    return pruned
+
+
+def apply_projection(payload: Any, projection: Projection) -> Any:
+    """Return a pruned copy of the payload, the payload itself is left untouched."""
+    if projection.allow is not None:
+        payload = _allow(payload, _compile(projection.allow))
+    if projection.deny:
+        payload = _deny(payload, _compile(projection.deny))
+    return payload
+
+
+def projection_for(tool_name: str) -> Projection:
+    """Return the projection configured for a tool, or the default one."""
+    return TOOL_PROJECTIONS.get(tool_name, DEFAULT_PROJECTION)
+
+
+def prune_response(tool_name: str, payload: Any) -> Any:
+    """Apply the projection configured for a tool to one of its responses."""
+    return apply_projection(payload, projection_for(tool_name))
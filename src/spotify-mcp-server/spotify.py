@@ -8,11 +8,12 @@ import json
 
 import spotipy
 import logging
+from pydantic import BaseModel
 
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
 from fastmcp.server.dependencies import get_http_request
 from fastmcp.server.middleware import Middleware, MiddlewareContext
 
@@ -20,6 +21,10 @@ from fastmcp.server.middleware import Middleware, MiddlewareContext
 
 from dotenv import load_dotenv
 from configuration import configure_telemetry, setup_logging, get_logger
+from track_cache import TrackResolution, cache_key, track_cache
+from track_matching import TrackCandidate, rank_tracks
+from response_pruning import prune_response
+from rate_limit import rate_limited_session
 
 load_dotenv()
 logger = get_logger()
@@ -27,6 +32,31 @@ setup_logging()  # Initialize logging configuration
 mcp = FastMCP("Spotify_MCP")
 configure_telemetry(mcp)
 
+# Spotify accepts at most 100 track URIs per "add items to playlist" call
+SPOTIFY_PLAYLIST_BATCH_SIZE = 100
+# Maximum number of track searches running at the same time in batch tools
+SPOTIFY_RESOLVE_CONCURRENCY = int(
+    os.getenv("SPOTIFY_RESOLVE_CONCURRENCY", "8"))
+# Number of search results ranked locally for each artist/title lookup
+SPOTIFY_SEARCH_CANDIDATES = int(os.getenv("SPOTIFY_SEARCH_CANDIDATES", "10"))
+# Matches scoring below this are returned but not cached
+SPOTIFY_MATCH_MIN_SCORE = float(os.getenv("SPOTIFY_MATCH_MIN_SCORE", "0.6"))
+# Number of alternates returned next to the best hit
+SPOTIFY_SEARCH_ALTERNATES = 3
+# Maximum number of result pages fetched at the same time
+SPOTIFY_PAGE_CONCURRENCY = int(os.getenv("SPOTIFY_PAGE_CONCURRENCY", "4"))
+# Page sizes are the maximum accepted by the Spotify API
+SPOTIFY_PLAYLIST_PAGE_SIZE = 100
+SPOTIFY_USER_PLAYLISTS_PAGE_SIZE = 50
+# Tracks returned by a single spotify_get_playlist call, larger playlists are cursor-paged
+SPOTIFY_PLAYLIST_MAX_TRACKS = 1000
+# Spotify 'fields' filters, so unused fields (available_markets...) are never downloaded
+SPOTIFY_PLAYLIST_TRACK_FIELDS = "added_at,track(id,name,uri,duration_ms,popularity,explicit,artists(id,name),album(id,name,release_date),external_urls)"
+SPOTIFY_PLAYLIST_ITEMS_FIELDS = f"total,items({SPOTIFY_PLAYLIST_TRACK_FIELDS})"
+SPOTIFY_PLAYLIST_META_FIELDS = "id,name,description,public,collaborative,uri,snapshot_id,external_urls,owner(id,display_name),followers(total),tracks(total)"
+SPOTIFY_PLAYLIST_FIELDS = SPOTIFY_PLAYLIST_META_FIELDS.replace(
+    "tracks(total)", f"tracks(total,items({SPOTIFY_PLAYLIST_TRACK_FIELDS}))")
+
 
 def my_span(name: str):
     """
@@ -114,7 +144,70 @@ def extract_access_token() -> str:
 
 def spotipy_instance() -> spotipy.Spotify:
     """ Get an instance of the Spotipy client with the current access token. """
-    return spotipy.Spotify(auth=extract_access_token())
+    # Calls go through the process wide Spotify rate limiter (queueing, Retry-After), which
+    # waits in the calling thread: spotipy calls always run in worker threads (asyncio.to_thread)
+    return spotipy.Spotify(auth=extract_access_token(), requests_session=rate_limited_session())
+
+
+class TrackQuery(BaseModel):
+    """An artist/title pair to look up in the Spotify catalog."""
+    artist: str
+    title: str
+
+
+def search_track_candidates(sp: spotipy.Spotify, artist: str, title: str, market: str | None = None,
+                            duration_ms: int | None = None, prefer_studio: bool = True) -> list[TrackCandidate]:
+    """
+    Search Spotify for an artist/title pair and rank a small candidate set locally.
+    Returns the candidates, best match first.
+    """
+    results = sp.search(q=f"{artist} {title}", type='track',
+                        limit=SPOTIFY_SEARCH_CANDIDATES, market=market)
+    if not results or 'tracks' not in results:
+        return []
+    items = results.get('tracks', {}).get('items', [])
+    return rank_tracks(artist, title, items, duration_ms=duration_ms, prefer_studio=prefer_studio)
+
+
+def resolve_track(sp: spotipy.Spotify, artist: str, title: str, market: str | None = None,
+                  duration_ms: int | None = None, prefer_studio: bool = True) -> tuple[TrackResolution | None, list[TrackCandidate]]:
+    """
+    Resolve an artist/title pair to a Spotify track.
+    The track resolution cache is checked first, so repeat resolutions cost no Spotify call.
+    Only confident matches are cached. The cache key keeps version markers, so "Song (Live)"
+    (where live versions are not penalized) and "Song" never share an entry.
+    Returns the resolution (None if nothing matches) and the ranked alternates (empty on a cache hit).
+    """
+    if prefer_studio:
+        resolution = track_cache.get(artist, title, market)
+        if resolution is not None:
+            logger.info(
+                f"Track cache hit for {artist} - {title}: {resolution.uri}")
+            return resolution, []
+    candidates = search_track_candidates(
+        sp, artist, title, market=market, duration_ms=duration_ms, prefer_studio=prefer_studio)
+    if not candidates:
+        return None, []
+    best, alternates = candidates[0], candidates[1:]
+    resolution = TrackResolution(uri=best.track["uri"], score=best.score,
+                                 market=market, track=best.track)
+    if prefer_studio and best.score >= SPOTIFY_MATCH_MIN_SCORE:
+        track_cache.put(artist, title, resolution)
+    return resolution, alternates
+
+
+async def fetch_pages(fetch_page, offsets) -> list[dict]:
+    """
+    Fetch result pages concurrently with a synchronous spotipy call taking the page offset.
+    Returns the pages in offset order.
+    """
+    semaphore = asyncio.Semaphore(SPOTIFY_PAGE_CONCURRENCY)
+
+    async def fetch(offset: int) -> dict:
+        async with semaphore:
+            return await asyncio.to_thread(fetch_page, offset)
+
+    return await asyncio.gather(*(fetch(offset) for offset in offsets))
 
 
 """
@@ -147,13 +240,14 @@ async def spotify_create_playlist(name: str, public: bool = True, description: s
     current_span.set_attribute("playlist.name", name)
     current_span.set_attribute("playlist.public", public)
     try:
-        user = spotipy_instance().me()
+        sp = spotipy_instance()
+        user = await asyncio.to_thread(sp.me)
         if not user or "id" not in user:
             logger.error("User not authenticated or user ID not found.")
             return "Error: User not authenticated or user ID not found."
-        playlist = spotipy_instance().user_playlist_create(
-            user["id"], name, public=public, description=description)
-        response = json.dumps(playlist, indent=2)
+        playlist = await asyncio.to_thread(
+            sp.user_playlist_create, user["id"], name, public=public, description=description)
+        response = json.dumps(prune_response("spotify_create_playlist", playlist), indent=2)
         logger.info(f"Playlist created successfully: {response}")
         return response
     except Exception as e:
@@ -177,8 +271,8 @@ async def spotify_add_track_to_playlist(playlist_id: str, track_uri: str) -> str
     current_span.set_attribute("playlist.id", playlist_id)
     current_span.set_attribute("track.uri", track_uri)
     try:
-        result = spotipy_instance().playlist_add_items(
-            playlist_id, [track_uri])
+        result = await asyncio.to_thread(
+            spotipy_instance().playlist_add_items, playlist_id, [track_uri])
         response = json.dumps(result, indent=2)
         logger.info(f"Track added successfully: {response}")
         return response
@@ -203,8 +297,8 @@ async def spotify_remove_track_from_playlist(playlist_id: str, track_uri: str) -
     current_span.set_attribute("playlist.id", playlist_id)
     current_span.set_attribute("track.uri", track_uri)
     try:
-        result = spotipy_instance().playlist_remove_all_occurrences_of_items(
-            playlist_id, [track_uri])
+        result = await asyncio.to_thread(
+            spotipy_instance().playlist_remove_all_occurrences_of_items, playlist_id, [track_uri])
         response = json.dumps(result, indent=2)
         logger.info(f"Track removed successfully: {response}")
         return response
@@ -227,7 +321,8 @@ async def spotify_delete_playlist(playlist_id: str) -> str:
     current_span = trace.get_current_span()
     current_span.set_attribute("playlist.id", playlist_id)
     try:
-        result = spotipy_instance().current_user_unfollow_playlist(playlist_id)
+        result = await asyncio.to_thread(
+            spotipy_instance().current_user_unfollow_playlist, playlist_id)
         return json.dumps({"message": "Playlist deleted (unfollowed)", "result": result}, indent=2)
     except Exception as e:
         logger.error(f"Error deleting playlist: {e}")
@@ -236,34 +331,49 @@ async def spotify_delete_playlist(playlist_id: str) -> str:
 
 @mcp.tool()
 @my_span("spotify_mcp_get_playlist")
-async def spotify_get_playlist(playlist_id: str) -> str:
+async def spotify_get_playlist(playlist_id: str, cursor: int = 0) -> str:
     """
-    Get details about a specific playlist.
+    Get details about a specific playlist, including its tracks.
+    Large playlists are returned in pages of up to 1000 tracks: when "next_cursor" is
+    set in the response, call again with that cursor to get the following tracks.
     Args:
         playlist_id (str): The Spotify playlist ID.
+        cursor (int): Index of the first track to return. Defaults to 0.
     Returns:
         str: The playlist details as JSON, or an error message.
     """
-    logger.info(f"Getting playlist details for {playlist_id}")
+    logger.info(f"Getting playlist details for {playlist_id} from {cursor}")
     current_span = trace.get_current_span()
     current_span.set_attribute("playlist.id", playlist_id)
+    current_span.set_attribute("playlist.cursor", cursor)
     try:
-        playlist = spotipy_instance().playlist(playlist_id)
+        sp = spotipy_instance()
+        # Only request the fields we return, the first page of tracks comes with the playlist
+        playlist = await asyncio.to_thread(
+            sp.playlist, playlist_id, fields=SPOTIFY_PLAYLIST_FIELDS if cursor == 0 else SPOTIFY_PLAYLIST_META_FIELDS)
         if not playlist:
             return f"Playlist with ID {playlist_id} not found."
-        # Remove 'available_markets' fields from playlist and tracks to reduce payload size
-        if 'tracks' in playlist and 'items' in playlist['tracks']:
-            for item in playlist['tracks']['items']:
-                track = item.get('track')
-                if track and 'available_markets' in track:
-                    track['available_markets'] = None
-                if track and 'album' in track and 'available_markets' in track['album']:
-                    track['album']['available_markets'] = None
-        if 'available_markets' in playlist:
-            playlist['available_markets'] = None
-        if 'album' in playlist and 'available_markets' in playlist['album']:
-            playlist['album']['available_markets'] = None
-        response = json.dumps(playlist, indent=2)
+        tracks = playlist.get("tracks") or {}
+        total = tracks.get("total", 0)
+        items = tracks.get("items", []) if cursor == 0 else []
+        end = min(total, cursor + SPOTIFY_PLAYLIST_MAX_TRACKS)
+        pages = await fetch_pages(
+            lambda offset: sp.playlist_items(playlist_id, fields=SPOTIFY_PLAYLIST_ITEMS_FIELDS,
+                                             limit=SPOTIFY_PLAYLIST_PAGE_SIZE, offset=offset),
+            range(cursor + len(items), end, SPOTIFY_PLAYLIST_PAGE_SIZE))
+        for page in pages:
+            items.extend((page or {}).get("items", []))
+        playlist["tracks"] = {
+            "total": total,
+            "offset": cursor,
+            "items": items[:end - cursor],
+            "next_cursor": end if end < total else None,
+        }
+        current_span.set_attribute("playlist.total_tracks", total)
+        current_span.set_attribute("playlist.pages", len(pages) + 1)
+        # Drop 'available_markets' and other unused fields to reduce payload size
+        response = json.dumps(prune_response(
+            "spotify_get_playlist", playlist), indent=2)
         # Log first 100 chars for brevity
         logger.info(
             f"Retrieved playlist details successfully: {response[:100]}...")
@@ -273,6 +383,133 @@ async def spotify_get_playlist(playlist_id: str) -> str:
         return f"Error getting playlist details: {str(e)}"
 
 
+@mcp.tool()
+@my_span("spotify_mcp_build_playlist")
+async def spotify_build_playlist(name: str, tracks: list[TrackQuery], public: bool = True, description: str = "", ctx: Context | None = None) -> str:
+    """
+    Create a playlist and fill it from a list of artist/title pairs in a single call.
+    Tracks are searched concurrently (a pair listed twice is searched once), the playlist
+    is created, then the matches are added in batches, each track once. Progress is
+    reported while the pipeline runs.
+    Args:
+        name (str): The name of the playlist.
+        tracks (list): The tracks to add, each as {"artist": ..., "title": ...}, in playlist order.
+        public (bool): Whether the playlist is public. Defaults to True.
+        description (str): Playlist description. Defaults to empty.
+    Returns:
+        str: A summary of the created playlist (id, url, added, unresolved, duplicate and failed tracks) as JSON, or an error message.
+    """
+    logger.info(f"Building playlist: {name} from {len(tracks)} tracks")
+    current_span = trace.get_current_span()
+    current_span.set_attribute("playlist.name", name)
+    current_span.set_attribute("playlist.public", public)
+    current_span.set_attribute("playlist.requested_tracks", len(tracks))
+
+    # identical artist/title pairs (a song played twice in a show) are resolved once
+    keys = [cache_key(query.artist, query.title) for query in tracks]
+    queries: dict[str, TrackQuery] = {}
+    for key, query in zip(keys, tracks):
+        queries.setdefault(key, query)
+
+    batches = (len(queries) + SPOTIFY_PLAYLIST_BATCH_SIZE -
+               1) // SPOTIFY_PLAYLIST_BATCH_SIZE
+    # one step per searched track, one for the creation, one per added batch
+    total_steps = len(queries) + 1 + batches
+    completed_steps = 0
+
+    async def report_progress(message: str):
+        nonlocal completed_steps
+        completed_steps += 1
+        if ctx is not None:
+            await ctx.report_progress(progress=completed_steps, total=total_steps, message=message)
+
+    try:
+        sp = spotipy_instance()
+        semaphore = asyncio.Semaphore(SPOTIFY_RESOLVE_CONCURRENCY)
+
+        async def resolve_one(query: TrackQuery) -> TrackResolution | None:
+            async with semaphore:
+                try:
+                    item, _ = await asyncio.to_thread(resolve_track, sp, query.artist, query.title)
+                except Exception as e:
+                    logger.error(
+                        f"Error searching track {query.artist} - {query.title}: {e}")
+                    item = None
+            await report_progress(f"Searched {query.artist} - {query.title}")
+            return item
+
+        user, *resolutions = await asyncio.gather(
+            asyncio.to_thread(sp.me), *(resolve_one(query) for query in queries.values()))
+        if not user or "id" not in user:
+            logger.error("User not authenticated or user ID not found.")
+            return "Error: User not authenticated or user ID not found."
+        resolved = dict(zip(queries, resolutions))
+
+        playlist = await asyncio.to_thread(
+            sp.user_playlist_create, user["id"], name, public=public, description=description)
+        await report_progress(f"Created playlist {name}")
+
+        matched = []
+        unresolved = []
+        duplicates = []
+        uris = set()
+        for key, query in zip(keys, tracks):
+            item = resolved[key]
+            if item is None:
+                unresolved.append(query.model_dump())
+            elif item.uri in uris:
+                duplicates.append(
+                    {"artist": query.artist, "title": query.title, "uri": item.uri})
+            else:
+                uris.add(item.uri)
+                matched.append({"artist": query.artist, "title": query.title,
+                                "name": item.track.get("name"), "uri": item.uri, "score": item.score})
+
+        # a failed batch does not lose the playlist nor the other batches
+        added = []
+        failed = []
+        for start in range(0, len(matched), SPOTIFY_PLAYLIST_BATCH_SIZE):
+            batch = matched[start:start + SPOTIFY_PLAYLIST_BATCH_SIZE]
+            try:
+                await asyncio.to_thread(sp.playlist_add_items, playlist["id"],
+                                        [track["uri"] for track in batch])
+                added.extend(batch)
+            except Exception as e:
+                logger.error(
+                    f"Error adding tracks {start}-{start + len(batch)} to playlist {playlist['id']}: {e}")
+                failed.extend({**track, "error": str(e)} for track in batch)
+            await report_progress(
+                f"Added {min(start + SPOTIFY_PLAYLIST_BATCH_SIZE, len(matched))}/{len(matched)} tracks")
+        # batches skipped because some tracks were not found still count as done
+        if ctx is not None and completed_steps < total_steps:
+            await ctx.report_progress(progress=total_steps, total=total_steps, message="Playlist built")
+
+        current_span.set_attribute("playlist.id", playlist["id"])
+        current_span.set_attribute("playlist.added_tracks", len(added))
+        current_span.set_attribute(
+            "playlist.unresolved_tracks", len(unresolved))
+        current_span.set_attribute(
+            "playlist.duplicate_tracks", len(duplicates))
+        current_span.set_attribute("playlist.failed_tracks", len(failed))
+        response = json.dumps({
+            "id": playlist["id"],
+            "name": playlist.get("name"),
+            "uri": playlist.get("uri"),
+            "url": playlist.get("external_urls", {}).get("spotify"),
+            "added": added,
+            "unresolved": unresolved,
+            "duplicates": duplicates,
+            "failed": failed,
+        }, indent=2)
+        logger.info(
+            f"Playlist built: {len(added)} added, {len(unresolved)} unresolved, "
+            f"{len(duplicates)} duplicates, {len(failed)} failed")
+        return response
+    except Exception as e:
+        logger.error(f"Error building playlist: {e}")
+        return f"Error building playlist: {str(e)}"
+
+
 @mcp.custom_route("/liveness", methods=["GET"])
 async def liveness(request: Request) -> JSONResponse:
     logger.info("Liveness check called")
@@ -287,18 +524,22 @@ async def readiness(request: Request) -> JSONResponse:
 
 @mcp.tool()
 @my_span("spotify_mcp_search_track")
-def spotify_search_track(artist: str, track: str) -> str:
+async def spotify_search_track(artist: str, track: str, duration_ms: int | None = None, prefer_studio: bool = True) -> str:
     """
     Search for a track on Spotify by artist and track name.
-    Returns a formatted string with the top result.
+    A small candidate set is ranked locally (title similarity, artist match, duration,
+    studio versions over live/karaoke/cover versions) and the best hit is returned
+    with a few alternates, so retrying with a new query is rarely needed.
     If no track is found or an error occurs, returns an error message.
 
     Args:
         artist (str): The artist name.
         track (str): The track name.
+        duration_ms (int, optional): Expected track duration in milliseconds, used to break ties.
+        prefer_studio (bool, optional): Prefer studio versions over live, karaoke or cover versions. Defaults to True.
 
     Returns:
-        str: A formatted string with the top search result, or an error message if no track is found or an error occurs.
+        str: JSON with the best match ("best", including its "score") and ranked "alternates", or an error message if no track is found or an error occurs.
     """
     query = f"{artist} {track}"
     logger.info(f"Searching for track: {query}")
@@ -307,22 +548,26 @@ def spotify_search_track(artist: str, track: str) -> str:
     current_span.set_attribute("track.name", track)
     current_span.set_attribute("track.query", query)
     try:
-        results = spotipy_instance().search(q=query, type='track', limit=1)
-        if not results or 'tracks' not in results:
-            return f"{'message': 'No results found for query: {query}'}"
-        items = results.get('tracks', {}).get('items', [])
-        if not items:
-            return f"{'message': 'No track found for query: {query}'}"
-        track_item = items[0]
-        if not track_item:
-            return f"{'message': 'No track found for query: {query}'}"
-        # Remove available_markets to avoid large data transfer
-        track_item['available_markets'] = None
-        track_item['artists'] = None
-        if 'album' in track_item:
-            track_item['album']['available_markets'] = None
-            track_item['album']['artists'] = None
-        response = json.dumps(track_item, indent=2)
+        resolution, alternates = await asyncio.to_thread(
+            resolve_track, spotipy_instance(), artist, track, duration_ms=duration_ms, prefer_studio=prefer_studio)
+        if resolution is None:
+            return json.dumps({"message": f"No track found for query: {query}"})
+        current_span.set_attribute("track.uri", resolution.uri)
+        current_span.set_attribute("track.score", resolution.score)
+        # Drop available_markets to avoid large data transfer (pruning copies, the cached item stays intact)
+        track_item = prune_response("spotify_search_track", resolution.track)
+        track_item['score'] = resolution.score
+        response = json.dumps({
+            "best": track_item,
+            "alternates": [{
+                "name": candidate.track.get("name"),
+                "artists": [a.get("name") for a in candidate.track.get("artists") or []],
+                "album": (candidate.track.get("album") or {}).get("name"),
+                "duration_ms": candidate.track.get("duration_ms"),
+                "uri": candidate.track.get("uri"),
+                "score": candidate.score,
+            } for candidate in alternates[:SPOTIFY_SEARCH_ALTERNATES]],
+        }, indent=2)
         logger.info(f"Found track: {response}")
         return response
     except Exception as e:
@@ -332,7 +577,7 @@ def spotify_search_track(artist: str, track: str) -> str:
 
 @mcp.tool()
 @my_span("spotify_mcp_search_artist")
-def spotify_search_artist(query: str) -> str:
+async def spotify_search_artist(query: str) -> str:
     """
     Search for an artist on Spotify by query string.
     Returns a formatted string with the top result.
@@ -349,14 +594,16 @@ def spotify_search_artist(query: str) -> str:
     current_span.set_attribute("artist.query", query)
 
     try:
-        results = spotipy_instance().search(q=query, type='artist', limit=1)
+        results = await asyncio.to_thread(
+            spotipy_instance().search, q=query, type='artist', limit=1)
         if not results or 'artists' not in results:
             return f"{'message': 'No results found for query: {query}'}"
         items = results.get('artists', {}).get('items', [])
         if not items:
             return f"{'message': 'No artist found for query: {query}'}"
         artist = items[0]
-        response = json.dumps(artist, indent=2)
+        response = json.dumps(prune_response(
+            "spotify_search_artist", artist), indent=2)
         logger.info(f"Found artist: {response}")
         return response
     except Exception as e:
@@ -366,7 +613,7 @@ def spotify_search_artist(query: str) -> str:
 
 @mcp.tool()
 @my_span("spotify_mcp_get_artist_top_tracks")
-def spotify_get_artist_top_tracks(artist_id: str, country: str = "US") -> str:
+async def spotify_get_artist_top_tracks(artist_id: str, country: str = "US") -> str:
     """
     Get the top tracks for an artist by Spotify artist ID.
 
@@ -382,13 +629,14 @@ def spotify_get_artist_top_tracks(artist_id: str, country: str = "US") -> str:
     current_span.set_attribute("artist.id", artist_id)
     current_span.set_attribute("artist.country", country)
     try:
-        results = spotipy_instance().artist_top_tracks(artist_id, country=country)
+        results = await asyncio.to_thread(
+            spotipy_instance().artist_top_tracks, artist_id, country=country)
         if not results or 'tracks' not in results:
             return f"{'message': 'No top tracks found for artist: {artist_id}'}"
         tracks = results.get('tracks', [])
         if not tracks:
             return f"{'message': 'No top tracks found for artist: {artist_id}'}"
-        return json.dumps(tracks, indent=2)
+        return json.dumps(prune_response("spotify_get_artist_top_tracks", tracks), indent=2)
     except Exception as e:
         logger.error(f"Error fetching top tracks: {e}")
         return f"Error fetching top tracks: {str(e)}"
@@ -404,12 +652,21 @@ async def spotify_get_user_playlists() -> str:
     """
     logger.info(f"Fetching playlists for current authenticated user")
     try:
-        playlists_response = spotipy_instance().current_user_playlists()
+        sp = spotipy_instance()
+        playlists_response = await asyncio.to_thread(
+            sp.current_user_playlists, limit=SPOTIFY_USER_PLAYLISTS_PAGE_SIZE)
         if playlists_response and isinstance(playlists_response, dict):
             playlists = playlists_response.get('items', [])
+            # Fetch the remaining pages concurrently
+            pages = await fetch_pages(
+                lambda offset: sp.current_user_playlists(
+                    limit=SPOTIFY_USER_PLAYLISTS_PAGE_SIZE, offset=offset),
+                range(len(playlists), playlists_response.get('total', 0), SPOTIFY_USER_PLAYLISTS_PAGE_SIZE))
+            for page in pages:
+                playlists.extend((page or {}).get('items', []))
         else:
             playlists = []
-        return json.dumps(playlists, indent=2)
+        return json.dumps(prune_response("spotify_get_user_playlists", playlists), indent=2)
     except Exception as e:
         return f"Error fetching user playlists: {str(e)}"
 
@@ -424,7 +681,7 @@ async def spotify_get_user_profile() -> str:
     """
     logger.info(f"Fetching the authenticated user profile")
     try:
-        user_profile = spotipy_instance().me()
+        user_profile = await asyncio.to_thread(spotipy_instance().me)
         return json.dumps(user_profile, indent=2)
     except Exception as e:
         return f"Error fetching user profile: {str(e)}"
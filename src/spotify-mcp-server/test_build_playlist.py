@@ -0,0 +1,92 @@
+"""
+Tests for the spotify_build_playlist pipeline tool, against a fake spotipy client.
+"""
+import json
+
+import pytest
+
+import spotify
+from spotify import TrackQuery
+from track_cache import TrackCache
+
+
+class FakeSpotify:
+    """Spotipy client answering searches from a catalog of (artist, title) -> track."""
+
+    def __init__(self, catalog: dict[tuple[str, str], dict], failing_batches: tuple[int, ...] = ()):
+        self.catalog = {f"{artist} {title}": track for (artist, title), track in catalog.items()}
+        self.failing_batches = failing_batches
+        self.searches: list[str] = []
+        self.batches: list[list[str]] = []
+
+    def search(self, q, type, limit, market=None):
+        self.searches.append(q)
+        track = self.catalog.get(q)
+        return {"tracks": {"items": [track] if track else []}}
+
+    def me(self):
+        return {"id": "user_1"}
+
+    def user_playlist_create(self, user, name, public=True, description=""):
+        return {"id": "playlist_1", "name": name, "uri": "spotify:playlist:playlist_1",
+                "external_urls": {"spotify": "https://open.spotify.com/playlist/playlist_1"}}
+
+    def playlist_add_items(self, playlist_id, uris):
+        self.batches.append(uris)
+        if len(self.batches) in self.failing_batches:
+            raise RuntimeError("Spotify error 502")
+
+
+def track(artist: str, title: str, uri: str = None) -> dict:
+    return {"name": title, "uri": uri or f"spotify:track:{artist}-{title}".replace(" ", ""),
+            "artists": [{"name": artist}], "album": {"name": "Album"}, "duration_ms": 200000, "popularity": 50}
+
+
+@pytest.fixture(autouse=True)
+def empty_track_cache(monkeypatch):
+    monkeypatch.setattr(spotify, "track_cache", TrackCache())
+
+
+async def build(monkeypatch, sp: FakeSpotify, tracks: list[tuple[str, str]]) -> dict:
+    monkeypatch.setattr(spotify, "spotipy_instance", lambda: sp)
+    result = await spotify.spotify_build_playlist.fn(
+        name="Oasis live", tracks=[TrackQuery(artist=artist, title=title) for artist, title in tracks])
+    return json.loads(result)
+
+
+@pytest.mark.asyncio
+async def test_matched_unmatched_and_duplicate_tracks(monkeypatch):
+    wonderwall = track("Oasis", "Wonderwall")
+    sp = FakeSpotify({
+        ("Oasis", "Wonderwall"): wonderwall,
+        ("Oasis", "Champagne Supernova"): track("Oasis", "Champagne Supernova"),
+        # another title resolving to the same recording
+        ("Oasis", "Wonderwall (Remastered)"): wonderwall,
+    })
+    summary = await build(monkeypatch, sp, [
+        ("Oasis", "Wonderwall"), ("Oasis", "Champagne Supernova"), ("Oasis", "Some Might Say"),
+        ("Oasis", "Wonderwall"), ("Oasis", "Wonderwall (Remastered)")])
+
+    assert [t["title"] for t in summary["added"]] == ["Wonderwall", "Champagne Supernova"]
+    assert summary["unresolved"] == [{"artist": "Oasis", "title": "Some Might Say"}]
+    assert [(t["title"], t["uri"]) for t in summary["duplicates"]] == [
+        ("Wonderwall", wonderwall["uri"]), ("Wonderwall (Remastered)", wonderwall["uri"])]
+    assert summary["failed"] == []
+    # the pair listed twice is searched once, the playlist gets each recording once
+    assert sp.searches.count("Oasis Wonderwall") == 1
+    assert sp.batches == [[wonderwall["uri"], track("Oasis", "Champagne Supernova")["uri"]]]
+    assert summary["url"] == "https://open.spotify.com/playlist/playlist_1"
+
+
+@pytest.mark.asyncio
+async def test_adds_are_chunked_and_a_failed_batch_is_reported(monkeypatch):
+    pairs = [("Band", f"Song {i}") for i in range(250)]
+    sp = FakeSpotify({pair: track(*pair) for pair in pairs}, failing_batches=(2,))
+    summary = await build(monkeypatch, sp, pairs)
+
+    assert [len(batch) for batch in sp.batches] == [100, 100, 50]
+    # tracks keep the requested order across batches
+    assert [uri for batch in sp.batches for uri in batch] == [track(*pair)["uri"] for pair in pairs]
+    assert len(summary["added"]) == 150 and len(summary["failed"]) == 100
+    assert summary["failed"][0]["title"] == "Song 100"
+    assert summary["failed"][0]["error"] == "Spotify error 502"
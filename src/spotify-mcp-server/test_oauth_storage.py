@@ -0,0 +1,70 @@
+"""
+Tests of the OAuth state shared by the workers of the Spotify MCP server.
+"""
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("fastmcp")
+
+from fastmcp.server.auth.auth import AccessToken
+
+from oauth_storage import SharedDict, SQLiteStorage
+
+
+def test_storage_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "oauth.db")
+    worker_a, worker_b = SQLiteStorage(path), SQLiteStorage(path)
+
+    asyncio.run(worker_a.set("client", {"client": {"client_id": "client"}}))
+    assert asyncio.run(worker_b.get("client")) == {"client": {"client_id": "client"}}
+    # namespaces are isolated
+    assert worker_b.namespace("transactions").read("client") is None
+    asyncio.run(worker_b.delete("client"))
+    assert asyncio.run(worker_a.get("client")) is None
+
+
+def test_entries_expire(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "oauth.db"), "client_codes", default_ttl=0.05)
+    storage.write("code", {"client_id": "client"})
+    assert storage.keys() == ["code"]
+    time.sleep(0.1)
+    assert storage.read("code") is None
+    assert storage.keys() == []
+
+
+def test_shared_dict_with_models(tmp_path):
+    path = str(tmp_path / "oauth.db")
+    tokens_a = SharedDict(SQLiteStorage(path).namespace("access_tokens"), AccessToken)
+    tokens_b = SharedDict(SQLiteStorage(path).namespace("access_tokens"), AccessToken)
+
+    tokens_a["token"] = AccessToken(token="token", client_id="client", scopes=["user-read-email"])
+    assert tokens_b.get("token") == AccessToken(token="token", client_id="client", scopes=["user-read-email"])
+    assert tokens_b.pop("token").client_id == "client"
+    assert tokens_a.get("token") is None and len(tokens_a) == 0
+
+
+def test_oauth_flow_state_and_verified_tokens_are_shared(tmp_path, monkeypatch):
+    import mcp_server
+
+    path = str(tmp_path / "oauth.db")
+    provider_a, provider_b = (mcp_server.SpotifyProvider(
+        client_id="id", client_secret="secret", base_url="http://localhost:9001", redirect_path="/auth/callback",
+        state_storage=SQLiteStorage(path)) for _ in range(2))
+
+    # the authorization starts on a worker, the Spotify callback reaches another one
+    provider_a._oauth_transactions["txn"] = {"client_id": "client", "client_state": "state"}
+    assert provider_b._oauth_transactions.get("txn")["client_state"] == "state"
+
+    calls = []
+
+    async def verify_with_spotify(token):
+        calls.append(token)
+        return AccessToken(token=token, client_id="user", scopes=["user-read-email"])
+
+    for provider in (provider_a, provider_b):
+        monkeypatch.setattr(provider._token_validator, "_verify_with_spotify", verify_with_spotify)
+    assert asyncio.run(provider_a.load_access_token("token")).client_id == "user"
+    assert asyncio.run(provider_b.load_access_token("token")).client_id == "user"
+    assert calls == ["token"]
@@ -0,0 +1,154 @@
+"""
+Tests for the process wide Spotify rate limiter.
+"""
+import asyncio
+import io
+import time
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limit import RateLimitedAdapter, RateLimitedTransport, SpotifyRateLimiter
+
+
+def make_limiter(rate=100.0, burst=5, max_retries=3, max_retry_after=5.0):
+    return SpotifyRateLimiter(rate=rate, burst=burst, max_retries=max_retries, max_retry_after=max_retry_after)
+
+
+def test_burst_then_rate():
+    limiter = make_limiter(rate=10, burst=3)
+    delays = [limiter.reserve() for _ in range(5)]
+    assert delays[:3] == [0, 0, 0]
+    assert 0.05 < delays[3] <= 0.1
+    assert 0.15 < delays[4] <= 0.2
+
+
+def test_retry_after_blocks_every_call():
+    limiter = make_limiter()
+    limiter.throttle(0.5)
+    assert 0.4 < limiter.reserve() <= 0.5
+    assert 0.4 < limiter.blocked_for() <= 0.5
+
+
+def test_httpx_transport_queues_on_429():
+    calls = []
+
+    def handler(request):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.2"})
+        return httpx.Response(200, json={"ok": True})
+
+    async def call():
+        transport = RateLimitedTransport(
+            make_limiter(), httpx.MockTransport(handler))
+        async with httpx.AsyncClient(transport=transport, base_url="https://api.spotify.com/v1") as client:
+            return await client.get("/me")
+
+    response = asyncio.run(call())
+    assert response.status_code == 200
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.2
+
+
+def test_long_retry_after_is_returned_to_the_caller():
+    def handler(request):
+        return httpx.Response(429, headers={"Retry-After": "3600"})
+
+    async def call():
+        transport = RateLimitedTransport(
+            make_limiter(), httpx.MockTransport(handler))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get("https://api.spotify.com/v1/me")
+
+    assert asyncio.run(call()).status_code == 429
+
+
+def test_long_retry_after_does_not_block_the_next_calls(monkeypatch):
+    statuses = [429, 200]
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = statuses.pop(0)
+        response.raw = io.BytesIO(b"")
+        response.headers["Retry-After"] = "3600"
+        return response
+
+    monkeypatch.setattr(HTTPAdapter, "send", send)
+    limiter = make_limiter()
+    session = requests.Session()
+    session.mount("https://", RateLimitedAdapter(limiter))
+    assert session.get("https://api.spotify.com/v1/me").status_code == 429
+    assert limiter.blocked_for() == 0
+
+    start = time.monotonic()
+    assert session.get("https://api.spotify.com/v1/me").status_code == 200
+    assert time.monotonic() - start < 0.1
+
+
+def test_requests_adapter_queues_on_429(monkeypatch):
+    statuses = [429, 429, 200]
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = statuses.pop(0)
+        response.raw = io.BytesIO(b"")
+        response.headers["Retry-After"] = "0.1"
+        return response
+
+    monkeypatch.setattr(HTTPAdapter, "send", send)
+    session = requests.Session()
+    session.mount("https://", RateLimitedAdapter(make_limiter()))
+    start = time.monotonic()
+    assert session.get("https://api.spotify.com/v1/me").status_code == 200
+    assert time.monotonic() - start >= 0.2
+
+
+def test_throttled_tool_call_does_not_stall_the_server(monkeypatch):
+    """A spotipy call waiting for a Retry-After blocks its worker thread, not the event loop."""
+    import json
+
+    import spotipy
+    from fastmcp import Client
+
+    import spotify
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        if "throttled" in request.url and not getattr(self, "throttled_once", False):
+            self.throttled_once = True
+            response.status_code = 429
+            response.headers["Retry-After"] = "0.5"
+            response._content = b"{}"
+        else:
+            response.status_code = 200
+            response._content = json.dumps(
+                {"artists": {"items": [{"id": "1", "name": "Oasis"}]}}).encode()
+        response.raw = io.BytesIO(b"")
+        return response
+
+    monkeypatch.setattr(HTTPAdapter, "send", send)
+    # one limiter per tool call, so that only the first one is paused by the Retry-After
+    def spotipy_instance():
+        session = requests.Session()
+        session.mount("https://", RateLimitedAdapter(make_limiter()))
+        return spotipy.Spotify(auth="token", requests_session=session)
+
+    monkeypatch.setattr(spotify, "spotipy_instance", spotipy_instance)
+
+    async def call(client, query, start):
+        result = await client.call_tool("spotify_search_artist", {"query": query})
+        return time.monotonic() - start, result.content[0].text
+
+    async def calls():
+        async with Client(spotify.mcp) as client:
+            start = time.monotonic()
+            throttled = asyncio.create_task(call(client, "throttled", start))
+            await asyncio.sleep(0.05)
+            return await asyncio.gather(throttled, call(client, "oasis", start))
+
+    (throttled_done, throttled_text), (other_done, other_text) = asyncio.run(calls())
+    assert throttled_done >= 0.5 and json.loads(throttled_text)["name"] == "Oasis"
+    # the other call completed while the first one was still waiting for its Retry-After
+    assert other_done < 0.3 and json.loads(other_text)["name"] == "Oasis"
@@ -0,0 +1,80 @@
+"""
+Tests of the per user response cache of the OpenAPI generated Spotify tools.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+pytest.importorskip("fastmcp")
+
+from fastmcp import Client, FastMCP
+
+from response_cache import ResponseCache, record_cache_control
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Spotify", "version": "1"},
+    "paths": {
+        "/artists/{id}": {"get": {"operationId": "get-an-artist", "parameters": [
+            {"name": "id", "in": "path", "required": True, "schema": {"type": "string"}}],
+            "responses": {"200": {"description": "artist"}}}},
+        "/me/following": {"put": {"operationId": "follow-artists-users", "parameters": [
+            {"name": "ids", "in": "query", "required": True, "schema": {"type": "string"}}],
+            "responses": {"204": {"description": "followed"}}}},
+    },
+}
+
+
+def make_server(cache_control: str):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.method)
+        if request.method != "GET":
+            return httpx.Response(200, json={})
+        return httpx.Response(200, headers={"Cache-Control": cache_control}, json={"name": "Muse"})
+
+    client = httpx.AsyncClient(base_url="https://api.spotify.com/v1", transport=httpx.MockTransport(handler),
+                               event_hooks={"response": [record_cache_control]})
+    mcp = FastMCP.from_openapi(openapi_spec=SPEC, client=client)
+    return mcp, calls
+
+
+def run_calls(mcp: FastMCP, cache: ResponseCache, users: list[str], tool: str = "get_an_artist"):
+    """Call a tool once per user in the list (the user comes from the cache user_key)."""
+    current = {}
+    cache.user_key = lambda: current["user"]
+    mcp.add_middleware(cache)
+
+    async def scenario():
+        async with Client(mcp) as client:
+            for user in users:
+                current["user"] = user
+                if user.startswith("follow:"):
+                    current["user"] = user.removeprefix("follow:")
+                    await client.call_tool("follow_artists_users", {"ids": "muse"})
+                else:
+                    await client.call_tool(tool, {"id": "muse"})
+
+    asyncio.run(scenario())
+
+
+def test_results_are_cached_per_user():
+    mcp, calls = make_server("public, max-age=7200")
+    cache = ResponseCache(default_ttl=60)
+    run_calls(mcp, cache, ["alice", "alice", "bob"])
+    assert calls == ["GET", "GET"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_write_invalidates_user_entries():
+    mcp, calls = make_server("public, max-age=7200")
+    run_calls(mcp, ResponseCache(default_ttl=60), ["alice", "bob", "follow:alice", "alice", "bob"])
+    assert calls == ["GET", "GET", "PUT", "GET"]
+
+
+def test_max_age_zero_is_not_cached():
+    mcp, calls = make_server("private, max-age=0")
+    run_calls(mcp, ResponseCache(default_ttl=60), ["alice", "alice"])
+    assert calls == ["GET", "GET"]
@@ -0,0 +1,77 @@
+"""
+Tests and benchmark for the Spotify response projections.
+"""
+import json
+import time
+
+from response_pruning import Projection, apply_projection, prune_response
+
+MARKETS = [f"{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(185)]
+
+
+def make_track(index):
+    return {
+        "id": f"track{index}", "name": f"Track {index}", "uri": f"spotify:track:{index}",
+        "duration_ms": 200000, "popularity": 50, "explicit": False,
+        "available_markets": MARKETS, "external_ids": {"isrc": f"ISRC{index}"},
+        "artists": [{"id": "artist", "name": "Artist", "uri": "spotify:artist:artist"}],
+        "album": {"id": "album", "name": "Album", "release_date": "2020-01-01", "available_markets": MARKETS,
+                  "images": [{"url": f"https://i.scdn.co/image/{size}", "height": size, "width": size} for size in (640, 300, 64)]},
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{index}"},
+    }
+
+
+def make_playlist(tracks):
+    return {"id": "playlist", "name": "Playlist", "description": "", "available_markets": MARKETS,
+            "tracks": {"total": tracks, "items": [{"added_by": {"id": "user"}, "video_thumbnail": {"url": None},
+                                                   "track": make_track(i)} for i in range(tracks)]}}
+
+
+def test_deny_paths():
+    payload = {"available_markets": ["FR"], "album": {"available_markets": ["FR"], "name": "Album"},
+               "items": [{"track": {"available_markets": ["FR"], "name": "Song"}}]}
+    assert apply_projection(payload, Projection(deny=("**.available_markets",))) == {
+        "album": {"name": "Album"}, "items": [{"track": {"name": "Song"}}]}
+    assert apply_projection(payload, Projection(deny=("items.track.name",))) == {
+        "available_markets": ["FR"], "album": {"available_markets": ["FR"], "name": "Album"},
+        "items": [{"track": {"available_markets": ["FR"]}}]}
+    # the payload itself is not modified
+    assert payload["album"]["available_markets"] == ["FR"]
+
+
+def test_allow_paths():
+    tracks = [make_track(1), make_track(2)]
+    pruned = prune_response("spotify_get_artist_top_tracks", tracks)
+    assert pruned[0] == {
+        "id": "track1", "name": "Track 1", "uri": "spotify:track:1", "duration_ms": 200000, "popularity": 50,
+        "explicit": False, "artists": [{"name": "Artist"}], "album": {"name": "Album", "release_date": "2020-01-01"},
+        "external_urls": {"spotify": "https://open.spotify.com/track/1"}}
+    assert apply_projection({"a": {"b": 1, "c": 2}, "d": 3}, Projection(allow=("a.*",))) == {
+        "a": {"b": 1, "c": 2}}
+
+
+def test_unknown_tool_uses_default_projection():
+    assert prune_response("get_an_album", {"name": "Album", "available_markets": MARKETS}) == {
+        "name": "Album"}
+
+
+def test_benchmark_playlist_payload():
+    """Compare payload bytes (asserted) and encode time (printed) of a 100 tracks playlist before and after pruning."""
+    playlist = make_playlist(100)
+    runs = 20
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        before = json.dumps(playlist, indent=2)
+    before_ms = (time.perf_counter() - start) * 1000 / runs
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        after = json.dumps(prune_response(
+            "spotify_get_playlist", playlist), indent=2)
+    after_ms = (time.perf_counter() - start) * 1000 / runs
+
+    print(f"\nspotify_get_playlist payload: {len(before)} -> {len(after)} bytes, "
+          f"encode {before_ms:.2f} ms -> {after_ms:.2f} ms (projection included)")
+    # wall clock timings are only reported, they are too noisy on shared runners to assert
+    assert len(after) < len(before) * 0.2
@@ -0,0 +1,58 @@
+"""
+Startup of the OpenAPI generated Spotify MCP server (mcp_server.py).
+
+The import-to-ready measure is opt-in, wall clock timings are too noisy to assert on
+shared runners:
+
+    SPOTIFY_STARTUP_BENCHMARK=1 uv run pytest -s test_startup.py
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+SERVER_DIR = Path(__file__).parent
+SPEC_PATH = SERVER_DIR / "sonallux-spotify-open-api.yml"
+MEASURE = """
+import asyncio, json, time
+import yaml
+from pathlib import Path
+
+spec_bytes = Path("sonallux-spotify-open-api.yml").read_bytes()
+parse = {}
+for name in ("SafeLoader", "CSafeLoader"):
+    if hasattr(yaml, name):
+        start = time.perf_counter()
+        yaml.load(spec_bytes, Loader=getattr(yaml, name))
+        parse[name] = time.perf_counter() - start
+
+start = time.perf_counter()
+import mcp_server
+tools = asyncio.run(mcp_server.mcp.get_tools())
+print(json.dumps({"seconds": time.perf_counter() - start, "tools": len(tools), "parse": parse}))
+"""
+
+
+def test_libyaml_loader_parses_the_spec_like_the_safe_loader():
+    if not hasattr(yaml, "CSafeLoader"):
+        pytest.skip("PyYAML built without libyaml")
+    spec_bytes = SPEC_PATH.read_bytes()
+    assert yaml.load(spec_bytes, Loader=yaml.CSafeLoader) == yaml.safe_load(spec_bytes)
+
+
+@pytest.mark.skipif(not os.getenv("SPOTIFY_STARTUP_BENCHMARK"), reason="set SPOTIFY_STARTUP_BENCHMARK=1 to measure")
+def test_import_to_ready():
+    """Measure, in fresh interpreters, the time from `import mcp_server` to the tool list being ready."""
+    pytest.importorskip("fastmcp")
+    runs = [json.loads(subprocess.run([sys.executable, "-c", MEASURE], cwd=SERVER_DIR, capture_output=True,
+                                      text=True, check=True).stdout.strip().splitlines()[-1])
+            for _ in range(3)]
+    best = min(runs, key=lambda run: run["seconds"])
+    parse = ", ".join(f"{loader} {seconds:.3f}s" for loader, seconds in best["parse"].items())
+    print(f"\nmcp_server import-to-ready, best of {len(runs)}: {best['seconds']:.3f}s "
+          f"({best['tools']} tools), spec parse: {parse}")
+    assert best["tools"] > 50
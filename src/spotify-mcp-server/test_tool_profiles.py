@@ -0,0 +1,85 @@
+"""
+Tests of the tool profiles, and measure of the list_tools payload of each profile.
+"""
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastmcp")
+
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ToolError
+from fastmcp.tools import Tool
+
+from tool_profiles import TOOL_PROFILES, ToolProfiles, compact_schema, shorten
+
+
+def test_shorten_keeps_first_sentence_without_markup():
+    text = ("The [Spotify ID](/documentation/web-api/concepts/spotify-uris-ids) of the playlist.<br/>\n"
+            "  _**Note**: it is likely that passing a large number of item URIs will fail._\n")
+    assert shorten(text, 100) == "The Spotify ID of the playlist."
+    assert shorten("word " * 50, 20) == "word word word wo..."
+
+
+def test_compact_schema_drops_examples_and_titles():
+    schema = {"type": "object", "required": ["title"], "properties": {
+        "title": {"title": "Title", "type": "string", "description": "The title. Long details.", "example": "x"},
+        "limit": {"type": "integer", "maximum": 50, "default": 20, "examples": [10]}}}
+    assert compact_schema(schema) == {"type": "object", "required": ["title"], "properties": {
+        "title": {"type": "string", "description": "The title."},
+        "limit": {"type": "integer", "maximum": 50, "default": 20}}}
+
+
+def test_middleware_filters_tools():
+    server = FastMCP("test")
+    server.tool(lambda q, type: "found", name="search", description="Search items. Long details.")
+    server.tool(lambda: "paused", name="pause_a_users_playback")
+    server.add_middleware(ToolProfiles(default_profile="discovery"))
+
+    async def scenario():
+        async with Client(server) as client:
+            tools = await client.list_tools()
+            assert [(tool.name, tool.description) for tool in tools] == [("search", "Search items.")]
+            result = await client.call_tool("search", {"q": "a", "type": "track"})
+            assert result.content[0].text == "found"
+            with pytest.raises(ToolError, match="not available in the 'discovery' profile"):
+                await client.call_tool("pause_a_users_playback", {})
+
+    asyncio.run(scenario())
+
+
+def test_trimmed_tools_follow_the_tool_definitions():
+    profile = TOOL_PROFILES["discovery"]
+    middleware = ToolProfiles(default_profile="full")
+    search = Tool.from_function(lambda q: "found", name="search", description="Search items. Long details.")
+    assert middleware.apply(profile, [search])[0].description == "Search items."
+    assert middleware.apply(profile, [search.model_copy()])[0] is middleware.apply(profile, [search])[0]
+
+    # a new definition of the tool (e.g. after a reload) is trimmed again, whatever its object id
+    changed = search.model_copy(update={"description": "Search the catalog. Long details."})
+    assert middleware.apply(profile, [changed])[0].description == "Search the catalog."
+
+
+def test_profile_payload_sizes():
+    """Measure the list_tools payload (what is injected in the prompt) of every profile."""
+    import mcp_server
+
+    tools = list(asyncio.run(mcp_server.mcp.get_tools()).values())
+    middleware = ToolProfiles(default_profile="full")
+    sizes = {}
+    for name, profile in TOOL_PROFILES.items():
+        exposed = middleware.apply(profile, tools)
+        if profile.tools is not None:
+            assert {tool.name for tool in exposed} == profile.tools, f"{name} references unknown tools"
+        payload = json.dumps([tool.to_mcp_tool().model_dump(mode="json", exclude_none=True) for tool in exposed])
+        sizes[name] = (len(exposed), len(payload))
+
+    full_bytes = sizes["full"][1]
+    print()
+    for name, (count, size) in sizes.items():
+        # ~4 bytes per token for English prose and JSON
+        print(f"{name:>16}: {count:>2} tools, {size:>6} bytes, ~{size // 4:>5} tokens "
+              f"({100 * size / full_bytes:.0f}% of full)")
+    assert sizes["playlist-builder"][1] < full_bytes * 0.1
+    assert sizes["discovery"][1] < full_bytes * 0.1
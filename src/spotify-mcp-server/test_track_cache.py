@@ -0,0 +1,61 @@
+"""
+Tests for the Spotify track resolution cache.
+"""
+from track_cache import TrackCache, TrackResolution, cache_key, normalize_artist, normalize_key_title, normalize_title
+
+
+def test_normalize_title_strips_version_qualifiers():
+    assert normalize_title("Wonderwall") == "wonderwall"
+    assert normalize_title("Wonderwall (Live)") == "wonderwall"
+    assert normalize_title("Wonderwall - Remastered") == "wonderwall"
+    assert normalize_title("Wonderwall - Remastered 2014") == "wonderwall"
+    assert normalize_title("Hey Jude [Remastered 2015]") == "hey jude"
+    assert normalize_title("Numb - Live at Milton Keynes") == "numb"
+    assert normalize_title("Señorita (feat. Camila Cabello)") == "senorita"
+    # a dash that is part of the title is kept
+    assert normalize_title("Ob-La-Di, Ob-La-Da") == "ob la di ob la da"
+
+
+def test_normalize_artist():
+    assert normalize_artist("The Beatles") == normalize_artist("beatles")
+    assert normalize_artist("Beyoncé") == "beyonce"
+    assert normalize_artist("Simon & Garfunkel") == "simon and garfunkel"
+
+
+def test_cache_key_keeps_version_markers():
+    assert normalize_key_title("Señorita (feat. Camila Cabello)") == "senorita"
+    assert normalize_key_title("Numb ft. Jay-Z") == "numb"
+    assert cache_key("Oasis", "Wonderwall (Live)") == cache_key("oasis", "  wonderwall - live")
+    assert cache_key("Oasis", "Wonderwall (Live)") != cache_key("Oasis", "Wonderwall")
+    assert cache_key("Oasis", "Wonderwall - Remastered") != cache_key("Oasis", "Wonderwall")
+    assert cache_key("Oasis", "Wonderwall (Acoustic)") != cache_key("Oasis", "Wonderwall (Live)")
+
+
+def test_cache_key_includes_market():
+    assert cache_key("Oasis", "Wonderwall", "fr") == cache_key(
+        "Oasis", "Wonderwall", "FR")
+    assert cache_key("Oasis", "Wonderwall", "fr") != cache_key(
+        "Oasis", "Wonderwall", "US")
+
+
+def test_memory_cache_hit_and_lru_eviction():
+    cache = TrackCache(max_entries=2)
+    for title in ["One", "Two", "Three"]:
+        cache.put("Artist", title, TrackResolution(
+            uri=f"spotify:track:{title}", score=1.0, market=None, track={"name": title}))
+    assert cache.get("Artist", "One") is None
+    assert cache.get("artist", "THREE").uri == "spotify:track:Three"
+    assert cache.get("Artist", "Three (Live)") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_sqlite_cache_is_shared(tmp_path):
+    db_path = str(tmp_path / "tracks.db")
+    TrackCache(db_path=db_path).put("Oasis", "Wonderwall", TrackResolution(
+        uri="spotify:track:1", score=0.9, market="FR", track={"name": "Wonderwall"}))
+
+    resolution = TrackCache(db_path=db_path).get(
+        "oasis", "Wonderwall", "fr")
+    assert resolution == TrackResolution(
+        uri="spotify:track:1", score=0.9, market="FR", track={"name": "Wonderwall"})
@@ -0,0 +1,73 @@
+"""
+Tests for the local ranking of Spotify track search candidates.
+"""
+import pytest
+
+import spotify
+from track_cache import TrackCache
+from track_matching import rank_tracks, score_track
+
+
+def track(name, artist, album="Album", duration_ms=200000, popularity=50):
+    return {"name": name, "uri": f"spotify:track:{name}:{artist}", "artists": [{"name": artist}],
+            "album": {"name": album}, "duration_ms": duration_ms, "popularity": popularity}
+
+
+def test_studio_version_beats_live_and_karaoke():
+    candidates = [
+        track("Wonderwall - Live", "Oasis", "Familiar to Millions", popularity=70),
+        track("Wonderwall (Karaoke Version)", "Karaoke Hits", popularity=90),
+        track("Wonderwall - Remastered", "Oasis",
+              "(What's the Story) Morning Glory?", popularity=60),
+    ]
+    ranked = rank_tracks("Oasis", "Wonderwall", candidates)
+    assert [c.track["name"] for c in ranked] == [
+        "Wonderwall - Remastered", "Wonderwall - Live", "Wonderwall (Karaoke Version)"]
+
+
+def test_requested_live_version_is_not_penalized():
+    candidates = [track("Numb", "Linkin Park"), track(
+        "Numb - Live", "Linkin Park", "Live in Texas")]
+    assert score_track("Linkin Park", "Numb (Live)", candidates[1]).details["penalty"] == 0
+    assert score_track("Linkin Park", "Numb", candidates[1]).details["penalty"] > 0
+    assert rank_tracks("Linkin Park", "Numb (Live)", candidates)[0].track["name"] == "Numb - Live"
+    ranked = rank_tracks("Linkin Park", "Numb", candidates, prefer_studio=False)
+    assert ranked[0].details["penalty"] == 0
+
+
+def test_artist_match_beats_cover():
+    ranked = rank_tracks("Oasis", "Wonderwall", [
+        track("Wonderwall", "Ryan Adams", popularity=80), track("Wonderwall", "Oasis", popularity=40)])
+    assert ranked[0].track["artists"][0]["name"] == "Oasis"
+
+
+def test_duration_breaks_ties():
+    ranked = rank_tracks("Pink Floyd", "Shine On You Crazy Diamond", [
+        track("Shine On You Crazy Diamond", "Pink Floyd", duration_ms=310000),
+        track("Shine On You Crazy Diamond", "Pink Floyd", duration_ms=811000)], duration_ms=810000)
+    assert ranked[0].track["duration_ms"] == 811000
+
+
+class FakeSearch:
+    """Spotipy search returning the studio and live versions of a song."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, q, type, limit, market=None):
+        self.calls += 1
+        return {"tracks": {"items": [track("Numb", "Linkin Park", "Meteora"),
+                                     track("Numb - Live", "Linkin Park", "Live in Texas")]}}
+
+
+@pytest.mark.parametrize("order", [["Numb", "Numb (Live)"], ["Numb (Live)", "Numb"]])
+def test_live_and_studio_resolutions_do_not_share_the_cache(monkeypatch, order):
+    monkeypatch.setattr(spotify, "track_cache", TrackCache())
+    sp = FakeSearch()
+    expected = {"Numb": "Numb", "Numb (Live)": "Numb - Live"}
+    for _ in range(2):
+        for title in order:
+            resolution, _ = spotify.resolve_track(sp, "Linkin Park", title)
+            assert resolution.track["name"] == expected[title]
+    # both resolutions were searched once, then served by the cache
+    assert sp.calls == 2
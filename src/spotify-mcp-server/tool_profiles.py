@@ -0,0 +1,192 @@
+"""
+Curated tool profiles for the OpenAPI generated Spotify MCP server.
+
+`mcp_server.py` generates a tool for each of the ~90 Spotify operations, and the whole
+`list_tools` payload (descriptions and input schemas) is injected in every LLM prompt.
+A profile exposes a curated subset of the tools and may trim their descriptions and
+schemas (first sentence only, no markdown links, examples or titles) and hide optional
+parameters the profile does not need.
+
+The profile is selected per client with the `profile` query parameter of the MCP URL
+(e.g. `http://localhost:9001/mcp?profile=discovery`), or for the whole server with
+`SPOTIFY_MCP_TOOL_PROFILE` (default `full`).
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from fastmcp.exceptions import ToolError
+from fastmcp.server.dependencies import get_http_request
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from fastmcp.tools import Tool
+
+logger = logging.getLogger("spotify_mcp_server")
+
+PROFILE_QUERY_PARAMETER = "profile"
+# Server wide default, overridden per client by the query parameter
+SPOTIFY_MCP_TOOL_PROFILE = os.getenv("SPOTIFY_MCP_TOOL_PROFILE", "full")
+MAX_DESCRIPTION_LENGTH = 160
+MAX_PARAMETER_DESCRIPTION_LENGTH = 100
+# Schema keywords the LLM does not need to call a tool
+DROPPED_SCHEMA_KEYS = ("example", "examples", "title")
+
+
+@dataclass(frozen=True)
+class ToolProfile:
+    """Tools exposed by a profile (None: every tool), whether they are trimmed, and the
+    optional parameters kept for some tools (the other optional ones are hidden)."""
+    name: str
+    tools: Optional[frozenset[str]] = None
+    compact: bool = False
+    parameters: dict[str, frozenset[str]] = field(default_factory=dict)
+
+    def includes(self, tool_name: str) -> bool:
+        return self.tools is None or tool_name in self.tools
+
+
+TOOL_PROFILES: dict[str, ToolProfile] = {
+    profile.name: profile for profile in (
+        ToolProfile("playlist-builder", compact=True, parameters={
+            # the body parameters are kept, not their query string duplicates
+            "add_tracks_to_playlist": frozenset({"uris", "position"}),
+            "search": frozenset({"market", "limit", "offset"}),
+        }, tools=frozenset({
+            "search", "get_several_tracks", "get_an_artists_top_tracks", "get_current_users_profile",
+            "get_a_list_of_current_users_playlists", "get_playlist", "get_playlists_tracks",
+            "create_playlist", "change_playlist_details", "add_tracks_to_playlist",
+            "remove_tracks_playlist", "reorder_or_replace_playlists_tracks",
+        })),
+        ToolProfile("discovery", compact=True, parameters={
+            # ~40 min/max/target tunables, only the targets an agent actually uses are kept
+            "get_recommendations": frozenset({
+                "limit", "market", "seed_artists", "seed_genres", "seed_tracks", "target_energy",
+                "target_danceability", "target_valence", "target_tempo", "target_popularity"}),
+        }, tools=frozenset({
+            "search", "get_an_artist", "get_multiple_artists", "get_an_artists_top_tracks",
+            "get_an_artists_albums", "get_an_artists_related_artists", "get_an_album",
+            "get_an_albums_tracks", "get_track", "get_recommendations", "get_recommendation_genres",
+            "get_new_releases", "get_users_top_artists", "get_users_top_tracks", "get_recently_played",
+        })),
+        ToolProfile("full"),
+    )
+}
+
+
+def get_profile(name: str) -> ToolProfile:
+    """Return a profile by name, raising ValueError for an unknown one."""
+    try:
+        return TOOL_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown tool profile '{name}', expected one of {', '.join(TOOL_PROFILES)}")
+
+
+_MARKDOWN_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_HTML_TAG = re.compile(r"<[^>]+>")
+_FIRST_SENTENCE = re.compile(r"^(.+?[.!?])(\s|$)")
+
+
+def shorten(text: str, max_length: int) -> str:
+    """Keep the first sentence of a description, without markdown links, HTML and extra whitespace."""
+    text = _HTML_TAG.sub(" ", _MARKDOWN_LINK.sub(r"\1", text))
+    text = " ".join(text.replace("_**Note**:", "Note:").split())
+    match = _FIRST_SENTENCE.match(text)
+    if match:
+        text = match.group(1)
+    if len(text) > max_length:
+        text = text[:max_length - 3].rstrip() + "..."
+    return text
+
+
+def compact_schema(schema: Any) -> Any:
+    """Return a copy of a JSON schema without examples and titles, and with short descriptions."""
+    if isinstance(schema, list):
+        return [compact_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    compacted = {}
+    for key, value in schema.items():
+        if key in DROPPED_SCHEMA_KEYS:
+            continue
+        if key == "description" and isinstance(value, str):
+            compacted[key] = shorten(value, MAX_PARAMETER_DESCRIPTION_LENGTH)
+        elif key == "properties" and isinstance(value, dict):
+            # Property names are data, not schema keywords (a parameter may be called "title")
+            compacted[key] = {name: compact_schema(prop) for name, prop in value.items()}
+        else:
+            compacted[key] = compact_schema(value)
+    return compacted
+
+
+def select_parameters(schema: dict[str, Any], kept: frozenset[str]) -> dict[str, Any]:
+    """Return a copy of an input schema with only the kept and required properties."""
+    required = set(schema.get("required", ()))
+    properties = {name: prop for name, prop in schema.get("properties", {}).items()
+                  if name in kept or name in required}
+    return {**schema, "properties": properties}
+
+
+def compact_tool(tool: Tool, profile: ToolProfile) -> Tool:
+    """Return a copy of a tool with a trimmed description and input schema."""
+    parameters = tool.parameters
+    if tool.name in profile.parameters:
+        parameters = select_parameters(parameters, profile.parameters[tool.name])
+    return tool.model_copy(update={
+        "description": shorten(tool.description or "", MAX_DESCRIPTION_LENGTH),
+        "parameters": compact_schema(parameters),
+    })
+
+
+def definition_hash(tool: Tool) -> str:
+    """Hash of the parts of a tool a profile trims, so a changed definition is trimmed again."""
+    definition = json.dumps([tool.description, tool.parameters], sort_keys=True, default=str)
+    return hashlib.sha256(definition.encode()).hexdigest()
+
+
+class ToolProfiles(Middleware):
+    """Middleware exposing the tools of the profile requested by the client."""
+
+    def __init__(self, default_profile: str = SPOTIFY_MCP_TOOL_PROFILE):
+        self.default_profile = get_profile(default_profile)
+        self._compacted: dict[tuple[str, str, str], Tool] = {}
+
+    def current_profile(self) -> ToolProfile:
+        """Return the profile of the query parameter of the current HTTP request, or the default one."""
+        try:
+            name = get_http_request().query_params.get(PROFILE_QUERY_PARAMETER)
+        except RuntimeError:  # stdio transport
+            name = None
+        if not name:
+            return self.default_profile
+        try:
+            return get_profile(name)
+        except ValueError as e:
+            logger.warning(f"{e}, using '{self.default_profile.name}'")
+            return self.default_profile
+
+    def apply(self, profile: ToolProfile, tools: list[Tool]) -> list[Tool]:
+        """Filter and trim a tool list for a profile, trimmed tools are computed once per definition."""
+        selected = [tool for tool in tools if profile.includes(tool.name)]
+        if not profile.compact:
+            return selected
+        compacted = []
+        for tool in selected:
+            key = (profile.name, tool.name, definition_hash(tool))
+            if key not in self._compacted:
+                self._compacted[key] = compact_tool(tool, profile)
+            compacted.append(self._compacted[key])
+        return compacted
+
+    async def on_list_tools(self, context: MiddlewareContext, call_next):
+        tools = await call_next(context)
+        return self.apply(self.current_profile(), tools)
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        profile = self.current_profile()
+        if not profile.includes(context.message.name):
+            raise ToolError(f"Tool '{context.message.name}' is not available in the '{profile.name}' profile")
+        return await call_next(context)
+
@@ -0,0 +1,174 @@
+"""
+Track resolution cache for the Spotify MCP server.
+
+Maps a normalized (artist, title, market) key to the Spotify track chosen for it,
+so the same song is only searched once across fans and shows. The key ignores case,
+accents, punctuation and featuring credits, but keeps version markers such as '(Live)'
+or '- Remastered': they select a different recording. Entries live in a
+bounded in-memory LRU, optionally backed by a SQLite file shared by every process
+of the container.
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+logger = logging.getLogger("spotify_mcp_server")
+
+# "(Live)", "[Remastered 2011]", "(feat. X)", ...
+_BRACKETS = re.compile(r"[\(\[][^\)\]]*[\)\]]")
+# " - Remastered 2009", " - Live at Wembley", " - Radio Edit", ...
+_DASH_SUFFIX = re.compile(
+    r"\s+-\s+.*\b(remaster(ed)?|live|version|edit|mix|mono|stereo|demo|acoustic|deluxe)\b.*$")
+_FEATURING = re.compile(r"\s+(feat\.?|ft\.?|featuring)\s+.*$")
+# "(feat. X)", "[ft. X]"
+_FEATURING_BRACKETS = re.compile(r"[\(\[]\s*(feat\.?|ft\.?|featuring)\s[^\)\]]*[\)\]]")
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def _fold(value: str) -> str:
+    """Lowercase and strip accents so 'Beyoncé' and 'beyonce' compare equal."""
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return value.casefold()
+
+
+def normalize_title(title: str) -> str:
+    """Normalize a track title, dropping version qualifiers such as '(Live)' or '- Remastered'."""
+    value = _fold(title)
+    value = _BRACKETS.sub(" ", value)
+    value = _DASH_SUFFIX.sub("", value)
+    value = _FEATURING.sub("", value)
+    value = _NON_WORD.sub(" ", value)
+    return _SPACES.sub(" ", value).strip()
+
+
+def normalize_key_title(title: str) -> str:
+    """Normalize a track title for cache keys, keeping version qualifiers such as '(Live)'."""
+    value = _fold(title)
+    value = _FEATURING_BRACKETS.sub(" ", value)
+    value = _FEATURING.sub("", value)
+    value = _NON_WORD.sub(" ", value)
+    return _SPACES.sub(" ", value).strip()
+
+
+def normalize_artist(artist: str) -> str:
+    """Normalize an artist name for comparison and cache keys."""
+    value = _fold(artist)
+    value = _FEATURING.sub("", value)
+    value = re.sub(r"^the\s+", "", value)
+    value = value.replace("&", " and ")
+    value = _NON_WORD.sub(" ", value)
+    return _SPACES.sub(" ", value).strip()
+
+
+# Version of the key format, keys of older formats (persisted in SQLite) are never read
+KEY_VERSION = "2"
+
+
+def cache_key(artist: str, title: str, market: Optional[str] = None) -> str:
+    """Build the cache key of an artist/title pair in a given market."""
+    return "|".join([KEY_VERSION, normalize_artist(artist), normalize_key_title(title), (market or "").upper()])
+
+
+@dataclass
+class TrackResolution:
+    """The Spotify track chosen for an artist/title pair."""
+    uri: str
+    score: float
+    market: Optional[str]
+    track: dict[str, Any]
+
+
+class TrackCache:
+    """Bounded in-memory LRU of track resolutions with an optional SQLite backing."""
+
+    def __init__(self, max_entries: int = 10000, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, TrackResolution] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            # Tools resolve tracks from worker threads, access is serialized by self._lock
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS track_resolutions (
+                    key TEXT PRIMARY KEY,
+                    uri TEXT NOT NULL,
+                    score REAL NOT NULL,
+                    market TEXT,
+                    track TEXT NOT NULL,
+                    resolved_at REAL NOT NULL
+                )""")
+            self._db.commit()
+            logger.info(f"Track cache backed by SQLite file {db_path}")
+
+    def get(self, artist: str, title: str, market: Optional[str] = None) -> Optional[TrackResolution]:
+        """Return the cached resolution of an artist/title pair, or None."""
+        key = cache_key(artist, title, market)
+        with self._lock:
+            resolution = self._entries.get(key)
+            if resolution is not None:
+                self._entries.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute(
+                    "SELECT uri, score, market, track FROM track_resolutions WHERE key = ?", (key,)).fetchone()
+                if row:
+                    resolution = TrackResolution(
+                        uri=row[0], score=row[1], market=row[2], track=json.loads(row[3]))
+                    self._remember(key, resolution)
+            if resolution is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return resolution
+
+    def put(self, artist: str, title: str, resolution: TrackResolution):
+        """Store the resolution of an artist/title pair."""
+        key = cache_key(artist, title, resolution.market)
+        with self._lock:
+            self._remember(key, resolution)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO track_resolutions (key, uri, score, market, track, resolved_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, resolution.uri, resolution.score, resolution.market,
+                     json.dumps(resolution.track), time.time()))
+                self._db.commit()
+
+    def clear(self):
+        """Drop every cached resolution, including the SQLite rows."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM track_resolutions")
+                self._db.commit()
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and the in-memory size."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries),
+                "sqlite": self.db_path}
+
+    def _remember(self, key: str, resolution: TrackResolution):
+        self._entries[key] = resolution
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# Process wide cache used by the Spotify tools
+track_cache = TrackCache(
+    max_entries=int(os.getenv("SPOTIFY_TRACK_CACHE_SIZE", "10000")),
+    db_path=os.getenv("SPOTIFY_TRACK_CACHE_PATH") or None,
+)
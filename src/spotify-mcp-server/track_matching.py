@@ -0,0 +1,100 @@
+"""
+Local ranking of Spotify track search candidates.
+
+Spotify's own ordering often puts live versions, karaoke covers or remasters first.
+Candidates are scored against the requested artist/title instead, so the first hit
+returned to the agent is the studio original whenever it exists.
+"""
+import re
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Any, Optional
+
+from track_cache import normalize_artist, normalize_title
+
+TITLE_WEIGHT = 0.55
+ARTIST_WEIGHT = 0.30
+DURATION_WEIGHT = 0.10
+POPULARITY_WEIGHT = 0.05
+# Durations further apart than this get no duration credit
+DURATION_TOLERANCE_MS = 30_000
+
+# Version markers looked up in the raw track and album names, with their penalty
+_VERSION_PENALTIES = [
+    (re.compile(r"\b(karaoke|in the style of|made famous by|tribute|backing track)\b"), 0.5),
+    (re.compile(r"\b(cover|instrumental|8[ -]?bit|lullaby)\b"), 0.3),
+    (re.compile(r"\blive\b|\bunplugged\b|\bsession\b"), 0.2),
+    (re.compile(r"\b(remix|mix|edit|demo|acoustic)\b"), 0.1),
+    (re.compile(r"\bremaster(ed)?\b"), 0.02),
+]
+
+
+@dataclass
+class TrackCandidate:
+    """A Spotify track item with its local match score."""
+    track: dict[str, Any]
+    score: float
+    details: dict[str, float] = field(default_factory=dict)
+
+
+def _similarity(left: str, right: str) -> float:
+    if not left or not right:
+        return 0.0
+    if left == right:
+        return 1.0
+    return SequenceMatcher(None, left, right).ratio()
+
+
+def version_penalty(requested_title: str, track: dict[str, Any]) -> float:
+    """
+    Penalty of a version that differs from the requested one: a non studio version (live,
+    karaoke, cover...) the user did not ask for, or a studio version when they asked for one.
+    """
+    requested = requested_title.casefold()
+    names = " ".join([track.get("name") or "",
+                      (track.get("album") or {}).get("name") or ""]).casefold()
+    penalty = 0.0
+    for pattern, value in _VERSION_PENALTIES:
+        if bool(pattern.search(names)) != bool(pattern.search(requested)):
+            penalty = max(penalty, value)
+    return penalty
+
+
+def score_track(artist: str, title: str, track: dict[str, Any],
+                duration_ms: Optional[int] = None, prefer_studio: bool = True) -> TrackCandidate:
+    """
+    Score how well a Spotify track item matches an artist/title pair.
+    The score combines title similarity, artist match, duration closeness, popularity
+    and, when prefer_studio is set, a penalty for live/karaoke/cover versions.
+    """
+    title_score = _similarity(normalize_title(title),
+                              normalize_title(track.get("name") or ""))
+    wanted_artist = normalize_artist(artist)
+    artist_score = max((_similarity(wanted_artist, normalize_artist(a.get("name") or ""))
+                        for a in track.get("artists") or []), default=0.0)
+    if duration_ms and track.get("duration_ms"):
+        delta = abs(track["duration_ms"] - duration_ms)
+        duration_score = max(0.0, 1 - delta / DURATION_TOLERANCE_MS)
+    else:
+        # Nothing to compare with, do not favour any candidate
+        duration_score = 1.0
+    popularity_score = (track.get("popularity") or 0) / 100
+    penalty = version_penalty(title, track) if prefer_studio else 0.0
+
+    score = (TITLE_WEIGHT * title_score + ARTIST_WEIGHT * artist_score +
+             DURATION_WEIGHT * duration_score + POPULARITY_WEIGHT * popularity_score - penalty)
+    return TrackCandidate(
+        track=track,
+        score=round(max(score, 0.0), 3),
+        details={"title": round(title_score, 3), "artist": round(artist_score, 3),
+                 "duration": round(duration_score, 3), "popularity": popularity_score,
+                 "penalty": penalty},
+    )
+
+
+def rank_tracks(artist: str, title: str, tracks: list[dict[str, Any]],
+                duration_ms: Optional[int] = None, prefer_studio: bool = True) -> list[TrackCandidate]:
+    """Score every candidate track and return them best first."""
+    candidates = [score_track(artist, title, track, duration_ms, prefer_studio)
+                  for track in tracks if track]
+    return sorted(candidates, key=lambda c: c.score, reverse=True)